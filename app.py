@@ -3,25 +3,24 @@ import os
 import sys
 import time
 from typing import Dict, List
-<<<<<<< HEAD
 
-import streamlit as st
-=======
 import streamlit as st
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file (before src reads its config)
 load_dotenv()
->>>>>>> ec1bd1a (Upload full local project)
 
 # ensure repo import works (src/ must be in repo root)
 sys.path.append(os.path.join(os.path.dirname(__file__), ""))
 
 # Try to import the orchestrator pipeline
 try:
-    from src.orchestrator import answer_query
+    from src.orchestrator import answer_query, answer_query_stream
+    from src.utils.answer_cache import get_answer_cache
 except Exception:
     answer_query = None
+    answer_query_stream = None
+    get_answer_cache = None
     import traceback
     _import_error = traceback.format_exc()
 else:
@@ -61,6 +60,7 @@ with st.sidebar:
     top_k = st.slider("Number of retrieved chunks (top_k)", min_value=1, max_value=10, value=5)
     user_id = st.text_input("User ID (optional)", value="", help="Leave empty for global memory.")
     show_prompt = st.checkbox("Show RAG prompt (debug)", value=False)
+    use_answer_cache = st.checkbox("Reuse answers to similar questions", value=True)
     st.markdown("")
 
 st.write("### Ask MARS a question (live web)")
@@ -78,7 +78,7 @@ sources_placeholder = st.container()
 factcheck_placeholder = st.container()
 metrics_placeholder = st.container()
 
-def run_pipeline_and_display(query_text: str, pages: int, top_k_val: int, user: str):
+def run_pipeline_and_display(query_text: str, pages: int, top_k_val: int, user: str, use_cache: bool = True):
     ts0 = time.time()
     try:
         if answer_query is None:
@@ -87,13 +87,45 @@ def run_pipeline_and_display(query_text: str, pages: int, top_k_val: int, user:
                 st.code(_import_error, language="py")
             return
 
-        with st.spinner("Running research, ingesting, retrieving, and generating summary..."):
-            out: Dict = answer_query(query_text, top_k=top_k_val)
-
-        # Summary
+        # Summary (streamed token by token; fact-check annotation appended at the end)
         with answer_placeholder:
             st.markdown("## 📝 Summary")
-            st.write(out.get("final_output", "No summary produced."))
+            status_box = st.empty()
+            summary_box = st.empty()
+
+        stage_labels = {
+            "cache": "Checking for a recent answer to a similar question...",
+            "research": "Checking memory, then researching the web and ingesting...",
+            "retrieve": "Retrieving relevant context...",
+            "generate": "Generating summary...",
+        }
+
+        out: Dict = {}
+        streamed = ""
+        t_first_token = None
+
+        for event in answer_query_stream(query_text, top_k=top_k_val, user=user or "default", use_cache=use_cache, pages=pages):
+            if event["type"] == "status":
+                status_box.info(stage_labels.get(event["stage"], event["stage"]))
+            elif event["type"] == "token":
+                if t_first_token is None:
+                    t_first_token = time.time() - ts0
+                    status_box.empty()
+                streamed += event["text"]
+                summary_box.markdown(streamed + "▌")
+            elif event["type"] == "result":
+                out = event["result"]
+
+        status_box.empty()
+        summary_box.markdown(out.get("final_output", "No summary produced."))
+
+        cache_info = out.get("cache")
+        if cache_info:
+            with answer_placeholder:
+                st.caption(
+                    f"⚡ Served from the answer cache: similar to \"{cache_info['query']}\" "
+                    f"(similarity {cache_info['similarity']:.2f}, {cache_info['age_s'] / 60:.0f} min old)"
+                )
 
         # Fact-check
         fc = out.get("fact_check", {})
@@ -128,7 +160,55 @@ def run_pipeline_and_display(query_text: str, pages: int, top_k_val: int, user:
         # Metrics
         t_elapsed = time.time() - ts0
         with metrics_placeholder:
-            st.markdown(f"**Elapsed:** {t_elapsed:.1f}s | pages searched: {pages} | top_k: {top_k_val}")
+            ttft = f"{t_first_token:.1f}s" if t_first_token is not None else "n/a"
+            coverage = out.get("coverage") or {}
+            pages_info = f"{coverage['pages']} (memory covered {coverage['covered']}/{top_k_val})" if coverage else pages
+            st.markdown(f"**Elapsed:** {t_elapsed:.1f}s | first token: {ttft} | pages searched: {pages_info} | top_k: {top_k_val}")
+
+            packing = out.get("packing") or {}
+            if packing.get("tokens_saved"):
+                st.markdown(
+                    f"**Context:** {packing['tokens_packed']} tokens "
+                    f"(packed from {packing['tokens_full']}, {packing['tokens_saved']} saved)"
+                )
+
+            llm = out.get("llm") or {}
+            if llm:
+                served = "response cache" if llm.get("cached") else ("shared call" if llm.get("coalesced") else f"{llm.get('attempts', 1)} attempt(s)")
+                st.markdown(
+                    f"**LLM:** {llm['provider']} / {llm['model']} | {llm.get('latency_ms', 0) / 1000:.1f}s | "
+                    f"tokens: {llm.get('prompt_tokens', 0)} in, {llm.get('completion_tokens', 0)} out | {served}"
+                )
+
+            if get_answer_cache is not None:
+                cache_stats = get_answer_cache().stats()
+                st.markdown(
+                    f"**Answer cache:** hit rate {cache_stats['hit_rate']:.0%} "
+                    f"({cache_stats['hits']} hits / {cache_stats['hits'] + cache_stats['misses']} lookups) | "
+                    f"entries: {cache_stats['entries']} | time saved: {cache_stats['saved_seconds']:.0f}s"
+                )
+
+            # Per-stage breakdown from the pipeline trace
+            timings = out.get("timings") or {}
+            stages = timings.get("stages") or {}
+            top_level = {name: s for name, s in stages.items() if s.get("parent") is None}
+            if top_level:
+                cols = st.columns(len(top_level))
+                for col, (name, s) in zip(cols, top_level.items()):
+                    col.metric(name, f"{s['ms'] / 1000:.2f}s")
+
+                with st.expander("Stage breakdown", expanded=False):
+                    total_ms = timings.get("total_ms") or 1
+                    st.table([
+                        {
+                            "stage": name,
+                            "within": s.get("parent") or "",
+                            "calls": s["count"],
+                            "time (ms)": round(s["ms"], 1),
+                            "share of total": f"{s['ms'] / total_ms:.0%}",
+                        }
+                        for name, s in stages.items()
+                    ])
 
         # Show prompt optionally
         if show_prompt:
@@ -143,7 +223,7 @@ def run_pipeline_and_display(query_text: str, pages: int, top_k_val: int, user:
         st.exception(e)
 
 if run_btn and query.strip():
-    run_pipeline_and_display(query.strip(), pages_to_search, top_k, user_id)
+    run_pipeline_and_display(query.strip(), pages_to_search, top_k, user_id.strip(), use_answer_cache)
 
 st.markdown("---")
 st.caption("MARS — Multi-Agent Research Assistant • Live web, RAG, and fact-check. Built for the Google AI Intensive Capstone.")
@@ -0,0 +1,146 @@
+"""
+bench_batch.py
+
+Batch throughput: answer_queries (concurrent, shared-page dedup) versus
+the current loop of answer_query calls, one question at a time.
+
+Uses the offline stand-ins of bench_e2e.py (fake search, local fixture
+server) and the LLM client layer with the stub provider
+(MARS_LLM_PROVIDER=stub), with simulated latencies, and a query set
+where questions on the same topic share result pages. Each mode runs in
+its own process against fresh memory and caches.
+
+The answer cache and the coverage check are off by default so both
+modes do the same research work; pass --keep-shortcuts to leave them on.
+
+Usage:
+    python benchmarks/bench_batch.py
+    python benchmarks/bench_batch.py --page-latency-ms 300 --llm-latency-ms 1500 --json out.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, ".."))
+sys.path.append(HERE)
+
+MODES = ["serial", "batch"]
+
+
+def make_queries(repeat: int):
+    from bench_e2e import DEFAULT_QUERIES
+
+    # Two phrasings per topic: same search results, different questions
+    reworded = [q.rstrip("?") + " in practice?" for q in DEFAULT_QUERIES]
+    return (DEFAULT_QUERIES + reworded) * repeat
+
+
+def run_mode(args) -> dict:
+    import bench_e2e as e2e
+
+    requests = Counter()
+    corpus = e2e.make_corpus(args.pages_per_topic, args.paragraphs)
+    server = e2e.serve(corpus, latency=args.page_latency_ms / 1000, requests=requests)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    import src.agents.research_live as research_live
+    import src.orchestrator as orchestrator
+
+    research_live.search_web = e2e.make_fake_search(base_url, corpus, args.search_latency_ms / 1000)
+
+    embedded = Counter()
+    embed_text = orchestrator.embed_text
+
+    def counting_embed(texts, *a, **kw):
+        embedded["texts"] += len(texts) if isinstance(texts, list) else 1
+        return embed_text(texts, *a, **kw)
+
+    orchestrator.embed_text = counting_embed
+
+    embed_text("warm up", use_cache=False)  # load the model outside the timed region
+
+    queries = make_queries(args.repeat)
+
+    t0 = time.perf_counter()
+    if args.mode == "serial":
+        results = [orchestrator.answer_query(q, top_k=args.top_k, pages=args.pages) for q in queries]
+    else:
+        results = orchestrator.answer_queries(queries, top_k=args.top_k, pages=args.pages)
+    elapsed = time.perf_counter() - t0
+
+    server.shutdown()
+
+    return {
+        "mode": args.mode,
+        "queries": len(queries),
+        "errors": sum(1 for r in results if "error" in r),
+        "wall_s": round(elapsed, 3),
+        "queries_per_s": round(len(queries) / elapsed, 3),
+        "page_requests": sum(requests.values()),
+        "unique_pages": len(requests),
+        "chunks_embedded": embedded["texts"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the query set")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pages-per-topic", type=int, default=4)
+    parser.add_argument("--paragraphs", type=int, default=30)
+    parser.add_argument("--search-latency-ms", type=float, default=500.0)
+    parser.add_argument("--page-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=1000.0, help="simulated stub LLM response time")
+    parser.add_argument("--concurrency", type=int, default=8, help="MARS_QUERY_MAX_CONCURRENCY for the batch")
+    parser.add_argument("--keep-shortcuts", action="store_true", help="leave the answer cache and coverage check on")
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = []
+    for mode in MODES:
+        workdir = tempfile.mkdtemp(prefix=f"mars-batch-{mode}-")
+        env = dict(
+            os.environ,
+            CHROMA_PERSIST_DIR=os.path.join(workdir, "chroma_db"),
+            MARS_FAISS_PERSIST_DIR=os.path.join(workdir, "faiss_db"),
+            MARS_CACHE_DIR=os.path.join(workdir, "cache"),
+            MARS_EMBEDDING_CACHE_DIR=os.path.join(workdir, "cache", "embeddings"),
+            MARS_QUERY_MAX_CONCURRENCY=str(args.concurrency),
+            MARS_LLM_PROVIDER="stub",
+            MARS_LLM_STUB_LATENCY_MS=str(args.llm_latency_ms),
+        )
+        if not args.keep_shortcuts:
+            env.update(MARS_ANSWER_CACHE="0", MARS_COVERAGE_CHECK="0")
+
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode] + sys.argv[1:],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, text=True
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    serial, batch = results
+    print(f"{'mode':<8} {'wall':>8} {'q/s':>7} {'page reqs':>10} {'embedded':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['wall_s']:>7.1f}s {r['queries_per_s']:>7.2f} {r['page_requests']:>10} {r['chunks_embedded']:>9}")
+    print(f"speedup: {serial['wall_s'] / batch['wall_s']:.2f}x  ({batch['unique_pages']} unique pages)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
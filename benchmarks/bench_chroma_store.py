@@ -0,0 +1,87 @@
+"""
+bench_chroma_store.py
+
+Micro-benchmark of Chroma access patterns (ops/sec):
+
+- before: new PersistentClient + get_or_create_collection on every call
+- after:  the shared ChromaStore (one client/collection per persist dir)
+
+Runs against a throwaway persist directory. The store's BM25 index is
+turned off (MARS_HYBRID_SEARCH=0), so both paths do the same Chroma
+work; bench_hybrid.py measures the lexical indexing cost.
+
+Usage:
+    python benchmarks/bench_chroma_store.py --ops 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+# Compare client reuse alone, without lexical indexing on the "after" path
+os.environ["MARS_HYBRID_SEARCH"] = "0"
+
+import chromadb
+
+from src.db.chroma_store import ChromaStore, COLLECTION_NAME
+
+
+def random_vec(rng, dim):
+    return [rng.random() for _ in range(dim)]
+
+
+def bench(label, op, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        op(i)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<24} {n / elapsed:10.1f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    persist_dir = tempfile.mkdtemp(prefix="mars-bench-chroma-")
+    vectors = [random_vec(rng, args.dim) for _ in range(args.ops)]
+
+    def old_collection():
+        client = chromadb.PersistentClient(path=persist_dir)
+        return client.get_or_create_collection(name=COLLECTION_NAME)
+
+    def old_upsert(i):
+        old_collection().upsert(
+            ids=[f"old-{i}"], embeddings=[vectors[i]], documents=[f"doc {i}"],
+            metadatas=[{"source": "bench", "user": "default"}]
+        )
+
+    def old_query(i):
+        old_collection().query(query_embeddings=[vectors[i]], n_results=5, where={"user": "default"})
+
+    store = ChromaStore(persist_dir=persist_dir).open()
+
+    def new_upsert(i):
+        store.upsert_chunk(f"doc {i}", vectors[i], "bench")
+
+    def new_query(i):
+        store.query(vectors[i], top_k=5)
+
+    print(f"ops: {args.ops}  dim: {args.dim}")
+    bench("upsert (before)", old_upsert, args.ops)
+    bench("upsert (after)", new_upsert, args.ops)
+    bench("query  (before)", old_query, args.ops)
+    bench("query  (after)", new_query, args.ops)
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+bench_chunking.py
+
+Retrieval quality vs throughput: legacy 800-word chunker against the
+sentence-aware, token-budgeted chunker.
+
+Builds synthetic pages of distinct factual sentences, chunks them with
+each chunker, embeds the chunks and asks one question per fact. A hit
+means the fact's sentence is inside a top-k chunk. Facts that land past
+the model's 256-token window in an 800-word chunk are invisible to the
+embedding, which is what the recall numbers expose.
+
+Usage:
+    python benchmarks/bench_chunking.py --pages 20 --facts 60 --top-k 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.chunking import chunk_sentences
+from src.utils.embeddings import embed_text
+
+ENTITIES = ["Aurora", "Basalt", "Cobalt", "Delta", "Ember", "Fjord", "Granite", "Harbor", "Indigo", "Juniper"]
+CITIES = ["Lisbon", "Nairobi", "Osaka", "Quito", "Tallinn", "Hanoi", "Perth", "Denver", "Bergen", "Accra"]
+TOPICS = ["solar panels", "hospital beds", "electric buses", "clinical trials", "school laptops",
+          "water filters", "wind turbines", "bike lanes", "data centers", "vaccine doses"]
+FILLER = ("The report also covered staffing, procurement timelines and the general outlook "
+          "for the region over the coming years, without specific figures.")
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 800):
+    words = text.split()
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+
+
+def make_corpus(rng, pages, facts_per_page, filler_per_fact):
+    docs, questions = [], []
+    for p in range(pages):
+        sentences = []
+        for f in range(facts_per_page):
+            entity, city, topic = rng.choice(ENTITIES), rng.choice(CITIES), rng.choice(TOPICS)
+            number = rng.randint(100, 99999)
+            fact = f"The {entity} programme in {city} deployed {number} {topic} during {2000 + p}."
+            sentences.append(fact)
+            sentences.extend([FILLER] * filler_per_fact)
+            questions.append((f"How many {topic} did the {entity} programme in {city} deploy in {2000 + p}?", fact))
+        docs.append(" ".join(sentences))
+    return docs, questions
+
+
+def evaluate(name, chunker, docs, questions, top_k):
+    t0 = time.perf_counter()
+    chunks = [c for doc in docs for c in chunker(doc)]
+    t_chunk = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectors = np.asarray(embed_text(chunks, use_cache=False), dtype=np.float32)
+    t_embed = time.perf_counter() - t0
+
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = np.asarray(embed_text([qt for qt, _ in questions], use_cache=False), dtype=np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+    top = np.argsort(-(q @ vectors.T), axis=1)[:, :top_k]
+    hits = sum(any(fact in chunks[i] for i in row) for row, (_, fact) in zip(top, questions))
+
+    words = sum(len(doc.split()) for doc in docs)
+    print(
+        f"{name:<10} chunks: {len(chunks):5d}  recall@{top_k}: {hits / len(questions):6.1%}  "
+        f"chunk: {words / t_chunk / 1000:8.1f}k words/s  embed: {len(chunks) / t_embed:7.1f} chunks/s  "
+        f"ingest total: {t_chunk + t_embed:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--facts", type=int, default=6, help="facts per page")
+    parser.add_argument("--filler", type=int, default=8, help="filler sentences after each fact")
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    docs, questions = make_corpus(rng, args.pages, args.facts, args.filler)
+    embed_text("warm up", use_cache=False)
+
+    evaluate("legacy", legacy_chunk_text, docs, questions, args.top_k)
+    evaluate("sentence", chunk_sentences, docs, questions, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
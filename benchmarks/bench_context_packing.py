@@ -0,0 +1,158 @@
+"""
+bench_context_packing.py
+
+Prompt size with full chunks (format_context) versus the token-budgeted
+context packer, for several top_k and chunk sizes.
+
+Chunks are synthetic sentences drawn from a few topic vocabularies; the
+query names one topic. Reports, per setting:
+
+- context tokens, full and packed, and the share saved
+- how many of the packed sentences come from the query's topic
+- packing time per query
+
+With --llm, each prompt is also sent through summary_agent.generate_summary
+(the configured LLM, MARS_LLM_PROVIDER; the response cache is turned off)
+and the completion latency of the full and the packed prompt is compared.
+
+Usage:
+    python benchmarks/bench_context_packing.py
+    python benchmarks/bench_context_packing.py --top-k 5 10 --chunk-words 190 800 --budget 1500 --llm --json out.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Time real completions, not LLM response cache hits
+os.environ["MARS_LLM_CACHE"] = "0"
+
+from src.utils.context_packer import CONTEXT_TOKEN_BUDGET, pack_context
+
+TOPICS = {
+    "solar": "solar panels photovoltaic grid storage sunlight inverter rooftop",
+    "health": "hospital patients clinical imaging diagnosis radiology triage",
+    "ocean": "coral reefs fisheries plankton acidification reef bleaching",
+    "quantum": "qubits error correction superconducting entanglement gates",
+}
+FILLER = "the report said new study results show growth across the sector as teams expect more work next year".split()
+
+
+def sentence(rng, topic: str, n: int = 16) -> str:
+    words = TOPICS[topic].split()
+    picked = [rng.choice(words) if rng.random() < 0.35 else rng.choice(FILLER) for _ in range(n)]
+    return " ".join(picked).capitalize() + "."
+
+
+def retrieved_for(rng, topic: str, top_k: int, chunk_words: int) -> dict:
+    """
+    query_memory-shaped result: chunks in rank order, on-topic ones first
+    (about half of them), the rest from other topics.
+    """
+    others = [t for t in TOPICS if t != topic]
+    documents, metadatas = [], []
+    for rank in range(top_k):
+        chunk_topic = topic if rank < (top_k + 1) // 2 else rng.choice(others)
+        sentences = [sentence(rng, chunk_topic) for _ in range(max(1, chunk_words // 16))]
+        documents.append(" ".join(sentences))
+        metadatas.append({"source": f"https://example.com/{chunk_topic}/{rank}"})
+    return {"ids": [[f"c{i}" for i in range(top_k)]], "documents": [documents], "metadatas": [metadatas]}
+
+
+def on_topic_share(context: str, topic: str) -> float:
+    words = set(TOPICS[topic].split())
+    sentences = [s for s in context.replace("\n", " ").split(".") if s.strip() and "Source:" not in s]
+    if not sentences:
+        return 0.0
+    return sum(1 for s in sentences if len(words & set(s.lower().split())) >= 2) / len(sentences)
+
+
+def llm_seconds(query: str, context: str) -> float:
+    from src.agents.summary_agent import build_rag_prompt, generate_summary
+    from src.pipeline_context import PipelineContext
+
+    # A context that is already "retrieved", so only the LLM call runs
+    ctx = PipelineContext(query=query, query_embedding=[0.0], context_text=context)
+    ctx.prompt = build_rag_prompt(query, context)
+
+    t0 = time.perf_counter()
+    generate_summary(query, ctx=ctx)
+    return time.perf_counter() - t0
+
+
+def run(args, top_k: int, chunk_words: int) -> dict:
+    rng = random.Random(top_k * 1000 + chunk_words)
+    full_tokens, packed_tokens, pack_ms, on_topic = [], [], [], []
+    llm_full, llm_packed = [], []
+
+    for q in range(args.queries):
+        topic = list(TOPICS)[q % len(TOPICS)]
+        query = f"What is new in {' '.join(TOPICS[topic].split()[:3])}?"
+        retrieved = retrieved_for(rng, topic, top_k, chunk_words)
+
+        full, _ = pack_context(query, retrieved, budget=0)
+        t0 = time.perf_counter()
+        packed, stats = pack_context(query, retrieved, budget=args.budget)
+        pack_ms.append((time.perf_counter() - t0) * 1000)
+
+        full_tokens.append(stats["tokens_full"])
+        packed_tokens.append(stats["tokens_packed"])
+        on_topic.append(on_topic_share(packed, topic))
+
+        if args.llm and q < args.llm_queries:
+            llm_full.append(llm_seconds(query, full))
+            llm_packed.append(llm_seconds(query, packed))
+
+    result = {
+        "top_k": top_k,
+        "chunk_words": chunk_words,
+        "tokens_full": round(statistics.mean(full_tokens)),
+        "tokens_packed": round(statistics.mean(packed_tokens)),
+        "saved_share": round(1 - sum(packed_tokens) / sum(full_tokens), 3),
+        "on_topic_share": round(statistics.mean(on_topic), 3),
+        "pack_ms_p50": round(statistics.median(pack_ms), 3),
+    }
+    if llm_full:
+        result["llm_s_full_p50"] = round(statistics.median(llm_full), 3)
+        result["llm_s_packed_p50"] = round(statistics.median(llm_packed), 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--chunk-words", type=int, nargs="+", default=[190, 800])
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET or 1500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--llm", action="store_true", help="also time real LLM completions")
+    parser.add_argument("--llm-queries", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = [run(args, k, words) for words in args.chunk_words for k in args.top_k]
+
+    print(f"\nbudget {args.budget} tokens, {args.queries} queries per setting")
+    print(
+        f"{'top_k':>5} {'words/chunk':>11} {'tokens full':>11} {'packed':>7} {'saved':>6} "
+        f"{'on-topic':>8} {'pack ms':>8} {'LLM s full → packed':>21}"
+    )
+    for r in results:
+        llm = f"{r['llm_s_full_p50']:.2f} → {r['llm_s_packed_p50']:.2f}" if "llm_s_full_p50" in r else "-"
+        print(
+            f"{r['top_k']:>5} {r['chunk_words']:>11} {r['tokens_full']:>11} {r['tokens_packed']:>7} "
+            f"{r['saved_share']:>6.0%} {r['on_topic_share']:>8.0%} {r['pack_ms_p50']:>8.2f} {llm:>21}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+bench_e2e.py
+
+Offline end-to-end benchmark of ingest_query and answer_query.
+
+External services are replaced by local stand-ins, so it runs on a box
+with no network and no API keys:
+
+- search:  a fake search_web ranking a fixture corpus by word overlap
+- web:     a local HTTP server serving that corpus
+- LLM:     the LLM client layer (src/llm) with the local stub provider,
+           MARS_LLM_PROVIDER=stub (optional simulated latency)
+
+Embedding, chunking, the vector store, the LLM client (response cache,
+retries, concurrency limit) and fact-checking are the real code paths
+(the embedding model must be available in the local model cache).
+Caches and memory live in a throwaway directory. The answer cache is
+off unless --answer-cache is given, so every answer runs the pipeline.
+
+Reports, as JSON:
+- per-stage latency percentiles (search, fetch, embed, upsert, retrieve,
+  generate, factcheck) and per-query ingest/answer latency
+- throughput (queries/s, pages/s, chunks/s)
+- peak memory (max RSS, and the tracemalloc peak with --tracemalloc)
+
+Usage:
+    python benchmarks/bench_e2e.py --out report.json
+    python benchmarks/bench_e2e.py --backend faiss --pages 5 --llm-latency-ms 300
+    python benchmarks/bench_e2e.py --repeat 2 --answer-cache
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+TOPICS = {
+    "solar": "solar panels photovoltaic energy grid storage sunlight efficiency",
+    "health": "healthcare AI diagnosis hospitals patients clinical imaging",
+    "climate": "climate change emissions carbon warming policy adaptation",
+    "quantum": "quantum computing qubits error correction algorithms hardware",
+    "ocean": "ocean ecosystems coral reefs fisheries plankton acidification",
+    "space": "space exploration rockets orbit satellites launch missions",
+    "batteries": "lithium batteries cells charging electric vehicles recycling",
+    "vaccines": "vaccines immunity trials antibodies mrna public health",
+}
+
+DEFAULT_QUERIES = [
+    "How efficient are solar panels for grid storage?",
+    "What is AI doing in healthcare diagnosis?",
+    "Which climate policies cut carbon emissions?",
+    "How does quantum error correction work?",
+    "Why are coral reefs affected by ocean acidification?",
+    "What missions are planned for space exploration?",
+    "How are lithium batteries recycled from electric vehicles?",
+    "How do mRNA vaccines build immunity?",
+]
+
+FILLER = ("researchers", "reported", "new", "results", "across", "several", "regions", "this",
+          "year", "with", "broader", "participation", "and", "steady", "funding", "growth")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+# -------------------------------------
+# Fixture corpus + local web server
+# -------------------------------------
+def make_corpus(pages_per_topic: int, paragraphs: int, seed: int = 0) -> Dict[str, Dict]:
+    rng = random.Random(seed)
+    corpus = {}
+
+    for topic, vocab in TOPICS.items():
+        words = vocab.split()
+        for i in range(pages_per_topic):
+            body = []
+            for _ in range(paragraphs):
+                sentences = []
+                for _ in range(rng.randint(3, 6)):
+                    n = rng.randint(10, 24)
+                    sentence = " ".join(rng.choice(words if rng.random() < 0.4 else FILLER) for _ in range(n))
+                    sentences.append(sentence.capitalize() + ".")
+                body.append(f"<p>{' '.join(sentences)}</p>")
+
+            nav = "".join(f"<li><a href='/{t}'>{t}</a></li>" for t in TOPICS)
+            html = (f"<html><head><title>{topic} {i}</title><script>var x = 1;</script></head>"
+                    f"<body><nav><ul>{nav}</ul></nav>{''.join(body)}<footer><p>Legal.</p></footer></body></html>")
+            corpus[f"/{topic}/{i}"] = {"topic": topic, "body": html.encode("utf-8")}
+
+    return corpus
+
+
+def serve(corpus: Dict[str, Dict], latency: float = 0.0, requests: Optional[Counter] = None) -> ThreadingHTTPServer:
+    """
+    Serves the corpus on a free local port. `latency` delays every
+    response; `requests` counts requests per path.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if requests is not None:
+                requests[self.path] += 1
+            if latency:
+                time.sleep(latency)
+            page = corpus.get(self.path)
+            if page is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page["body"])))
+            self.end_headers()
+            self.wfile.write(page["body"])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_fake_search(base_url: str, corpus: Dict[str, Dict], latency: float):
+    """
+    Ranks pages by overlap between the query words and their topic
+    vocabulary; ties broken by path so results are deterministic.
+    """
+    def search_web(query: str, num_results: int = 5) -> List[str]:
+        if latency:
+            time.sleep(latency)
+        words = set(_WORD_RE.findall(query.lower()))
+        ranked = sorted(
+            corpus,
+            key=lambda path: (-len(words & set(TOPICS[corpus[path]["topic"]].lower().split())), path)
+        )
+        return [base_url + path for path in ranked[:num_results]]
+
+    return search_web
+
+
+# -------------------------------------
+# Stage timers
+# -------------------------------------
+class StageTimes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, stage: str, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - t0)
+        return timed
+
+
+def summarize(samples: List[float]) -> Dict:
+    arr = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "count": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p90_ms": round(float(np.percentile(arr, 90)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "max_ms": round(float(arr.max()), 3),
+        "total_s": round(float(arr.sum()) / 1000, 4),
+    }
+
+
+def install_stand_ins(times: StageTimes, search_fn):
+    """
+    Swap in the fake search and wrap each pipeline stage with a timer.
+    Stages are patched where they are looked up at call time.
+    """
+    import src.agents.research_live as research_live
+    import src.agents.summary_agent as summary_agent
+    import src.orchestrator as orchestrator
+
+    research_live.search_web = times.wrap("search", search_fn)
+    research_live.fetch_page_text = times.wrap("fetch", research_live.fetch_page_text)
+
+    orchestrator.embed_text = times.wrap("embed", orchestrator.embed_text)
+    orchestrator.upsert_chunks = times.wrap("upsert", orchestrator.upsert_chunks)
+    orchestrator.prepare_context = times.wrap("retrieve", summary_agent.prepare_context)
+    orchestrator.generate_summary = times.wrap("generate", summary_agent.generate_summary)
+    orchestrator._finalize = times.wrap("factcheck", orchestrator._finalize)
+
+    return orchestrator
+
+
+# -------------------------------------
+# Runner
+# -------------------------------------
+def run(args) -> Dict:
+    corpus = make_corpus(args.pages_per_topic, args.paragraphs)
+    server = serve(corpus)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    queries = queries * args.repeat
+
+    times = StageTimes()
+    orchestrator = install_stand_ins(times, make_fake_search(base_url, corpus, args.search_latency_ms / 1000))
+
+    # Load the embedding model outside the timed region
+    from src.utils.embeddings import embed_text
+    embed_text("warm up", use_cache=False)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    report = {"config": vars(args), "queries": len(queries), "corpus_pages": len(corpus), "phases": {}}
+
+    for phase in ("ingest", "answer"):
+        times.samples.clear()
+        latencies = []
+        chunks = 0
+
+        t0 = time.perf_counter()
+        for query in queries:
+            q0 = time.perf_counter()
+            if phase == "ingest":
+                stats = orchestrator.ingest_query(query, pages=args.pages)
+                chunks += stats["chunks"]
+            else:
+                orchestrator.answer_query(query, top_k=args.top_k, use_cache=args.answer_cache)
+            latencies.append(time.perf_counter() - q0)
+        elapsed = time.perf_counter() - t0
+
+        pages = len(times.samples.get("fetch", []))
+
+        report["phases"][phase] = {
+            "wall_s": round(elapsed, 4),
+            "queries_per_s": round(len(queries) / elapsed, 3),
+            "pages_per_s": round(pages / elapsed, 3),
+            "chunks_per_s": round(chunks / elapsed, 3) if phase == "ingest" else None,
+            "query_latency": summarize(latencies),
+            "stages": {stage: summarize(samples) for stage, samples in sorted(times.samples.items()) if samples},
+        }
+
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    if args.tracemalloc:
+        report["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    server.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", help="file with one query per line (default: built-in set)")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the query set")
+    parser.add_argument("--pages", type=int, default=3, help="pages fetched per query")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pages-per-topic", type=int, default=6)
+    parser.add_argument("--paragraphs", type=int, default=30, help="paragraphs per fixture page")
+    parser.add_argument("--backend", choices=["chroma", "faiss"], default="chroma")
+    parser.add_argument("--search-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated stub LLM response time")
+    parser.add_argument("--answer-cache", action="store_true", help="serve similar questions from the answer cache")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python allocation peak (slower)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    # Throwaway memory + caches; must be set before src modules are imported
+    workdir = tempfile.mkdtemp(prefix="mars-e2e-")
+    os.environ["MARS_VECTOR_STORE"] = args.backend
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "chroma_db")
+    os.environ["MARS_FAISS_PERSIST_DIR"] = os.path.join(workdir, "faiss_db")
+    os.environ["MARS_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["MARS_EMBEDDING_CACHE_DIR"] = os.path.join(workdir, "cache", "embeddings")
+    os.environ["MARS_LLM_PROVIDER"] = "stub"
+    os.environ["MARS_LLM_STUB_LATENCY_MS"] = str(args.llm_latency_ms)
+
+    # Pipeline progress prints go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    text = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Report written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
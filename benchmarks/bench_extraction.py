@@ -0,0 +1,124 @@
+"""
+bench_extraction.py
+
+Pages/sec and peak Python memory of page extraction on a fixture corpus
+served from a local HTTP server:
+
+- legacy: requests.get + full body + html.parser + get_text() twice per <p>
+- guarded: fetch_page_text's path (streamed body with byte cap, content-type
+  guard, lxml when installed, single-pass boilerplate stripping)
+
+The corpus mixes article pages with heavy nav/script boilerplate, very
+large pages and binary (PDF) responses.
+
+Usage:
+    python benchmarks/bench_extraction.py --pages 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.html_extract import SkippedPage, read_html, extract_text, HTML_PARSER, MAX_PAGE_BYTES
+
+LOREM = ("Researchers reported steady progress on the programme this year, citing new funding "
+         "and broader participation across several regions. ")
+
+
+def article(rng, paragraphs):
+    nav = "".join(f"<li><a href='/{i}'>Section {i}</a></li>" for i in range(80))
+    script = "<script>" + "var x = 1;" * 2000 + "</script>"
+    body = "".join(f"<p>{LOREM * rng.randint(1, 6)}<b>{i}</b></p>" for i in range(paragraphs))
+    footer = "<footer>" + "<p>Copyright and legal links.</p>" * 20 + "</footer>"
+    return f"<html><head>{script}</head><body><nav><ul>{nav}</ul></nav>{body}{footer}</body></html>"
+
+
+def make_corpus(rng, pages):
+    corpus = {}
+    for i in range(pages):
+        kind = i % 10
+        if kind == 8:
+            corpus[f"/doc{i}.pdf"] = ("application/pdf", os.urandom(3 * 1024 * 1024))
+        elif kind == 9:
+            corpus[f"/page{i}"] = ("text/html; charset=utf-8", article(rng, 6000).encode())
+        else:
+            corpus[f"/page{i}"] = ("text/html; charset=utf-8", article(rng, 40).encode())
+    return corpus
+
+
+def serve(corpus):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content_type, body = corpus[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_fetch(session, url):
+    response = session.get(url, timeout=10)
+    soup = BeautifulSoup(response.text, "html.parser")
+    paragraphs = soup.find_all("p")
+    return "\n".join(p.get_text().strip() for p in paragraphs if p.get_text().strip())
+
+
+def guarded_fetch(session, url):
+    with session.get(url, timeout=10, stream=True) as response:
+        try:
+            return extract_text(read_html(response))
+        except SkippedPage:
+            return ""
+
+
+def run(name, fetch, urls):
+    session = requests.Session()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    chars = sum(len(fetch(session, url)) for url in urls)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<8} {len(urls) / elapsed:8.1f} pages/s   peak {peak / 2**20:8.1f} MiB   text {chars / 1e6:6.2f} M chars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    corpus = make_corpus(random.Random(0), args.pages)
+    server = serve(corpus)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in corpus]
+
+    print(f"pages: {len(urls)}  parser: {HTML_PARSER}  byte cap: {MAX_PAGE_BYTES // 1024} KiB")
+    run("legacy", legacy_fetch, urls)
+    run("guarded", guarded_fetch, urls)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
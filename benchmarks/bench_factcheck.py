@@ -0,0 +1,89 @@
+"""
+bench_factcheck.py
+
+Per-answer latency of the fact-check modes:
+
+- lexical:  fact_check on the formatted context (shingle index)
+- semantic: fact_check_semantic reusing retrieved chunk vectors; claim
+            embeddings are measured both cold (model call) and warm
+            (embedding cache hit)
+
+Chunk vectors are embedded before timing, as query_memory would return
+them with include_embeddings=True.
+
+Usage:
+    python benchmarks/bench_factcheck.py --claims 12 --chunks 10 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents.factcheck_agent import fact_check, fact_check_semantic
+from src.agents.summary_agent import format_context
+from src.utils.embeddings import embed_text
+
+WORDS = (
+    "ai model hospital patient data clinical trial diagnosis imaging cancer "
+    "research policy regulation cost study result team system accuracy risk "
+    "growth market energy climate battery vehicle network security privacy"
+).split()
+
+
+def sentence(rng, n=14):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=12)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--chunk-sentences", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [
+        ". ".join(sentence(rng) for _ in range(args.chunk_sentences))
+        for _ in range(args.chunks)
+    ]
+    retrieved = {
+        "documents": [documents],
+        "metadatas": [[{"source": f"https://example.com/{i}"} for i in range(args.chunks)]],
+        "embeddings": [embed_text(documents)],
+    }
+    context_text = format_context(retrieved)
+
+    embed_text("warm up")
+
+    def summary():
+        return ". ".join(sentence(rng) for _ in range(args.claims)) + "."
+
+    fixed_summary = summary()
+
+    lexical = timed(lambda: fact_check(fixed_summary, context_text), args.repeat)
+    cold = timed(lambda: fact_check_semantic(summary(), retrieved), args.repeat)
+    warm = timed(lambda: fact_check_semantic(fixed_summary, retrieved), args.repeat)
+
+    print(f"claims: {args.claims}  chunks: {args.chunks}  (median of {args.repeat})")
+    print(f"lexical             : {lexical:8.2f} ms")
+    print(f"semantic (cold)     : {cold:8.2f} ms")
+    print(f"semantic (cached)   : {warm:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
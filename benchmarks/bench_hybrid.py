@@ -0,0 +1,188 @@
+"""
+bench_hybrid.py
+
+Hybrid (BM25 + dense, reciprocal rank fusion) versus dense-only memory
+retrieval.
+
+- Cost: upsert time per chunk with and without the BM25 index update, and
+  query latency of query() vs hybrid_query(), on random vectors and
+  Zipf-distributed text at several store sizes
+- Quality: hit@k on a corpus where each question names an exact entity
+  and figure (codenames, percentages) that only one chunk of its topic
+  contains; needs the embedding model in the local cache (skip with
+  --no-quality)
+
+Usage:
+    python benchmarks/bench_hybrid.py
+    python benchmarks/bench_hybrid.py --sizes 10000 100000 --backend chroma --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+import numpy as np
+
+import src.db.base as base
+
+TOPICS = [
+    "battery chemistry", "coral reef bleaching", "semiconductor supply chains", "malaria vaccines",
+    "urban heat islands", "quantum error correction", "wildfire smoke", "central bank digital currencies",
+]
+
+
+def make_store(backend: str, persist_dir: str):
+    if backend == "chroma":
+        from src.db.chroma_store import ChromaStore
+        return ChromaStore(persist_dir=persist_dir)
+
+    from src.db.faiss_store import FaissStore
+    return FaissStore(persist_dir=persist_dir, index_type=backend.split("-", 1)[1])
+
+
+def p50_ms(fn, items) -> float:
+    timings = []
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+# -------------------------------------
+# Cost
+# -------------------------------------
+def zipf_texts(rng, n: int, words: int, vocab: int = 50_000) -> list:
+    ranks = rng.zipf(1.1, size=(n, words))
+    tail = ranks > vocab
+    ranks[tail] = rng.integers(1, vocab, size=int(tail.sum()))
+    return [" ".join(f"w{r}" for r in row) for row in ranks]
+
+
+def run_cost(args, size: int) -> dict:
+    rng = np.random.default_rng(0)
+    result = {"size": size}
+
+    for hybrid in (False, True):
+        base.HYBRID_SEARCH_ENABLED = hybrid
+        store = make_store(args.backend, tempfile.mkdtemp(prefix="mars-hybrid-")).open()
+
+        upsert_s = 0.0
+        for start in range(0, size, args.batch):
+            n = min(args.batch, size - start)
+            texts = zipf_texts(rng, n, args.words)
+            vectors = rng.random((n, args.dim), dtype=np.float32).tolist()
+            t0 = time.perf_counter()
+            store.upsert_chunks(texts, vectors, ["https://example.com/bench"] * n, ids=[f"id-{start + i}" for i in range(n)])
+            upsert_s += time.perf_counter() - t0
+
+        key = "hybrid" if hybrid else "dense"
+        result[f"upsert_ms_per_chunk_{key}"] = round(upsert_s * 1000 / size, 4)
+
+        if hybrid:
+            queries = list(zip(
+                rng.random((args.queries, args.dim), dtype=np.float32).tolist(),
+                zipf_texts(rng, args.queries, 8)
+            ))
+            result["query_ms_dense"] = round(p50_ms(lambda q: store.query(q[0], top_k=args.top_k), queries), 3)
+            result["query_ms_hybrid"] = round(p50_ms(lambda q: store.hybrid_query(q[0], q[1], top_k=args.top_k), queries), 3)
+            result["bm25_index_mb"] = round(os.path.getsize(store.lexical_index.path) / 1e6, 2)
+
+        store.close()
+
+    base.HYBRID_SEARCH_ENABLED = True
+    return result
+
+
+# -------------------------------------
+# Quality
+# -------------------------------------
+def entity_corpus(rng, per_topic: int):
+    """
+    Chunks per topic that differ only in a codename and a figure, plus
+    one question per chunk naming both.
+    """
+    texts, questions = [], []
+    for topic in TOPICS:
+        for i in range(per_topic):
+            codename = f"{chr(65 + rng.integers(26))}{chr(65 + rng.integers(26))}-{rng.integers(100, 999)}"
+            figure = f"{rng.integers(1, 99)}.{rng.integers(0, 9)}%"
+            texts.append(
+                f"Recent work on {topic} keeps advancing. The {codename} study measured a change of {figure} "
+                f"compared with earlier baselines, and researchers say {topic} will need further trials."
+            )
+            questions.append((f"What change did the {codename} study on {topic} measure?", len(texts) - 1))
+    return texts, questions
+
+
+def run_quality(args) -> dict:
+    from src.utils.embeddings import embed_text
+
+    rng = np.random.default_rng(1)
+    texts, questions = entity_corpus(rng, args.per_topic)
+
+    store = make_store(args.backend, tempfile.mkdtemp(prefix="mars-hybrid-quality-")).open()
+    ids = [f"chunk-{i}" for i in range(len(texts))]
+    store.upsert_chunks(texts, embed_text(texts), ["https://example.com/bench"] * len(texts), ids=ids)
+
+    query_vectors = embed_text([q for q, _ in questions])
+    result = {"chunks": len(texts), "questions": len(questions)}
+
+    for k in args.ks:
+        dense_hits = hybrid_hits = 0
+        for (question, target), vector in zip(questions, query_vectors):
+            dense_hits += ids[target] in store.query(vector, top_k=k)["ids"][0]
+            hybrid_hits += ids[target] in store.hybrid_query(vector, question, top_k=k)["ids"][0]
+        result[f"hit@{k}_dense"] = round(dense_hits / len(questions), 3)
+        result[f"hit@{k}_hybrid"] = round(hybrid_hits / len(questions), 3)
+
+    store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="faiss-flat", choices=["chroma", "faiss-flat", "faiss-hnsw"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--words", type=int, default=150, help="words per chunk in the cost corpus")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--per-topic", type=int, default=25, help="chunks per topic in the quality corpus")
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--no-quality", action="store_true")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = {"cost": [run_cost(args, size) for size in args.sizes]}
+
+    print(f"\n{'size':>8} {'upsert ms/chunk':>22} {'query p50 ms':>20} {'bm25 MB':>8}")
+    print(f"{'':>8} {'dense':>10} {'hybrid':>11} {'dense':>9} {'hybrid':>10}")
+    for r in results["cost"]:
+        print(
+            f"{r['size']:>8} {r['upsert_ms_per_chunk_dense']:>10.3f} {r['upsert_ms_per_chunk_hybrid']:>11.3f} "
+            f"{r['query_ms_dense']:>9.2f} {r['query_ms_hybrid']:>10.2f} {r['bm25_index_mb']:>8.1f}"
+        )
+
+    if not args.no_quality:
+        results["quality"] = run_quality(args)
+        q = results["quality"]
+        print(f"\n{q['questions']} entity questions over {q['chunks']} chunks")
+        for k in args.ks:
+            print(f"hit@{k}: dense {q[f'hit@{k}_dense']:.2f}  hybrid {q[f'hit@{k}_hybrid']:.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+bench_ingest.py
+
+Before/after timing for the ingest path:
+
+- per-chunk: embed_text(chunk) + upsert_chunk(...) for every chunk
+- batched:   one embed_text call + one upsert_chunks write per batch
+
+Runs against a throwaway Chroma directory so the real memory is untouched.
+
+Usage:
+    python benchmarks/bench_ingest.py --chunks 200 --batch-size 64
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def make_chunks(n: int, words_per_chunk: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(5000)]
+    return [" ".join(rng.choice(vocab) for _ in range(words_per_chunk)) for _ in range(n)]
+
+
+def bench_per_chunk(chunks, source):
+    from src.utils.embeddings import embed_text
+    from src.db.chroma_store import upsert_chunk
+
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        emb = embed_text(chunk)[0]
+        upsert_chunk(chunk, emb, source, user="bench-per-chunk")
+    return time.perf_counter() - t0
+
+
+def bench_batched(chunks, source, batch_size):
+    from src.utils.embeddings import embed_text
+    from src.db.chroma_store import upsert_chunks
+
+    t0 = time.perf_counter()
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        embeddings = embed_text(batch, batch_size=batch_size)
+        upsert_chunks(batch, embeddings, [source] * len(batch), user="bench-batched")
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--words", type=int, default=200, help="words per chunk")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mars-bench-")
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "chroma_db")
+    os.chdir(workdir)
+
+    from src.utils.embeddings import embed_text
+    embed_text("warm up")  # load the model outside the timed region
+
+    chunks = make_chunks(args.chunks, args.words)
+    source = "https://example.com/bench"
+
+    before = bench_per_chunk(chunks, source)
+    after = bench_batched(chunks, source, args.batch_size)
+
+    print(f"chunks: {args.chunks}  words/chunk: {args.words}  batch_size: {args.batch_size}")
+    print(f"per-chunk : {before:8.2f}s  ({args.chunks / before:7.1f} chunks/s)")
+    print(f"batched   : {after:8.2f}s  ({args.chunks / after:7.1f} chunks/s)")
+    print(f"speedup   : {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+bench_lifecycle.py
+
+Collection size, disk usage and query latency of MARS memory before and
+after a lifecycle pass (TTL expiry + per-user caps + compaction).
+
+Each backend gets a store of random chunks spread over several users,
+with write times spread evenly over --age-days (older than the TTL ones
+expire) and a recently retrieved "hot" subset that the least-recently-
+retrieved eviction keeps.
+
+Usage:
+    python benchmarks/bench_lifecycle.py
+    python benchmarks/bench_lifecycle.py --chunks 200000 --max-chunks 20000 --backends faiss-flat --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+BACKENDS = ["chroma", "faiss-flat", "faiss-hnsw"]
+DAY = 24 * 3600
+
+
+def make_store(backend: str, persist_dir: str):
+    if backend == "chroma":
+        from src.db.chroma_store import ChromaStore
+        return ChromaStore(persist_dir=persist_dir)
+
+    from src.db.faiss_store import FaissStore
+    return FaissStore(persist_dir=persist_dir, index_type=backend.split("-", 1)[1])
+
+
+def build(store, args, rng):
+    """
+    Write args.chunks chunks, oldest first, with backdated write times.
+    Returns {user: [(chunk id, write time)]}.
+    """
+    now = time.time()
+    filler = "lorem ipsum dolor sit amet " * (args.chunk_bytes // 27 + 1)
+    ids = {}
+
+    for start in range(0, args.chunks, args.batch):
+        n = min(args.batch, args.chunks - start)
+        user = f"user-{(start // args.batch) % args.users}"
+        written = now - args.age_days * DAY * (1 - start / args.chunks)
+
+        batch_ids = [f"id-{start + i}" for i in range(n)]
+        with mock.patch("time.time", return_value=written):
+            store.upsert_chunks(
+                [f"chunk {start + i} {filler}"[:args.chunk_bytes] for i in range(n)],
+                rng.random((n, args.dim), dtype="float32").tolist(),
+                ["https://example.com/bench"] * n,
+                user=user,
+                ids=batch_ids
+            )
+        ids.setdefault(user, []).extend((doc_id, written) for doc_id in batch_ids)
+
+    return ids
+
+
+def query_p50(store, queries, users) -> float:
+    timings = []
+    for i, q in enumerate(queries):
+        t0 = time.perf_counter()
+        store.query(q, top_k=5, user=users[i % len(users)])
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def run_backend(backend: str, args) -> dict:
+    import numpy as np
+    from src.db.lifecycle import MemoryLifecycle
+
+    rng = np.random.default_rng(0)
+    store = make_store(backend, tempfile.mkdtemp(prefix=f"mars-lifecycle-{backend}-")).open()
+
+    t0 = time.perf_counter()
+    ids = build(store, args, rng)
+    build_s = time.perf_counter() - t0
+
+    lifecycle = MemoryLifecycle(
+        store=store,
+        ttl=args.ttl_days * DAY,
+        max_chunks=args.max_chunks,
+        max_bytes=args.max_bytes,
+        interval=0
+    )
+
+    # Recently retrieved chunks: the oldest of each user's unexpired ones,
+    # which the caps would otherwise evict first
+    users = sorted(ids)
+    hot = []
+    cutoff = time.time() - args.ttl_days * DAY + 3600
+    for user in users:
+        user_hot = [doc_id for doc_id, written in ids[user] if written >= cutoff][:args.hot]
+        lifecycle.record_access(user_hot, rng.random(args.dim, dtype="float32").tolist(), user)
+        hot.extend(user_hot)
+
+    queries = rng.random((args.queries, args.dim), dtype="float32").tolist()
+
+    before_ms = query_p50(store, queries, users)
+    report = lifecycle.run()
+    after_ms = query_p50(store, queries, users)
+    hot_kept = len(store.existing_ids(hot))
+
+    store.close()
+
+    return {
+        "backend": backend,
+        "build_s": round(build_s, 2),
+        "pass_s": report["seconds"],
+        "chunks_before": report["before"]["chunks"],
+        "chunks_after": report["after"]["chunks"],
+        "expired": report["expired"],
+        "evicted": report["evicted"],
+        "hot_kept": f"{hot_kept}/{len(hot)}",
+        "disk_mb_before": round(report["before"]["disk_bytes"] / 1e6, 2),
+        "disk_mb_after": round(report["after"]["disk_bytes"] / 1e6, 2),
+        "query_ms_before": round(before_ms, 3),
+        "query_ms_after": round(after_ms, 3),
+        "compaction": report["compaction"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--chunk-bytes", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--age-days", type=float, default=60.0, help="write times spread over this many days")
+    parser.add_argument("--ttl-days", type=float, default=30.0)
+    parser.add_argument("--max-chunks", type=int, default=4000, help="per-user cap")
+    parser.add_argument("--max-bytes", type=int, default=0, help="per-user cap on stored text")
+    parser.add_argument("--hot", type=int, default=500, help="recently retrieved chunks per user")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = [run_backend(backend, args) for backend in args.backends]
+
+    print(
+        f"\n{'backend':<11} {'chunks':>15} {'expired':>8} {'evicted':>8} "
+        f"{'disk MB':>15} {'query p50 ms':>17} {'pass':>7} {'hot kept':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['backend']:<11} {r['chunks_before']:>7} → {r['chunks_after']:<5} {r['expired']:>8} {r['evicted']:>8} "
+            f"{r['disk_mb_before']:>7.1f} → {r['disk_mb_after']:<5.1f} "
+            f"{r['query_ms_before']:>7.2f} → {r['query_ms_after']:<7.2f} {r['pass_s']:>6.1f}s {r['hot_kept']:>10}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
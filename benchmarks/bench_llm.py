@@ -0,0 +1,168 @@
+"""
+bench_llm.py
+
+LLM call layer (src/llm/client.py) versus calling the provider directly,
+on a workload of repeated prompts sent from many threads.
+
+The provider is the local stub with a simulated response time and a
+share of transient failures (timeouts), so no API key is needed. Modes:
+
+- direct:        provider.generate from every thread, no retries
+- client:        coalescing + concurrency limit + retries, no cache
+- client+cache:  the above plus the response cache, cold then warm
+
+Reports provider calls, failed requests, wall time, per-request latency
+(p50 / p95), peak provider calls in flight and retries.
+
+Usage:
+    python benchmarks/bench_llm.py
+    python benchmarks/bench_llm.py --requests 500 --unique 100 --threads 32 --failure-rate 0.2 --json out.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.llm.client import LLMClient
+from src.llm.stub_provider import StubProvider
+from src.utils.llm_cache import LLMCache
+
+
+class FlakyStub(StubProvider):
+    """
+    Stub with a seeded share of timeouts; counts calls and peak concurrency.
+    """
+
+    def __init__(self, latency_ms: float, failure_rate: float, seed: int = 0):
+        super().__init__(latency_ms=latency_ms)
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    def generate(self, prompt: str):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            fail = self._rng.random() < self.failure_rate
+        try:
+            if fail:
+                time.sleep(self.latency / 2)
+                raise TimeoutError("simulated timeout")
+            return super().generate(prompt)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def make_prompts(args) -> list:
+    rng = random.Random(1)
+    unique = [
+        f"QUESTION:\nquestion {i}\n\nCONTEXT:\nSource: https://example.com/{i}\n"
+        f"Finding {i} was reported this week. More detail follows.\n\n---\n\nANSWER:\n"
+        for i in range(args.unique)
+    ]
+    return [rng.choice(unique) for _ in range(args.requests)]
+
+
+def run_mode(name: str, call, prompts, args, provider: FlakyStub, client=None) -> dict:
+    latencies, failures = [], 0
+
+    def one(prompt):
+        t0 = time.perf_counter()
+        try:
+            call(prompt)
+            return time.perf_counter() - t0, False
+        except Exception:
+            return time.perf_counter() - t0, True
+
+    calls_before = provider.calls
+    provider.peak = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for seconds, failed in pool.map(one, prompts):
+            latencies.append(seconds * 1000)
+            failures += failed
+    wall = time.perf_counter() - t0
+
+    stats = client.stats() if client is not None else {}
+    latencies.sort()
+    return {
+        "mode": name,
+        "provider_calls": provider.calls - calls_before,
+        "failed": failures,
+        "wall_s": round(wall, 2),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1),
+        "peak_in_flight": provider.peak,
+        "retries": stats.get("retries", 0),
+        "cache_hits": stats.get("cache_hits", 0),
+        "coalesced": stats.get("coalesced", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--unique", type=int, default=50, help="distinct prompts in the workload")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="simulated provider response time")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff-base", type=float, default=0.1)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    prompts = make_prompts(args)
+    results = []
+
+    provider = FlakyStub(args.latency_ms, args.failure_rate)
+    results.append(run_mode("direct", provider.generate, prompts, args, provider))
+
+    limits = dict(max_concurrency=args.max_concurrency, max_retries=args.max_retries, backoff_base=args.backoff_base)
+
+    provider = FlakyStub(args.latency_ms, args.failure_rate)
+    client = LLMClient(provider, cache=None, **limits)
+    results.append(run_mode("client", client.complete, prompts, args, provider, client))
+
+    provider = FlakyStub(args.latency_ms, args.failure_rate)
+    cache = LLMCache(path=os.path.join(tempfile.mkdtemp(prefix="mars-llm-"), "llm.sqlite3"))
+    client = LLMClient(provider, cache=cache, **limits)
+    results.append(run_mode("client+cache cold", client.complete, prompts, args, provider, client))
+    client = LLMClient(provider, cache=cache, **limits)
+    results.append(run_mode("client+cache warm", client.complete, prompts, args, provider, client))
+
+    print(
+        f"\n{args.requests} requests ({args.unique} distinct prompts), {args.threads} threads, "
+        f"{args.latency_ms:.0f} ms provider latency, {args.failure_rate:.0%} transient failures"
+    )
+    print(
+        f"{'mode':<18} {'provider calls':>14} {'failed':>7} {'wall s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'peak':>5} {'retries':>8} {'cached':>7} {'shared':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<18} {r['provider_calls']:>14} {r['failed']:>7} {r['wall_s']:>7.2f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['peak_in_flight']:>5} {r['retries']:>8} {r['cache_hits']:>7} {r['coalesced']:>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+bench_mmr.py
+
+MMR re-ranking versus plain top_k on syndicated retrieval results.
+
+Each candidate pool holds a few stories, each syndicated several times
+(near-identical float32 vectors around the story's vector, as the stores
+return them). For plain top_k and for mmr_rerank at several λ the benchmark reports:
+
+- distinct stories in the selected chunks
+- mean pairwise cosine similarity of the selection
+- chunks kept (below top_k when the pool runs out of non-duplicates)
+- re-rank latency per query, at several candidate pool sizes
+
+Usage:
+    python benchmarks/bench_mmr.py
+    python benchmarks/bench_mmr.py --top-k 10 --candidates 30 60 300 --lambdas 0.5 0.7 --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+import numpy as np
+
+from src.utils.rerank import MMR_DUPLICATE_THRESHOLD, mmr_rerank
+
+
+def unit(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+
+def candidate_pool(rng, n: int, dim: int, copies: int, noise: float):
+    """
+    Query vector plus a query_memory-shaped result of `n` candidates,
+    `copies` syndicated chunks per story, sorted by distance.
+    """
+    query = unit(rng.standard_normal(dim))
+    stories = -(-n // copies)
+
+    # Stories at decreasing cosine similarity to the query
+    relevance = np.linspace(0.6, 0.3, stories)[:, None]
+    centers = relevance * query + np.sqrt(1 - relevance ** 2) * unit(rng.standard_normal((stories, dim)))
+
+    story_of = np.repeat(np.arange(stories), copies)[:n]
+    vectors = unit(centers[story_of] + noise * rng.standard_normal((n, dim))).astype(np.float32)
+
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)
+
+    retrieved = {
+        "ids": [[f"chunk-{i}" for i in order]],
+        "documents": [[f"story {story_of[i]} copy {i}" for i in order]],
+        "metadatas": [[{"story": int(story_of[i])} for i in order]],
+        "distances": [distances[order].tolist()],
+        "embeddings": [list(vectors[order])],
+    }
+    return query.tolist(), retrieved
+
+
+def selection_stats(retrieved: dict) -> dict:
+    metadatas = retrieved["metadatas"][0]
+    vectors = unit(np.asarray(retrieved["embeddings"][0], dtype=np.float32))
+
+    pairwise = vectors @ vectors.T
+    n = len(vectors)
+    mean_sim = float((pairwise.sum() - n) / (n * (n - 1))) if n > 1 else 0.0
+
+    return {
+        "kept": n,
+        "stories": len({m["story"] for m in metadatas}),
+        "mean_pairwise_cos": mean_sim,
+    }
+
+
+def run(args, n_candidates: int) -> dict:
+    rng = np.random.default_rng(n_candidates)
+    pools = [candidate_pool(rng, n_candidates, args.dim, args.copies, args.noise) for _ in range(args.queries)]
+
+    modes = [("top_k", None)] + [(f"mmr λ={lam}", lam) for lam in args.lambdas]
+    result = {"candidates": n_candidates, "modes": {}}
+
+    for name, lam in modes:
+        stats, timings = [], []
+        for query, retrieved in pools:
+            t0 = time.perf_counter()
+            if lam is None:
+                selected = {key: [rows[0][:args.top_k]] for key, rows in retrieved.items()}
+            else:
+                selected = mmr_rerank(retrieved, query, args.top_k, lambda_=lam, duplicate_threshold=args.duplicate_threshold)
+            timings.append((time.perf_counter() - t0) * 1000)
+            stats.append(selection_stats(selected))
+
+        result["modes"][name] = {
+            "stories": round(statistics.mean(s["stories"] for s in stats), 2),
+            "kept": round(statistics.mean(s["kept"] for s in stats), 2),
+            "mean_pairwise_cos": round(statistics.mean(s["mean_pairwise_cos"] for s in stats), 3),
+            "rerank_ms_p50": round(statistics.median(timings), 3),
+        }
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[15, 30, 60, 150])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--copies", type=int, default=3, help="syndicated chunks per story")
+    parser.add_argument("--noise", type=float, default=0.005, help="per-dimension noise between copies")
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[0.5, 0.7, 0.9])
+    parser.add_argument("--duplicate-threshold", type=float, default=MMR_DUPLICATE_THRESHOLD)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = [run(args, n) for n in args.candidates]
+
+    print(f"\ntop_k={args.top_k}, {args.copies} copies per story, {args.queries} queries per pool size")
+    print(f"{'candidates':>10} {'mode':<12} {'stories':>8} {'kept':>6} {'mean cos':>9} {'rerank ms':>10}")
+    for r in results:
+        for name, m in r["modes"].items():
+            print(
+                f"{r['candidates']:>10} {name:<12} {m['stories']:>8.2f} {m['kept']:>6.2f} "
+                f"{m['mean_pairwise_cos']:>9.3f} {m['rerank_ms_p50']:>10.3f}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+bench_vector_stores.py
+
+Query latency and resident memory of the vector store backends
+(Chroma vs FAISS flat / IVF / HNSW) at several collection sizes.
+
+For every (backend, size) pair a child process builds the store from
+random vectors, then a fresh child process opens it, measures startup
+time and RSS, and runs the queries. Building 1M chunks into Chroma takes
+a long time; pick sizes with --sizes.
+
+Usage:
+    python benchmarks/bench_vector_stores.py --sizes 10000 100000 1000000
+    python benchmarks/bench_vector_stores.py --backends faiss-flat faiss-hnsw --json out.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+BACKENDS = ["chroma", "faiss-flat", "faiss-ivf", "faiss-hnsw"]
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size (Linux), else peak RSS.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_store(backend: str, persist_dir: str):
+    if backend == "chroma":
+        from src.db.chroma_store import ChromaStore
+        return ChromaStore(persist_dir=persist_dir)
+
+    from src.db.faiss_store import FaissStore
+    return FaissStore(persist_dir=persist_dir, index_type=backend.split("-", 1)[1])
+
+
+def build(backend: str, persist_dir: str, size: int, dim: int, batch: int = 5000):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    store = make_store(backend, persist_dir).open()
+
+    for start in range(0, size, batch):
+        n = min(batch, size - start)
+        vectors = rng.random((n, dim), dtype=np.float32)
+        texts = [f"chunk {start + i}" for i in range(n)]
+        store.upsert_chunks(
+            texts, vectors.tolist(), ["https://example.com/bench"] * n,
+            ids=[f"id-{start + i}" for i in range(n)]
+        )
+
+    store.close()
+
+
+def measure(backend: str, persist_dir: str, dim: int, queries: int, top_k: int) -> dict:
+    import numpy as np
+
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    store = make_store(backend, persist_dir).open()
+    open_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(1)
+    q = rng.random((queries, dim), dtype=np.float32).tolist()
+
+    store.query(q[0], top_k=top_k)  # first query pays lazy loading
+    rss_open = rss_mb()
+
+    latencies = []
+    for vec in q:
+        t0 = time.perf_counter()
+        store.query(vec, top_k=top_k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    return {
+        "open_s": open_s,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "rss_mb": rss_mb() - rss_before,
+        "rss_after_open_mb": rss_open - rss_before,
+    }
+
+
+def run_child(args: list) -> str:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)] + args,
+        check=True, capture_output=True, text=True, cwd=ROOT
+    )
+    return out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    # child modes
+    parser.add_argument("--_build", nargs=3, metavar=("BACKEND", "DIR", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--_measure", nargs=2, metavar=("BACKEND", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._build:
+        backend, persist_dir, size = args._build
+        build(backend, persist_dir, int(size), args.dim)
+        return
+
+    if args._measure:
+        backend, persist_dir = args._measure
+        print(json.dumps(measure(backend, persist_dir, args.dim, args.queries, args.top_k)))
+        return
+
+    common = ["--dim", str(args.dim), "--queries", str(args.queries), "--top-k", str(args.top_k)]
+    results = []
+
+    print(f"{'backend':<12} {'size':>9} {'open s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8}")
+    for size in args.sizes:
+        for backend in args.backends:
+            persist_dir = tempfile.mkdtemp(prefix=f"mars-bench-{backend}-")
+            run_child(["--_build", backend, persist_dir, str(size)] + common)
+            row = json.loads(run_child(["--_measure", backend, persist_dir] + common))
+            row.update({"backend": backend, "size": size})
+            results.append(row)
+            print(
+                f"{backend:<12} {size:>9} {row['open_s']:>8.2f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['rss_mb']:>8.1f}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
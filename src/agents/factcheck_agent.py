@@ -5,13 +5,40 @@ A lightweight fact-checking agent for MARS.
 
 It performs:
 1. Cross-source consistency check
-2. Claim verification against retrieved context
+2. Claim verification against retrieved context, either lexical
+   (shingle index, per-claim coverage score) or semantic (claim/chunk
+   embedding similarity), each with the best-matching source
 3. Flags missing or contradicted information
 
 This helps demonstrate multi-agent design and evaluation.
 """
 
-from typing import List, Dict
+import os
+import re
+from collections import Counter
+from typing import List, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.chunking import iter_sentences
+from src.utils.embeddings import embed_text
+from src.utils.tracing import traced
+
+# "lexical" (shingle overlap) or "semantic" (embedding similarity)
+FACTCHECK_MODE = os.environ.get("MARS_FACTCHECK_MODE", "lexical")
+
+# Fraction of a claim's shingles that must appear in the context
+SUPPORT_THRESHOLD = float(os.environ.get("MARS_FACTCHECK_THRESHOLD", "0.6"))
+
+# Minimum cosine similarity between a claim and its best chunk
+SEMANTIC_THRESHOLD = float(os.environ.get("MARS_FACTCHECK_SEMANTIC_THRESHOLD", "0.6"))
+
+# Shingle size (in tokens) used to index the context
+SHINGLE_SIZE = 3
+
+_TOKEN_RE = re.compile(r"\w+")
+_CITATION_RE = re.compile(r"\[\s*source:[^\]]*\]", re.IGNORECASE)
+_SOURCE_LINE_RE = re.compile(r"^Source: (.*)$", re.MULTILINE)
 
 
 # -------------------------------------------------------------
@@ -20,10 +47,16 @@ from typing import List, Dict
 
 def extract_claims(summary: str) -> List[str]:
     """
-    Splits summary into simple granular claims.
-    Very simple approach: split by periods.
+    Splits summary into simple granular claims: one per sentence.
+    "[Source: ...]" citations are removed first, so the periods in their
+    URLs don't split off fragments as claims.
     """
-    claims = [s.strip() for s in summary.split(".") if s.strip()]
+    text = _CITATION_RE.sub(" ", summary)
+    claims = []
+    for sentence in iter_sentences(text):
+        claim = sentence.strip().rstrip(".!?").strip()
+        if _TOKEN_RE.search(claim):
+            claims.append(claim)
     return claims
 
 
@@ -39,38 +72,206 @@ def claim_in_context(claim: str, context_text: str) -> bool:
 
 
 # -------------------------------------------------------------
-# 3. Run Fact-Check
+# 3. Index the context once, score every claim against it
+# -------------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def shingles(tokens: List[str], n: int = SHINGLE_SIZE) -> List[Tuple[str, ...]]:
+    """
+    Overlapping n-token windows; texts shorter than n give one shingle.
+    """
+    if len(tokens) <= n:
+        return [tuple(tokens)] if tokens else []
+    return [tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def split_sources(context_text: str) -> List[Tuple[str, str]]:
+    """
+    Split format_context output back into (source, text) segments.
+    Text without "Source:" headers is one segment with source "unknown".
+    """
+    headers = list(_SOURCE_LINE_RE.finditer(context_text))
+    if not headers:
+        return [("unknown", context_text)]
+
+    segments = []
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(context_text)
+        segments.append((match.group(1).strip(), context_text[match.end():end]))
+    return segments
+
+
+class ContextIndex:
+    """
+    Inverted index from token shingles to the context segments that
+    contain them. Built once per fact-check; each claim is then scored in
+    time proportional to its own length, not the context's.
+    """
+
+    def __init__(self, context_text: str, n: int = SHINGLE_SIZE):
+        self.n = n
+        self.sources: List[str] = []
+        self.postings: Dict[Tuple[str, ...], Set[int]] = {}
+
+        for seg_id, (source, text) in enumerate(split_sources(context_text)):
+            self.sources.append(source)
+            tokens = tokenize(text)
+
+            # Index every window size up to n so short claims can match too
+            for size in range(1, n + 1):
+                for i in range(len(tokens) - size + 1):
+                    self.postings.setdefault(tuple(tokens[i:i + size]), set()).add(seg_id)
+
+    def score(self, claim: str) -> Tuple[float, Optional[str]]:
+        """
+        Returns (coverage, best source): the fraction of the claim's
+        shingles found in the context, and the segment covering most of them.
+        """
+        claim = _CITATION_RE.sub(" ", claim)
+        grams = shingles(tokenize(claim), self.n)
+        if not grams:
+            return 0.0, None
+
+        covered = 0
+        per_source: Counter = Counter()
+
+        for gram in grams:
+            segs = self.postings.get(gram)
+            if segs:
+                covered += 1
+                per_source.update(segs)
+
+        if not covered:
+            return 0.0, None
+
+        best_seg = per_source.most_common(1)[0][0]
+        return covered / len(grams), self.sources[best_seg]
+
+
+# -------------------------------------------------------------
+# 4. Run Fact-Check
 # -------------------------------------------------------------
 
-def fact_check(summary: str, retrieved_context: str) -> Dict:
+@traced("factcheck")
+def fact_check(summary: str, retrieved_context: str, threshold: float = SUPPORT_THRESHOLD) -> Dict:
     """
     Returns:
     {
         "supported": [...claims],
         "not_supported": [...claims],
-        "total_claims": n
+        "total_claims": n,
+        "scores": [{"claim", "score", "source", "supported"}, ...]
     }
+
+    A claim is supported when at least `threshold` of its token shingles
+    occur in the retrieved context.
     """
     claims = extract_claims(summary)
+    index = ContextIndex(retrieved_context)
 
     supported = []
     unsupported = []
+    scores = []
 
     for claim in claims:
-        if claim_in_context(claim, retrieved_context):
+        score, source = index.score(claim)
+        is_supported = score >= threshold
+
+        if is_supported:
+            supported.append(claim)
+        else:
+            unsupported.append(claim)
+
+        scores.append({
+            "claim": claim,
+            "score": score,
+            "source": source,
+            "supported": is_supported
+        })
+
+    return {
+        "total_claims": len(claims),
+        "supported": supported,
+        "not_supported": unsupported,
+        "scores": scores
+    }
+
+
+# -------------------------------------------------------------
+# 5. Semantic Fact-Check (embedding similarity, fully batched)
+# -------------------------------------------------------------
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+@traced("factcheck")
+def fact_check_semantic(summary: str, retrieved: Dict, threshold: float = SEMANTIC_THRESHOLD) -> Dict:
+    """
+    Paraphrase-tolerant variant of fact_check.
+
+    - All claims are embedded in one embed_text call
+    - Chunk vectors are taken from `retrieved` (query_memory results with
+      include_embeddings=True); chunks are only embedded if they're missing
+    - One claims × chunks cosine matrix gives each claim its best chunk
+
+    `retrieved` is the raw query_memory result, not the formatted context.
+    Returns the same shape as fact_check.
+    """
+    claims = extract_claims(summary)
+    documents = (retrieved.get("documents") or [[]])[0]
+    metadatas = (retrieved.get("metadatas") or [[]])[0]
+
+    supported = []
+    unsupported = []
+    scores = []
+
+    if claims and documents:
+        embeddings = retrieved.get("embeddings")
+        chunk_vectors = embeddings[0] if embeddings is not None and len(embeddings) else None
+        if chunk_vectors is None or len(chunk_vectors) != len(documents):
+            chunk_vectors = embed_text(documents)
+
+        claim_matrix = _unit_rows(np.asarray(embed_text(claims), dtype=np.float32))
+        chunk_matrix = _unit_rows(np.asarray(chunk_vectors, dtype=np.float32))
+
+        similarity = claim_matrix @ chunk_matrix.T
+        best = similarity.argmax(axis=1)
+        best_scores = similarity[np.arange(len(claims)), best]
+    else:
+        best = [None] * len(claims)
+        best_scores = [0.0] * len(claims)
+
+    for claim, chunk, score in zip(claims, best, best_scores):
+        is_supported = bool(score >= threshold)
+        source = (metadatas[chunk] or {}).get("source", "unknown") if chunk is not None else None
+
+        if is_supported:
             supported.append(claim)
         else:
             unsupported.append(claim)
 
+        scores.append({
+            "claim": claim,
+            "score": float(score),
+            "source": source,
+            "supported": is_supported
+        })
+
     return {
         "total_claims": len(claims),
         "supported": supported,
-        "not_supported": unsupported
+        "not_supported": unsupported,
+        "scores": scores
     }
 
 
 # -------------------------------------------------------------
-# 4. Annotate summary with fact-checking results
+# 6. Annotate summary with fact-checking results
 # -------------------------------------------------------------
 
 def annotate_summary(summary: str, fc_results: Dict) -> str:
@@ -2,51 +2,63 @@
 research_live.py
 
 This agent performs:
-<<<<<<< HEAD
-1. Live web search (via SerpAPI)
-=======
-1. Live web search (via Google Custom Search API)
->>>>>>> ec1bd1a (Upload full local project)
+1. Live web search (SerpAPI, or the Google Custom Search API with
+   MARS_SEARCH_BACKEND=google)
 2. Fetching webpage content
 3. Extracting readable text
-4. Chunking the text for embeddings
+4. Chunking the text for embeddings (sentence-aligned, sized in model tokens)
 """
 
 import os
+import threading
 import requests
-from bs4 import BeautifulSoup
-<<<<<<< HEAD
-from serpapi import GoogleSearch
-=======
-from googleapiclient.discovery import build
->>>>>>> ec1bd1a (Upload full local project)
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
+
+from src.utils.fetcher import get_http_session, fetch_all, iter_fetch, FETCH_MAX_WORKERS, FETCH_PER_HOST_LIMIT
+from src.utils.page_cache import get_page_cache
+from src.utils.search_cache import get_search_cache
+from src.utils.chunking import iter_chunks, CHUNK_OVERLAP_TOKENS
+from src.utils.html_extract import SkippedPage, read_html, extract_text
+from src.utils.tracing import span
+
+# "serpapi" or "google" (Custom Search API)
+SEARCH_BACKEND = os.environ.get("MARS_SEARCH_BACKEND", "serpapi")
+
+# Max search API calls in flight across all queries
+SEARCH_MAX_CONCURRENCY = int(os.environ.get("MARS_SEARCH_MAX_CONCURRENCY", "4"))
+
+_search_slots = threading.BoundedSemaphore(max(1, SEARCH_MAX_CONCURRENCY))
 
 
 # -----------------------------------------------------------
-<<<<<<< HEAD
-# 1. LIVE SEARCH USING SERPAPI
-# -----------------------------------------------------------
-def search_web(query: str, num_results: int = 5) -> List[str]:
-    """
-    Performs a live Google search using SerpAPI and returns a list of URLs.
-=======
-# 1. LIVE SEARCH USING GOOGLE CUSTOM SEARCH API
+# 1. LIVE SEARCH (SERPAPI OR GOOGLE CUSTOM SEARCH API)
 # -----------------------------------------------------------
-def search_web(query: str, num_results: int = 5) -> List[str]:
+def search_web(query: str, num_results: int = 5, backend: Optional[str] = None) -> List[str]:
     """
-    Performs a live Google search using the Google Custom Search API and returns a list of URLs.
->>>>>>> ec1bd1a (Upload full local project)
+    Performs a live Google search and returns a list of URLs.
 
     Args:
         query (str): search query
         num_results (int): number of results to fetch
+        backend (str): "serpapi" or "google" (default MARS_SEARCH_BACKEND)
 
     Returns:
         List[str]: list of URLs
     """
+    backend = (backend or SEARCH_BACKEND).lower()
+
+    if backend == "serpapi":
+        return _search_serpapi(query, num_results)
+
+    if backend == "google":
+        return _search_google_cse(query, num_results)
+
+    raise ValueError(f"Unknown search backend: {backend}")
+
+
+def _search_serpapi(query: str, num_results: int) -> List[str]:
+    from serpapi import GoogleSearch
 
-<<<<<<< HEAD
     api_key = os.environ.get("SERPAPI_KEY")
 
     if not api_key:
@@ -68,7 +80,11 @@ def search_web(query: str, num_results: int = 5) -> List[str]:
             urls.append(link)
 
     return urls
-=======
+
+
+def _search_google_cse(query: str, num_results: int) -> List[str]:
+    from googleapiclient.discovery import build
+
     api_key = os.environ.get("GOOGLE_API_KEY")
     cse_id = os.environ.get("CUSTOM_SEARCH_ENGINE_ID")
 
@@ -80,67 +96,132 @@ def search_web(query: str, num_results: int = 5) -> List[str]:
     try:
         service = build("customsearch", "v1", developerKey=api_key)
         res = service.cse().list(q=query, cx=cse_id, num=num_results).execute()
-        
-        urls = [item['link'] for item in res.get('items', [])]
-        return urls
+
+        return [item["link"] for item in res.get("items", [])]
 
     except Exception as e:
         print(f"Error during Google search: {e}")
         return []
->>>>>>> ec1bd1a (Upload full local project)
+
+
+def _search_limited(query: str, num_results: int = 5) -> List[str]:
+    # Global cap on concurrent search API calls (batches, concurrent sessions)
+    with _search_slots:
+        return search_web(query, num_results=num_results)
+
+
+def search_web_cached(query: str, num_results: int = 5) -> List[str]:
+    """
+    search_web behind the persistent query cache: repeated and
+    trivially reworded questions skip the metered search API.
+    """
+    with span("search", results=num_results):
+        return get_search_cache().get_or_search(query, num_results, _search_limited, SEARCH_BACKEND)
 
 
 # -----------------------------------------------------------
 # 2. FETCH WEBPAGE CONTENT
 # -----------------------------------------------------------
-def fetch_page_text(url: str) -> str:
+def fetch_page_text(url: str, session: Optional[requests.Session] = None, use_cache: bool = True) -> str:
     """
     Downloads webpage HTML and extracts readable text.
+    Uses the shared keep-alive session unless one is passed in.
+
+    With `use_cache`, pages fetched within the cache TTL are served from
+    disk, and older ones are revalidated with a conditional GET so an
+    unchanged page (304) is neither downloaded nor re-parsed.
+
+    The body is streamed with a size cap; non-HTML responses (PDFs,
+    images, binaries) and oversized ones are dropped before their body
+    is read.
     """
 
+    with span("fetch", url=url) as fetch_span:
+        return _fetch_page_text(url, session, use_cache, fetch_span)
+
+
+def _fetch_page_text(url: str, session: Optional[requests.Session], use_cache: bool, fetch_span) -> str:
+    session = session or get_http_session()
+    cache = get_page_cache() if use_cache else None
+    cached = cache.lookup(url) if cache else None
+
+    if cached and cached.is_fresh(cache.ttl):
+        cache.record_hit()
+        fetch_span.set(cache="hit")
+        return cached.text
+
+    headers = cached.conditional_headers() if cached else {}
+
     try:
-        response = requests.get(url, timeout=10, headers={
-            "User-Agent": "Mozilla/5.0 (MARS-Agent)"
-        })
+        with session.get(url, timeout=10, headers=headers, stream=True) as response:
+
+            if cached and response.status_code == 304:
+                cache.mark_revalidated(url)
+                fetch_span.set(cache="revalidated")
+                return cached.text
+
+            if cache:
+                cache.record_miss()
+            fetch_span.set(cache="miss")
+
+            try:
+                html = read_html(response)
+            except SkippedPage as reason:
+                print(f"Skipping {url}: {reason}")
+                return ""
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")
+            with span("parse", bytes=len(html)):
+                clean_text = extract_text(html)
 
-        text_blocks = [p.get_text().strip() for p in paragraphs if p.get_text().strip()]
-        clean_text = "\n".join(text_blocks)
+            if cache and response.ok and clean_text:
+                cache.store(
+                    url,
+                    clean_text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
 
-        return clean_text
+            return clean_text
 
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return ""
 
 
+def fetch_pages(
+    urls: List[str],
+    max_workers: int = FETCH_MAX_WORKERS,
+    per_host: int = FETCH_PER_HOST_LIMIT
+) -> List[str]:
+    """
+    Fetches many pages concurrently.
+
+    Returns extracted text for each URL in the same order as `urls`
+    (empty string for pages that failed).
+    """
+    return fetch_all(urls, fetch_page_text, max_workers=max_workers, per_host=per_host)
+
+
 # -----------------------------------------------------------
 # 3. CHUNK TEXT FOR EMBEDDINGS
 # -----------------------------------------------------------
-def chunk_text(text: str, chunk_size: int = 800) -> List[str]:
+def chunk_text(text: str, chunk_size: Optional[int] = None, overlap: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
     """
-    Splits long text into smaller chunks. Useful for embeddings.
+    Splits long text into sentence-aligned chunks of at most `chunk_size`
+    embedding-model tokens (default: the model's input window), with
+    `overlap` tokens shared between neighbouring chunks.
     """
-    words = text.split()
-    chunks = []
-
-    for i in range(0, len(words), chunk_size):
-        chunk = " ".join(words[i:i + chunk_size])
-        chunks.append(chunk)
-
-    return chunks
+    return list(iter_chunks(text, max_tokens=chunk_size, overlap=overlap))
 
 
 # -----------------------------------------------------------
 # 4. FULL PIPELINE
 # -----------------------------------------------------------
-def research_pipeline(query: str, max_pages: int = 3, chunk_size: int = 800) -> List[Dict]:
+def research_pipeline(query: str, max_pages: int = 3, chunk_size: Optional[int] = None) -> List[Dict]:
     """
     Performs:
     - Search
-    - Fetch
+    - Fetch (concurrently, results kept in search-rank order)
     - Chunk
 
     Returns a list of dictionaries:
@@ -150,11 +231,11 @@ def research_pipeline(query: str, max_pages: int = 3, chunk_size: int = 800) ->
     }
     """
 
-    urls = search_web(query, num_results=max_pages)
+    urls = search_web_cached(query, num_results=max_pages)
+    pages = fetch_pages(urls)
     results = []
 
-    for url in urls:
-        raw_text = fetch_page_text(url)
+    for url, raw_text in zip(urls, pages):
         if not raw_text:
             continue
 
@@ -166,3 +247,37 @@ def research_pipeline(query: str, max_pages: int = 3, chunk_size: int = 800) ->
         })
 
     return results
+
+
+def iter_research(query: str, max_pages: int = 3, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Streaming variant of research_pipeline.
+
+    Yields one
+    {
+      "source": URL,
+      "rank": search rank,
+      "chunks": generator of chunks, produced as the page text is scanned
+    }
+    per page as soon as that page is downloaded, so downstream stages can
+    start before the slowest page arrives.
+    """
+
+    urls = search_web_cached(query, num_results=max_pages)
+    return iter_pages(urls, chunk_size=chunk_size)
+
+
+def iter_pages(urls: List[str], chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Fetch + chunk stage of iter_research for an already searched list of
+    URLs (ranks follow the order of `urls`).
+    """
+    for rank, url, raw_text in iter_fetch(urls, fetch_page_text):
+        if not raw_text:
+            continue
+
+        yield {
+            "source": url,
+            "rank": rank,
+            "chunks": iter_chunks(raw_text, max_tokens=chunk_size)
+        }
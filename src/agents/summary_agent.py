@@ -5,32 +5,20 @@ This agent:
 1. Embeds the user query
 2. Retrieves relevant chunks from memory
 3. Builds a RAG prompt
-<<<<<<< HEAD
-4. Calls an LLM (OpenAI or Gemini)
-=======
-4. Calls an LLM (Gemini)
->>>>>>> ec1bd1a (Upload full local project)
+4. Calls an LLM (Gemini, OpenAI or a local stub, see src/llm/client.py),
+   optionally streaming tokens
 5. Produces a clean, cited summary
 """
 
-import os
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
 
-<<<<<<< HEAD
 from src.utils.embeddings import embed_text
-from src.db.chroma_store import query_memory
-
-# If using OpenAI
-from openai import OpenAI
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-=======
-import google.generativeai as genai
-from src.utils.embeddings import embed_text
-from src.db.chroma_store import query_memory
-
-# Configure the Gemini API client
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
->>>>>>> ec1bd1a (Upload full local project)
+from src.db.store import query_memory
+from src.pipeline_context import PipelineContext
+from src.utils.tracing import span
+from src.utils.rerank import MMR_ENABLED, MMR_FETCH_FACTOR, mmr_rerank
+from src.utils.context_packer import pack_context
+from src.llm.client import complete, stream_complete
 
 
 # -----------------------------------------------------------
@@ -60,11 +48,7 @@ def format_context(results: Dict) -> str:
 
 def build_rag_prompt(query: str, context: str) -> str:
     """
-<<<<<<< HEAD
     Creates a citation-rich RAG prompt.
-=======
-    Creates a citation-rich RAG prompt for Gemini.
->>>>>>> ec1bd1a (Upload full local project)
     """
 
     return f"""
@@ -87,55 +71,116 @@ CONTEXT:
 
 ANSWER:
 """
-<<<<<<< HEAD
-    
-=======
 
->>>>>>> ec1bd1a (Upload full local project)
 
 # -----------------------------------------------------------
 # 3. GENERATE SUMMARY (CALL LLM)
 # -----------------------------------------------------------
 
-def generate_summary(query: str, top_k: int = 5) -> str:
+def retrieve_diverse(
+    query: str,
+    query_embedding: List[float],
+    top_k: int = 5,
+    user: str = "default",
+    min_created_at: Optional[float] = None
+) -> Dict:
+    """
+    query_memory over-fetching top_k * MMR_FETCH_FACTOR candidates, then
+    MMR re-ranking down to (at most) top_k diverse chunks. Stored chunk
+    vectors come back too, so fact-checking can reuse them.
+    """
+    fetch_k = top_k * MMR_FETCH_FACTOR if MMR_ENABLED else top_k
+    retrieved = query_memory(
+        query_embedding, top_k=fetch_k, user=user, include_embeddings=True,
+        min_created_at=min_created_at, query_text=query
+    )
+
+    if not MMR_ENABLED:
+        return retrieved
+
+    with span("rerank") as rerank_span:
+        reranked = mmr_rerank(retrieved, query_embedding, top_k)
+        rerank_span.set(candidates=len(retrieved["ids"][0]), kept=len(reranked["ids"][0]))
+    return reranked
+
+
+def prepare_context(ctx: PipelineContext) -> PipelineContext:
+    """
+    - Embed the query
+    - Retrieve chunks (over-fetch + MMR re-rank)
+    - Pack context (token budget) + build prompt
+
+    Fills `ctx` in place. Runs once per context; later calls are no-ops.
+    """
+    if ctx.is_retrieved:
+        return ctx
+
+    with span("retrieve", top_k=ctx.top_k):
+        # 1. Embed query
+        query_embedding = embed_text(ctx.query)[0]
+
+        # 2. Retrieve memory (diverse top_k)
+        retrieved = retrieve_diverse(ctx.query, query_embedding, top_k=ctx.top_k, user=ctx.user)
+
+        # 3-4. Format context + RAG prompt
+        use_retrieved(ctx, query_embedding, retrieved)
+
+    return ctx
+
+
+def use_retrieved(ctx: PipelineContext, query_embedding: List[float], retrieved: Dict) -> PipelineContext:
+    """
+    Fill `ctx` from an existing query_memory result (e.g. the one used
+    by the coverage check) instead of retrieving again.
+    """
+    ctx.query_embedding = query_embedding
+    ctx.retrieved = retrieved
+
+    # Best sentences within the context token budget (see context_packer)
+    with span("pack") as pack_span:
+        ctx.context_text, ctx.packing = pack_context(ctx.query, retrieved)
+        pack_span.set(**ctx.packing)
+
+    if ctx.packing["tokens_saved"] > 0:
+        print(f"[✂️] Context packed: {ctx.packing['tokens_full']} → {ctx.packing['tokens_packed']} tokens.")
+
+    ctx.prompt = build_rag_prompt(ctx.query, ctx.context_text)
+    return ctx
+
+
+def generate_summary(query: str, top_k: int = 5, ctx: Optional[PipelineContext] = None) -> str:
     """
     - Embed the query
     - Retrieve chunks
     - Build prompt
-<<<<<<< HEAD
-    - LLM generation
-=======
-    - LLM generation (Gemini)
->>>>>>> ec1bd1a (Upload full local project)
+    (skipped when `ctx` already carries them, see prepare_context)
+    - LLM generation (token counts and latency go to ctx.llm)
     """
 
-    # 1. Embed query
-    query_embedding = embed_text(query)[0]
+    # 1-4. Embed, retrieve, format, build prompt
+    ctx = prepare_context(ctx or PipelineContext(query=query, top_k=top_k))
+    prompt = ctx.prompt
 
-    # 2. Retrieve memory
-    results = query_memory(query_embedding, top_k=top_k)
+    # 5. Call LLM (cached, retried, rate-limited; raises LLMError on failure)
+    response = complete(prompt)
+    ctx.llm = {k: v for k, v in response.items() if k != "text"}
 
-    # 3. Format context
-    context_text = format_context(results)
+    return response["text"]
 
-    # 4. RAG prompt
-    prompt = build_rag_prompt(query, context_text)
 
-<<<<<<< HEAD
-    # 5. Call LLM (OpenAI)
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",   # safe small model, replace if needed
-        messages=[{"role": "user", "content": prompt}]
-    )
+# -----------------------------------------------------------
+# 4. STREAM SUMMARY (TOKENS AS THEY ARRIVE)
+# -----------------------------------------------------------
+
+def stream_summary(query: str, top_k: int = 5, ctx: Optional[PipelineContext] = None) -> Iterator[str]:
+    """
+    Same as generate_summary, but yields the completion text in pieces
+    as the LLM streams it back.
+    """
+
+    # 1-4. Embed, retrieve, format, build prompt
+    ctx = prepare_context(ctx or PipelineContext(query=query, top_k=top_k))
 
-    return completion.choices[0].message.content
-=======
-    # 5. Call LLM (Gemini)
-    try:
-        model = genai.GenerativeModel('models/gemini-pro-latest')
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        print(f"Error during Gemini API call: {e}")
-        return "Error: Could not generate a summary."
->>>>>>> ec1bd1a (Upload full local project)
+    # 5. Stream LLM (ctx.llm is filled once the stream completes)
+    ctx.llm = {}
+    yield from stream_complete(ctx.prompt, metrics=ctx.llm)
@@ -0,0 +1,361 @@
+"""
+base.py
+
+Interface shared by the MARS vector store backends (Chroma, FAISS).
+
+Every backend stores (id, embedding, document, metadata) records and
+answers queries in Chroma's result shape, so callers such as
+summary_agent.format_context work unchanged whichever backend is used:
+
+{
+    "ids": [[...]],
+    "documents": [[...]],
+    "metadatas": [[{"source", "timestamp", "created_at", "user"}, ...]],
+    "distances": [[...]],
+    "embeddings": [[...]]        (only with include_embeddings=True)
+}
+
+Distances are squared L2. "created_at" is the write time in epoch
+seconds, stored numerically so queries can filter on freshness inside
+the store (chunks written before it existed have no "created_at" and
+never pass a freshness filter).
+
+For lifecycle maintenance (src/db/lifecycle.py) backends also list
+per-chunk records, record retrieval times ("accessed_at"), delete chunks
+by id and compact their on-disk files.
+
+Every backend keeps a BM25 index (src/db/bm25_index.py) in its persist
+directory, updated on upsert / delete; hybrid_query() fuses it with the
+dense ranking.
+"""
+
+import os
+import re
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Set
+
+import numpy as np
+
+from src.db.bm25_index import BM25Index, HYBRID_SEARCH_ENABLED, HYBRID_CANDIDATES, RRF_K, fuse_rankings
+from src.utils.tracing import span
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def distance_to_similarity(distance: float) -> float:
+    """
+    Cosine similarity for a squared L2 distance between unit vectors
+    (the embedding model returns normalized vectors).
+    """
+    return 1.0 - float(distance) / 2.0
+
+
+def make_chunk_id(text: str, source: str, user: str = "default") -> str:
+    """
+    Deterministic chunk id: hash of the whitespace-normalized text, its
+    source and the memory namespace. Re-ingesting the same page therefore
+    maps onto the same ids instead of storing duplicates.
+    """
+    normalized = _SPACE_RE.sub(" ", text).strip()
+    digest = hashlib.sha256(f"{user}\x00{source}\x00{normalized}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class VectorStore:
+    """
+    Base class for vector store backends.
+
+    Subclasses implement open/close, upsert_chunks, existing_ids, get,
+    query and reset. Data operations open the store lazily.
+    """
+
+    persist_dir: str
+    _lexical: Optional[BM25Index] = None
+
+    # ---------------------------------
+    # Lifecycle
+    # ---------------------------------
+    def open(self) -> "VectorStore":
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self) -> "VectorStore":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------------------------------
+    # Data operations
+    # ---------------------------------
+    def upsert_chunk(self, text: str, embedding: List[float], source: str, user: str = "default") -> str:
+        """
+        Add a text chunk + embedding to the store.
+        """
+        return self.upsert_chunks([text], [embedding], [source], user=user)[0]
+
+    def upsert_chunks(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        sources: List[str],
+        user: str = "default",
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        raise NotImplementedError
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        raise NotImplementedError
+
+    def refresh(self, ids: List[str]) -> float:
+        """
+        Mark stored chunks as written now ("created_at" / "timestamp"), for
+        chunks re-ingested unchanged, so freshness filters see them again.
+        Unknown ids are ignored. Returns the new write time.
+        """
+        raise NotImplementedError
+
+    def get(self, ids: List[str], user: str = "default", include_embeddings: bool = False) -> Dict:
+        """
+        Stored chunks of `user` among `ids` (missing ones are skipped):
+        {"ids", "documents", "metadatas"[, "embeddings"]} as flat lists.
+        """
+        raise NotImplementedError
+
+    def query(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        user: str = "default",
+        include_embeddings: bool = False,
+        min_created_at: Optional[float] = None
+    ) -> Dict:
+        """
+        Top-k chunks of `user` nearest to the query; with `min_created_at`,
+        only chunks written at or after that epoch time.
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    # ---------------------------------
+    # Lexical index / hybrid retrieval
+    # ---------------------------------
+    @property
+    def lexical_index(self) -> BM25Index:
+        """
+        The store's BM25 index, built from the stored chunks the first
+        time it is opened for a store that predates it.
+        """
+        if self._lexical is None:
+            with self._lock:
+                if self._lexical is None:
+                    os.makedirs(self.persist_dir, exist_ok=True)
+                    index = BM25Index(os.path.join(self.persist_dir, "bm25.sqlite3"))
+                    if index.count() == 0 and self.count() > 0:
+                        self._fill_lexical_index(index)
+                    self._lexical = index
+        return self._lexical
+
+    def _open_lexical_index(self):
+        """
+        Called by backends at the end of open(), so a pre-existing store is
+        indexed before its first new write.
+        """
+        if HYBRID_SEARCH_ENABLED:
+            self.lexical_index
+
+    def _close_lexical_index(self):
+        """
+        Called by backends in close() with their lock held; the next
+        lexical write or query reopens the index.
+        """
+        index, self._lexical = self._lexical, None
+        if index is not None:
+            index.close()
+
+    def rebuild_lexical_index(self):
+        index = self.lexical_index
+        index.clear()
+        self._fill_lexical_index(index)
+
+    def _fill_lexical_index(self, index: BM25Index):
+        added = 0
+        for doc_ids, texts, users, created in self.iter_documents():
+            # Chunks of one upsert share user and write time
+            groups: Dict[tuple, List[int]] = {}
+            for i, key in enumerate(zip(users, created)):
+                groups.setdefault(key, []).append(i)
+
+            for (user, created_at), rows in groups.items():
+                added += index.add(
+                    [doc_ids[i] for i in rows], [texts[i] for i in rows], user=user, created_at=created_at
+                )
+        print(f"[memory] Indexed {added} existing chunks for lexical search.")
+
+    def iter_documents(self, batch_size: int = 5000):
+        """
+        Yields (ids, texts, users, created_at) batches of every stored chunk.
+        """
+        raise NotImplementedError
+
+    def _index_lexical(self, ids: List[str], texts: List[str], user: str, created_at: float):
+        if HYBRID_SEARCH_ENABLED:
+            self.lexical_index.add(ids, texts, user=user, created_at=created_at)
+
+    def _refresh_lexical(self, ids: List[str], created_at: float):
+        if HYBRID_SEARCH_ENABLED:
+            self.lexical_index.refresh(ids, created_at)
+
+    def hybrid_query(
+        self,
+        query_embedding: List[float],
+        query_text: str,
+        top_k: int = 5,
+        user: str = "default",
+        include_embeddings: bool = False,
+        min_created_at: Optional[float] = None,
+        candidates: int = HYBRID_CANDIDATES,
+        rrf_k: float = RRF_K
+    ) -> Dict:
+        """
+        query() over the reciprocal rank fusion of the dense top
+        (top_k * candidates) and the BM25 top (top_k * candidates), in the
+        same result shape. Chunks found only lexically get their distance
+        computed from the stored vector.
+        """
+        n = max(top_k, top_k * candidates)
+
+        dense = self.query(
+            query_embedding, top_k=n, user=user,
+            include_embeddings=include_embeddings, min_created_at=min_created_at
+        )
+
+        with span("lexical") as lexical_span:
+            lexical = self.lexical_index.search(query_text, top_k=n, user=user, min_created_at=min_created_at)
+            lexical_span.set(hits=len(lexical))
+
+        dense_ids = list(dense["ids"][0])
+        fused = [doc_id for doc_id, _ in fuse_rankings([dense_ids, [i for i, _ in lexical]], k=rrf_k)]
+
+        rows = {}
+        for pos, doc_id in enumerate(dense_ids):
+            rows[doc_id] = {
+                "document": dense["documents"][0][pos],
+                "metadata": dense["metadatas"][0][pos],
+                "distance": dense["distances"][0][pos],
+                "embedding": dense["embeddings"][0][pos] if include_embeddings else None,
+            }
+
+        # Keep lexical-only chunks the vector store can still return
+        # (the two indexes can briefly disagree after a crash)
+        missing = [doc_id for doc_id in fused if doc_id not in rows]
+        if missing:
+            extra = self.get(missing[:top_k], user=user, include_embeddings=True)
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            for doc_id, document, meta, embedding in zip(
+                extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]
+            ):
+                vec = np.asarray(embedding, dtype=np.float32)
+                rows[doc_id] = {
+                    "document": document,
+                    "metadata": meta,
+                    "distance": float(np.sum((vec - query_vec) ** 2)),
+                    "embedding": embedding,
+                }
+
+        results = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        if include_embeddings:
+            results["embeddings"] = [[]]
+
+        for doc_id in [d for d in fused if d in rows][:top_k]:
+            row = rows[doc_id]
+            results["ids"][0].append(doc_id)
+            results["documents"][0].append(row["document"])
+            results["metadatas"][0].append(row["metadata"])
+            results["distances"][0].append(row["distance"])
+            if include_embeddings:
+                results["embeddings"][0].append(row["embedding"])
+
+        return results
+
+    # ---------------------------------
+    # Lifecycle maintenance
+    # ---------------------------------
+    def chunk_records(self, user: Optional[str] = None) -> List[Dict]:
+        """
+        One {"id", "user", "created_at", "accessed_at", "bytes"} record per
+        stored chunk (of `user`, or of every user). "accessed_at" is the
+        last recorded retrieval, or None; "bytes" is the stored text size.
+        """
+        raise NotImplementedError
+
+    def touch(self, accessed: Dict[str, float]):
+        """
+        Record retrieval times (chunk id → epoch seconds). Unknown ids are
+        ignored.
+        """
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> int:
+        raise NotImplementedError
+
+    def compact(self) -> Dict:
+        """
+        Reclaim space left by deleted chunks.
+        """
+        raise NotImplementedError
+
+    def disk_bytes(self) -> int:
+        raise NotImplementedError
+
+
+def check_upsert_args(texts: List, embeddings: List, sources: List, ids: Optional[List]):
+    if not (len(texts) == len(embeddings) == len(sources)):
+        raise ValueError("texts, embeddings and sources must have the same length.")
+    if ids is not None and len(ids) != len(texts):
+        raise ValueError("ids must have the same length as texts.")
+
+
+def created_at_of(created_at: Optional[float], timestamp: Optional[str]) -> Optional[float]:
+    """
+    Write time of a chunk in epoch seconds, falling back to the ISO UTC
+    "timestamp" of chunks stored before "created_at" existed.
+    """
+    if created_at is not None:
+        return float(created_at)
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def dir_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def unique_rows(ids: List[str]) -> List[int]:
+    """
+    Index of the first occurrence of each id, in input order.
+    """
+    first = {}
+    for i, doc_id in enumerate(ids):
+        first.setdefault(doc_id, i)
+    return list(first.values())
@@ -0,0 +1,333 @@
+"""
+bm25_index.py
+
+Persistent BM25 inverted index over MARS memory chunks, kept next to the
+vector store (one SQLite file in the store's persist directory) and
+updated on every upsert / delete.
+
+- Tokens are lowercased words and numbers; hyphenated / dotted tokens
+  ("gpt-4", "3.5") are indexed whole and by part, so exact names and
+  figures match
+- Statistics (document count, average length, document frequency) are
+  per user, like every other memory query, and kept up to date on write,
+  so a query reads only the postings of its terms and scores them in
+  SQLite
+- Chunk ids are content-addressed, so re-adding an indexed id is a no-op
+
+fuse_rankings() merges a lexical and a dense ranking with reciprocal
+rank fusion.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Maintain the index on upsert and fuse it into retrieval
+HYBRID_SEARCH_ENABLED = os.environ.get("MARS_HYBRID_SEARCH", "1") != "0"
+
+# Each ranking contributes top_k * HYBRID_CANDIDATES candidates to the fusion
+HYBRID_CANDIDATES = int(os.environ.get("MARS_HYBRID_CANDIDATES", "4"))
+RRF_K = float(os.environ.get("MARS_RRF_K", "60"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms in more than this share of a user's chunks carry almost no signal
+# and are skipped at query time (keeps posting scans short)
+MAX_DF_RATIO = 0.5
+
+_TOKEN_RE = re.compile(r"\w+(?:[.\-]\w+)*")
+_SPLIT_RE = re.compile(r"[.\-_]")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were "
+    "will with what which who how why when where do does did can not no".split()
+)
+
+_SQL_BATCH = 500
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in _SPLIT_RE.split(token) if part and part not in _STOPWORDS)
+    return tokens
+
+
+def fuse_rankings(rankings: Iterable[List[str]], k: float = 60.0) -> List[Tuple[str, float]]:
+    """
+    Reciprocal rank fusion: score(id) = Σ 1 / (k + rank) over the rankings
+    containing it (rank starting at 1). Returns (id, score), best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    SQLite-backed inverted index. Terms (per user) and chunks get integer
+    keys, so postings are compact (term key, chunk key, tf, length) rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_key INTEGER PRIMARY KEY,
+                doc_id TEXT UNIQUE NOT NULL,
+                user TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term_key INTEGER PRIMARY KEY,
+                user TEXT NOT NULL,
+                term TEXT NOT NULL,
+                df INTEGER NOT NULL,
+                UNIQUE (user, term)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_key INTEGER NOT NULL,
+                doc_key INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (term_key, doc_key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc_key);
+            CREATE TABLE IF NOT EXISTS users (
+                user TEXT PRIMARY KEY,
+                n_docs INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    # ---------------------------------
+    # Updates
+    # ---------------------------------
+    def add(self, ids: List[str], texts: List[str], user: str = "default", created_at: Optional[float] = None) -> int:
+        """
+        Index chunks not indexed yet. Returns how many were added.
+        """
+        with self._lock:
+            known = set(self._doc_keys_locked(ids))
+            if known and created_at is not None:
+                # Re-ingested chunks are fresh again, as in the vector store
+                self._conn.executemany(
+                    "UPDATE docs SET created_at = ? WHERE doc_id = ?", [(created_at, doc_id) for doc_id in known]
+                )
+
+            next_doc = self._conn.execute("SELECT COALESCE(MAX(doc_key), 0) + 1 FROM docs").fetchone()[0]
+            docs, doc_terms = [], []
+            df: Dict[str, int] = {}
+            total_length = 0
+
+            for doc_id, text in zip(ids, texts):
+                if doc_id in known:
+                    continue
+                known.add(doc_id)
+
+                counts: Dict[str, int] = {}
+                for token in tokenize(text):
+                    counts[token] = counts.get(token, 0) + 1
+                length = sum(counts.values())
+
+                docs.append((next_doc, doc_id, user, length, created_at))
+                doc_terms.append((next_doc, length, counts))
+                for term in counts:
+                    df[term] = df.get(term, 0) + 1
+                total_length += length
+                next_doc += 1
+
+            if not docs:
+                self._conn.commit()
+                return 0
+
+            term_keys = self._term_keys_locked(user, df)
+            postings = sorted(
+                (term_keys[term], doc_key, tf, length)
+                for doc_key, length, counts in doc_terms
+                for term, tf in counts.items()
+            )
+
+            self._conn.executemany(
+                "INSERT INTO docs (doc_key, doc_id, user, length, created_at) VALUES (?, ?, ?, ?, ?)", docs
+            )
+            self._conn.executemany("INSERT INTO postings (term_key, doc_key, tf, length) VALUES (?, ?, ?, ?)", postings)
+            self._conn.executemany(
+                "UPDATE terms SET df = df + ? WHERE term_key = ?",
+                [(count, term_keys[term]) for term, count in df.items()]
+            )
+            self._conn.execute(
+                "INSERT INTO users (user, n_docs, total_length) VALUES (?, ?, ?) "
+                "ON CONFLICT(user) DO UPDATE SET n_docs = n_docs + excluded.n_docs, "
+                "total_length = total_length + excluded.total_length",
+                (user, len(docs), total_length)
+            )
+            self._conn.commit()
+            return len(docs)
+
+    def refresh(self, ids: List[str], created_at: float):
+        """
+        Set the write time of indexed chunks (re-ingested unchanged).
+        Unknown ids are ignored.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE docs SET created_at = ? WHERE doc_id = ?", [(float(created_at), doc_id) for doc_id in ids]
+            )
+            self._conn.commit()
+
+    def _term_keys_locked(self, user: str, terms: Iterable[str]) -> Dict[str, int]:
+        """
+        Keys of `terms` for `user`, creating missing ones (with df 0).
+        """
+        terms = list(terms)
+        keys = {}
+        for start in range(0, len(terms), _SQL_BATCH):
+            part = terms[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(part))
+            keys.update(self._conn.execute(
+                f"SELECT term, term_key FROM terms WHERE user = ? AND term IN ({marks})", [user] + part
+            ).fetchall())
+
+        missing = [term for term in terms if term not in keys]
+        if missing:
+            next_term = self._conn.execute("SELECT COALESCE(MAX(term_key), 0) + 1 FROM terms").fetchone()[0]
+            new = {term: next_term + i for i, term in enumerate(missing)}
+            self._conn.executemany(
+                "INSERT INTO terms (term_key, user, term, df) VALUES (?, ?, ?, 0)",
+                [(key, user, term) for term, key in new.items()]
+            )
+            keys.update(new)
+
+        return keys
+
+    def _doc_keys_locked(self, ids: List[str]) -> Dict[str, int]:
+        keys = {}
+        for start in range(0, len(ids), _SQL_BATCH):
+            part = ids[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(part))
+            keys.update(self._conn.execute(
+                f"SELECT doc_id, doc_key FROM docs WHERE doc_id IN ({marks})", part
+            ).fetchall())
+        return keys
+
+    def delete(self, ids: List[str]) -> int:
+        with self._lock:
+            doc_keys = list(self._doc_keys_locked(ids).values())
+
+            for start in range(0, len(doc_keys), _SQL_BATCH):
+                part = doc_keys[start:start + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+
+                self._conn.executemany(
+                    "UPDATE users SET n_docs = n_docs - ?, total_length = total_length - ? WHERE user = ?",
+                    self._conn.execute(
+                        f"SELECT COUNT(*), SUM(length), user FROM docs WHERE doc_key IN ({marks}) GROUP BY user", part
+                    ).fetchall()
+                )
+                self._conn.executemany(
+                    "UPDATE terms SET df = df - ? WHERE term_key = ?",
+                    self._conn.execute(
+                        f"SELECT COUNT(*), term_key FROM postings WHERE doc_key IN ({marks}) GROUP BY term_key", part
+                    ).fetchall()
+                )
+                self._conn.execute(f"DELETE FROM postings WHERE doc_key IN ({marks})", part)
+                self._conn.execute(f"DELETE FROM docs WHERE doc_key IN ({marks})", part)
+
+            self._conn.execute("DELETE FROM terms WHERE df <= 0")
+            self._conn.commit()
+            return len(doc_keys)
+
+    def clear(self):
+        with self._lock:
+            self._conn.executescript("DELETE FROM postings; DELETE FROM terms; DELETE FROM docs; DELETE FROM users;")
+            self._conn.commit()
+
+    def vacuum(self):
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    # ---------------------------------
+    # Search
+    # ---------------------------------
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        user: str = "default",
+        min_created_at: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k (chunk id, BM25 score) of `user` for `query`, best first.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+
+        with self._lock:
+            row = self._conn.execute("SELECT n_docs, total_length FROM users WHERE user = ?", (user,)).fetchone()
+            if not row or not row[0]:
+                return []
+            n_docs, total_length = row
+            avg_length = total_length / n_docs
+
+            marks = ",".join("?" * len(terms))
+            df = self._conn.execute(
+                f"SELECT term_key, df FROM terms WHERE user = ? AND term IN ({marks})", [user] + terms
+            ).fetchall()
+
+            idf = [
+                (term_key, math.log(1 + (n_docs - count + 0.5) / (count + 0.5)))
+                for term_key, count in df
+                if count <= MAX_DF_RATIO * n_docs or n_docs < 4
+            ]
+            if not idf:
+                return []
+
+            # Per-posting BM25 term score, summed per chunk inside SQLite
+            params = [value for pair in idf for value in pair]
+            params += [BM25_K1 + 1, BM25_K1, 1 - BM25_B, BM25_B / avg_length]
+
+            fresh = ""
+            if min_created_at is not None:
+                fresh = " JOIN docs f ON f.doc_key = p.doc_key AND f.created_at >= ?"
+                params.append(float(min_created_at))
+            params.append(top_k)
+
+            # Aggregate over postings first; chunk ids are looked up for the top rows only
+            rows = self._conn.execute(
+                f"WITH q(term_key, idf) AS (VALUES {','.join(['(?, ?)'] * len(idf))}), "
+                "top AS ("
+                "SELECT p.doc_key, SUM(q.idf * p.tf * ? / (p.tf + ? * (? + ? * p.length))) AS score "
+                f"FROM q JOIN postings p ON p.term_key = q.term_key{fresh} "
+                "GROUP BY p.doc_key ORDER BY score DESC LIMIT ?"
+                ") "
+                "SELECT d.doc_id, top.score FROM top JOIN docs d ON d.doc_key = top.doc_key ORDER BY top.score DESC",
+                params
+            ).fetchall()
+
+        return [(doc_id, float(score)) for doc_id, score in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
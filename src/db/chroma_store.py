@@ -2,103 +2,442 @@
 chroma_store.py
 
 Wrapper around ChromaDB to store and query vector embeddings for MARS.
+
+A single ChromaStore owns the client and the `mars_memory` collection for
+one persist directory, so the store is opened once per process instead of
+on every upsert/query. The module-level functions below delegate to the
+shared store for the default directory.
 """
 
 import os
+import sqlite3
+import threading
+import time
 import chromadb
-<<<<<<< HEAD
-from chromadb.config import Settings
-=======
->>>>>>> ec1bd1a (Upload full local project)
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 from datetime import datetime
-import uuid
+
+from src.db.base import VectorStore, make_chunk_id, check_upsert_args, unique_rows, created_at_of, dir_bytes
+from src.utils.tracing import traced
+
+# Where Chroma persists data (override with CHROMA_PERSIST_DIR)
+CHROMA_PERSIST_DIR = os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db")
+
+COLLECTION_NAME = "mars_memory"
 
 
 # -----------------------------------------------------------
-# 1. Initialize Chroma Client
+# 1. Managed Store (one client + collection per persist dir)
 # -----------------------------------------------------------
 
-def get_chroma_client():
-<<<<<<< HEAD
-    persist_dir = os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db")
+class ChromaStore(VectorStore):
+    """
+    Owns one PersistentClient and one collection for a persist directory.
+
+    Lifecycle is explicit (`open()` / `close()`, or use as a context
+    manager); data operations open the store lazily if needed. The store
+    is safe to share between threads (e.g. concurrent Streamlit sessions).
+    """
+
+    def __init__(self, persist_dir: str = CHROMA_PERSIST_DIR, collection_name: str = COLLECTION_NAME):
+        self.persist_dir = persist_dir
+        self.collection_name = collection_name
+
+        self._client = None
+        self._collection = None
+        self._lock = threading.RLock()
+
+    # ---------------------------------
+    # Lifecycle
+    # ---------------------------------
+    def open(self) -> "ChromaStore":
+        with self._lock:
+            if self._client is None:
+                self._client = chromadb.PersistentClient(path=self.persist_dir)
+            if self._collection is None:
+                self._collection = self._client.get_or_create_collection(name=self.collection_name)
+                self._open_lexical_index()
+        return self
+
+    def close(self):
+        """
+        Closes the client and the lexical index, releasing their files
+        (chromadb 0.6+; older clients have no close() and stay cached by
+        chromadb until the process exits). The next operation reopens.
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            self._collection = None
+            self._close_lexical_index()
+
+        # Chroma shares one system per path; this drops our reference to it
+        if client is not None and hasattr(client, "close"):
+            client.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self._collection is not None
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self.open()
+            return self._client
+
+    @property
+    def collection(self):
+        with self._lock:
+            if self._collection is None:
+                self.open()
+            return self._collection
+
+    # ---------------------------------
+    # Data operations
+    # ---------------------------------
+    @traced("upsert")
+    def upsert_chunks(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        sources: List[str],
+        user: str = "default",
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add many text chunks + embeddings to the DB, in writes of `batch_size`.
+        Ids default to `make_chunk_id`; repeated chunks within the call are
+        written once.
+
+        Returns:
+            List[str]: ids of the stored chunks, in input order
+        """
+        check_upsert_args(texts, embeddings, sources, ids)
+
+        if not texts:
+            return []
+
+        if ids is None:
+            ids = [make_chunk_id(text, source, user) for text, source in zip(texts, sources)]
+
+        # Chroma rejects duplicate ids within one upsert
+        keep = unique_rows(ids)
+
+        collection = self.collection
+        created_at = time.time()
+        timestamp = datetime.utcfromtimestamp(created_at).isoformat()
+
+        for start in range(0, len(keep), batch_size):
+            rows = keep[start:start + batch_size]
+            collection.upsert(
+                ids=[ids[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows],
+                documents=[texts[i] for i in rows],
+                metadatas=[
+                    {"source": sources[i], "timestamp": timestamp, "created_at": created_at, "user": user}
+                    for i in rows
+                ]
+            )
+
+        self._index_lexical([ids[i] for i in keep], [texts[i] for i in keep], user, created_at)
+
+        return ids
+
+    @traced("dedup_lookup")
+    def existing_ids(self, ids: List[str], batch_size: int = 1000) -> Set[str]:
+        """
+        Returns the subset of `ids` already stored in the collection.
+        """
+        found = set()
+        collection = self.collection
+
+        for start in range(0, len(ids), batch_size):
+            res = collection.get(ids=ids[start:start + batch_size], include=[])
+            found.update(res.get("ids", []))
+
+        return found
+
+    def get(self, ids: List[str], user: str = "default", include_embeddings: bool = False) -> Dict:
+        include = ["documents", "metadatas"]
+        if include_embeddings:
+            include.append("embeddings")
+
+        res = self.collection.get(ids=ids, where={"user": user}, include=include)
+
+        # Chroma does not keep the requested order
+        position = {doc_id: i for i, doc_id in enumerate(res["ids"])}
+        order = [position[doc_id] for doc_id in ids if doc_id in position]
+
+        results = {
+            "ids": [res["ids"][i] for i in order],
+            "documents": [res["documents"][i] for i in order],
+            "metadatas": [res["metadatas"][i] for i in order],
+        }
+        if include_embeddings:
+            results["embeddings"] = [res["embeddings"][i] for i in order]
+        return results
+
+    def iter_documents(self, batch_size: int = 5000):
+        collection = self.collection
+        offset = 0
+        while True:
+            res = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            ids = res.get("ids", [])
+            if not ids:
+                return
+
+            metas = [meta or {} for meta in res["metadatas"]]
+            yield (
+                ids,
+                [document or "" for document in res["documents"]],
+                [meta.get("user", "default") for meta in metas],
+                [created_at_of(meta.get("created_at"), meta.get("timestamp")) for meta in metas],
+            )
+
+            if len(ids) < batch_size:
+                return
+            offset += batch_size
+
+    @traced("query")
+    def query(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        user: str = "default",
+        include_embeddings: bool = False,
+        min_created_at: Optional[float] = None
+    ) -> Dict:
+        """
+        Query vector DB for similar embeddings. With `min_created_at`, the
+        freshness filter runs inside Chroma's metadata filter.
+        """
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+
+        where = {"user": user}
+        if min_created_at is not None:
+            where = {"$and": [{"user": user}, {"created_at": {"$gte": float(min_created_at)}}]}
+
+        return self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=top_k,
+            where=where,
+            include=include
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def reset(self):
+        """
+        Deletes the collection. It is recreated on next use.
+        """
+        with self._lock:
+            self.client.delete_collection(self.collection_name)
+            self._collection = None
+            self.lexical_index.clear()
+
+    # ---------------------------------
+    # Lifecycle maintenance
+    # ---------------------------------
+    def chunk_records(self, user: Optional[str] = None, batch_size: int = 5000) -> List[Dict]:
+        records = []
+        collection = self.collection
+        where = {"user": user} if user is not None else None
 
-    client = chromadb.Client(Settings(
-        chroma_db_impl="duckdb+parquet",
-        persist_directory=persist_dir
-    ))
+        offset = 0
+        while True:
+            res = collection.get(where=where, include=["metadatas", "documents"], limit=batch_size, offset=offset)
+            ids = res.get("ids", [])
 
-=======
+            for doc_id, meta, document in zip(ids, res["metadatas"], res["documents"]):
+                meta = meta or {}
+                records.append({
+                    "id": doc_id,
+                    "user": meta.get("user", "default"),
+                    "created_at": created_at_of(meta.get("created_at"), meta.get("timestamp")),
+                    "accessed_at": meta.get("accessed_at"),
+                    "bytes": len((document or "").encode("utf-8")),
+                })
+
+            if len(ids) < batch_size:
+                return records
+            offset += batch_size
+
+    def refresh(self, ids: List[str], batch_size: int = 1000) -> float:
+        collection = self.collection
+        created_at = time.time()
+        timestamp = datetime.utcfromtimestamp(created_at).isoformat()
+
+        for start in range(0, len(ids), batch_size):
+            part = ids[start:start + batch_size]
+            collection.update(
+                ids=part,
+                metadatas=[{"timestamp": timestamp, "created_at": created_at} for _ in part]
+            )
+
+        self._refresh_lexical(ids, created_at)
+        return created_at
+
+    def touch(self, accessed: Dict[str, float], batch_size: int = 1000):
+        items = list(accessed.items())
+        collection = self.collection
+
+        for start in range(0, len(items), batch_size):
+            part = items[start:start + batch_size]
+            collection.update(
+                ids=[doc_id for doc_id, _ in part],
+                metadatas=[{"accessed_at": float(at)} for _, at in part]
+            )
+
+    def delete(self, ids: List[str], batch_size: int = 1000) -> int:
+        collection = self.collection
+        before = collection.count()
+
+        for start in range(0, len(ids), batch_size):
+            collection.delete(ids=ids[start:start + batch_size])
+        self.lexical_index.delete(ids)
+
+        return before - collection.count()
+
+    def compact(self) -> Dict:
+        """
+        VACUUMs the BM25 index and Chroma's SQLite file. Chroma has no API to rebuild its
+        HNSW segment; deleted vectors there are only marked and their
+        slots reused by later writes.
+        """
+        self.lexical_index.vacuum()
+
+        path = os.path.join(self.persist_dir, "chroma.sqlite3")
+        if not os.path.exists(path):
+            return {}
+
+        before = os.path.getsize(path)
+        try:
+            with self._lock:
+                conn = sqlite3.connect(path, timeout=30)
+                try:
+                    conn.execute("VACUUM")
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"[chroma] VACUUM of {path} failed: {e}")
+            return {}
+
+        return {"sqlite_bytes_before": before, "sqlite_bytes_after": os.path.getsize(path)}
+
+    def disk_bytes(self) -> int:
+        return dir_bytes(self.persist_dir)
+
+
+# -----------------------------------------------------------
+# 2. Process-wide Store Registry
+# -----------------------------------------------------------
+
+_stores: Dict[str, ChromaStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(persist_dir: Optional[str] = None) -> ChromaStore:
     """
-    Creates a persistent Chroma client.
+    Returns the shared store for `persist_dir` (default CHROMA_PERSIST_DIR).
     """
-    # Use the new, recommended PersistentClient
-    client = chromadb.PersistentClient(path="./chroma_db")
->>>>>>> ec1bd1a (Upload full local project)
-    return client
+    key = os.path.abspath(persist_dir or CHROMA_PERSIST_DIR)
+
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ChromaStore(persist_dir=key)
+            _stores[key] = store
+
+    return store
+
+
+def close_all_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+# -----------------------------------------------------------
+# 3. Initialize Chroma Client
+# -----------------------------------------------------------
+
+def get_chroma_client():
+    """
+    Returns the shared persistent Chroma client.
+    """
+    return get_store().client
 
 
 # -----------------------------------------------------------
-# 2. Get or Create Memory Collection
+# 4. Get or Create Memory Collection
 # -----------------------------------------------------------
 
 def get_collection():
-    client = get_chroma_client()
-    return client.get_or_create_collection(name="mars_memory")
+    return get_store().collection
 
 
 # -----------------------------------------------------------
-# 3. UPSERT (Add data to vector DB)
+# 5. UPSERT (Add data to vector DB)
 # -----------------------------------------------------------
 
 def upsert_chunk(text: str, embedding: List[float], source: str, user: str = "default") -> str:
     """
     Add a text chunk + embedding to the DB.
     """
-    collection = get_collection()
+    return get_store().upsert_chunk(text, embedding, source, user=user)
+
+
+def upsert_chunks(
+    texts: List[str],
+    embeddings: List[List[float]],
+    sources: List[str],
+    user: str = "default",
+    batch_size: int = 1000,
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Add many text chunks + embeddings to the DB.
 
-    doc_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat()
+    Args:
+        texts (list[str]): chunk texts
+        embeddings (list[list[float]]): one embedding per text
+        sources (list[str]): one source URL per text
+        user (str): memory namespace
+        batch_size (int): max records per Chroma write
+        ids (list[str], optional): precomputed chunk ids (see make_chunk_id)
 
-    metadata = {
-        "source": source,
-        "timestamp": timestamp,
-        "user": user
-    }
+    Returns:
+        List[str]: ids of the stored chunks, in input order
+    """
+    return get_store().upsert_chunks(texts, embeddings, sources, user=user, batch_size=batch_size, ids=ids)
 
-    collection.upsert(
-        ids=[doc_id],
-        embeddings=[embedding],
-        documents=[text],
-        metadatas=[metadata]
-    )
 
-    return doc_id
+def existing_chunk_ids(ids: List[str]) -> Set[str]:
+    """
+    Returns the subset of `ids` already stored in memory.
+    """
+    return get_store().existing_ids(ids)
 
 
 # -----------------------------------------------------------
-# 4. QUERY (Retrieve top-k relevant chunks)
+# 6. QUERY (Retrieve top-k relevant chunks)
 # -----------------------------------------------------------
 
 def query_memory(query_embedding: List[float], top_k: int = 5, user: str = "default") -> Dict:
     """
     Query vector DB for similar embeddings.
     """
-    collection = get_collection()
-
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k,
-        where={"user": user}
-    )
-
-    return results
+    return get_store().query(query_embedding, top_k=top_k, user=user)
 
 
 # -----------------------------------------------------------
-# 5. DELETE COLLECTION (Optional cleanup)
+# 7. DELETE COLLECTION (Optional cleanup)
 # -----------------------------------------------------------
 
 def reset_memory():
-    client = get_chroma_client()
-    client.delete_collection("mars_memory")
+    get_store().reset()
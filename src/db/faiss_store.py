@@ -0,0 +1,703 @@
+"""
+faiss_store.py
+
+FAISS backend for MARS memory.
+
+- Vectors live in a FAISS index (flat, IVF or HNSW) saved to disk and
+  memory-mapped read-only on startup, so opening a large store is fast
+- Documents and metadata live in a SQLite sidecar keyed by the FAISS
+  integer id, which also maps MARS chunk ids to FAISS ids
+- Distances are squared L2, matching Chroma's default space
+
+Writes are persisted by `flush()`: automatically every
+MARS_FAISS_SAVE_INTERVAL seconds during upserts, and on close / exit.
+The sidecar is committed only after the index file is written, so a
+crash can leave orphan vectors (ignored at query time) but never
+metadata without a vector. compact() rebuilds the index from the live
+rows, dropping orphans and vectors HNSW could not remove.
+"""
+
+import os
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import faiss
+import numpy as np
+
+from src.db.base import VectorStore, make_chunk_id, check_upsert_args, unique_rows, created_at_of, dir_bytes
+from src.utils.tracing import traced
+
+FAISS_PERSIST_DIR = os.environ.get("MARS_FAISS_PERSIST_DIR", "./faiss_db")
+
+# flat | ivf | hnsw
+FAISS_INDEX_TYPE = os.environ.get("MARS_FAISS_INDEX", "flat")
+
+FAISS_MMAP = os.environ.get("MARS_FAISS_MMAP", "1") == "1"
+FAISS_SAVE_INTERVAL = float(os.environ.get("MARS_FAISS_SAVE_INTERVAL", "10"))
+
+FAISS_IVF_NLIST = int(os.environ.get("MARS_FAISS_IVF_NLIST", "1024"))
+FAISS_IVF_NPROBE = int(os.environ.get("MARS_FAISS_IVF_NPROBE", "16"))
+FAISS_HNSW_M = int(os.environ.get("MARS_FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH = int(os.environ.get("MARS_FAISS_HNSW_EF_SEARCH", "64"))
+
+# IVF is trained once this many vectors per list are available; until then
+# vectors go to a flat index
+IVF_TRAIN_POINTS_PER_LIST = 39
+
+# Search this many candidates per requested result before filtering by user
+QUERY_OVERSAMPLE = 4
+
+_SQL_BATCH = 500
+
+
+class FaissStore(VectorStore):
+    """
+    FAISS index + SQLite sidecar for one persist directory.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str = FAISS_PERSIST_DIR,
+        index_type: str = FAISS_INDEX_TYPE,
+        mmap: bool = FAISS_MMAP,
+        save_interval: float = FAISS_SAVE_INTERVAL
+    ):
+        if index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+        self.persist_dir = persist_dir
+        self.index_type = index_type
+        self.mmap = mmap
+        self.save_interval = save_interval
+
+        self._index_path = os.path.join(persist_dir, "index.faiss")
+        self._meta_path = os.path.join(persist_dir, "meta.sqlite3")
+        self._next_id_path = os.path.join(persist_dir, "next_id")
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._index = None
+        self._read_only = False
+        self._dirty = False
+        self._last_save = 0.0
+        self._dim: Optional[int] = None
+        self._next_id = 0
+
+    # ---------------------------------
+    # Lifecycle
+    # ---------------------------------
+    def open(self) -> "FaissStore":
+        with self._lock:
+            if self._conn is not None:
+                return self
+
+            os.makedirs(self.persist_dir, exist_ok=True)
+
+            conn = sqlite3.connect(self._meta_path, check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    int_id INTEGER PRIMARY KEY,
+                    doc_id TEXT UNIQUE NOT NULL,
+                    document TEXT NOT NULL,
+                    source TEXT,
+                    timestamp TEXT,
+                    user TEXT,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+            for column in ("created_at", "accessed_at"):
+                if column not in columns:
+                    # Stores written before numeric timestamps / lifecycle tracking existed
+                    conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_user_created ON chunks(user, created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            conn.commit()
+            self._conn = conn
+
+            info = dict(conn.execute("SELECT key, value FROM info").fetchall())
+            if info.get("index_type", self.index_type) != self.index_type:
+                print(
+                    f"[faiss] {self.persist_dir} holds a '{info['index_type']}' index; "
+                    f"ignoring requested '{self.index_type}'."
+                )
+                self.index_type = info["index_type"]
+            self._dim = int(info["dim"]) if "dim" in info else None
+            self._next_id = max(int(info.get("next_id", 0)), self._read_next_id())
+
+            if os.path.exists(self._index_path):
+                self._index = self._mmap_index() if self.mmap else None
+                self._read_only = self._index is not None
+                if self._index is None:
+                    self._index = faiss.read_index(self._index_path)
+                self._configure_search(self._index)
+
+            self._last_save = time.time()
+            self._open_lexical_index()
+
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+            self._index = None
+            self._close_lexical_index()
+
+    def flush(self):
+        """
+        Write the index to disk, then commit the sidecar.
+        """
+        with self._lock:
+            if self._conn is None or not self._dirty:
+                return
+
+            # Reserve ids before the index is written: ids of orphan vectors
+            # from an interrupted flush are never handed out again
+            self._write_next_id()
+
+            if self._index is not None:
+                tmp_path = self._index_path + ".tmp"
+                faiss.write_index(self._index, tmp_path)
+                os.replace(tmp_path, self._index_path)
+
+            self._set_info("next_id", self._next_id)
+            self._conn.commit()
+
+            self._dirty = False
+            self._last_save = time.time()
+
+    def _read_next_id(self) -> int:
+        if not os.path.exists(self._next_id_path):
+            return 0
+        with open(self._next_id_path, "r", encoding="ascii") as f:
+            return int(f.read().strip() or 0)
+
+    def _write_next_id(self):
+        tmp_path = self._next_id_path + ".tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.write(str(self._next_id))
+        os.replace(tmp_path, self._next_id_path)
+
+    def _mmap_index(self):
+        """
+        Memory-map the saved index read-only. Flat codes (flat / HNSW
+        storage) and IVF inverted lists need different flags; returns
+        None if this FAISS build can map neither.
+        """
+        mmap_flags = [faiss.IO_FLAG_MMAP]
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            mmap_flags.insert(0, faiss.IO_FLAG_MMAP_IFC)
+
+        for flag in mmap_flags:
+            try:
+                return faiss.read_index(self._index_path, flag | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                continue
+
+        return None
+
+    def _ensure_open(self):
+        if self._conn is None:
+            self.open()
+
+    # ---------------------------------
+    # Index management
+    # ---------------------------------
+    def _set_info(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _new_index(self, dim: int):
+        if self.index_type == "hnsw":
+            return faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, FAISS_HNSW_M))
+        # flat, and the staging index for ivf until it can be trained
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+
+    def _configure_search(self, index):
+        params = faiss.ParameterSpace()
+        if self.index_type == "ivf" and isinstance(index, faiss.IndexIVF):
+            params.set_index_parameter(index, "nprobe", FAISS_IVF_NPROBE)
+        elif self.index_type == "hnsw":
+            params.set_index_parameter(index, "efSearch", FAISS_HNSW_EF_SEARCH)
+
+    def _writable_index(self, dim: int):
+        """
+        Returns an index that accepts writes, reloading a memory-mapped
+        index into memory on first write.
+        """
+        if self._index is None:
+            self._dim = dim
+            self._set_info("dim", dim)
+            self._set_info("index_type", self.index_type)
+            self._index = self._new_index(dim)
+            self._configure_search(self._index)
+        elif self._read_only:
+            self._index = faiss.read_index(self._index_path)
+            self._configure_search(self._index)
+            self._read_only = False
+
+        if dim != self._dim:
+            raise ValueError(f"Embedding dimension {dim} does not match store dimension {self._dim}.")
+
+        return self._index
+
+    def _maybe_train_ivf(self):
+        """
+        Swap the flat staging index for a trained IVF index once enough
+        vectors are stored.
+        """
+        index = self._index
+        if self.index_type != "ivf" or isinstance(index, faiss.IndexIVF):
+            return
+
+        nlist = FAISS_IVF_NLIST
+        if index.ntotal < nlist * IVF_TRAIN_POINTS_PER_LIST:
+            return
+
+        ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        vectors = index.index.reconstruct_n(0, index.ntotal)
+
+        ivf = faiss.IndexIVFFlat(faiss.IndexFlatL2(self._dim), self._dim, nlist)
+        ivf.train(vectors)
+        ivf.add_with_ids(vectors, ids)
+        self._configure_search(ivf)
+
+        self._index = ivf
+
+    def _remove_vectors(self, int_ids: List[int]):
+        if not int_ids:
+            return
+        try:
+            self._index.remove_ids(np.asarray(int_ids, dtype=np.int64))
+        except RuntimeError:
+            # HNSW cannot remove; the sidecar row is gone so the stale
+            # vector is skipped at query time until the index is rebuilt
+            pass
+
+    # ---------------------------------
+    # Data operations
+    # ---------------------------------
+    @traced("upsert")
+    def upsert_chunks(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        sources: List[str],
+        user: str = "default",
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add many text chunks + embeddings to the store. Existing ids are
+        replaced.
+
+        Returns:
+            List[str]: ids of the stored chunks, in input order
+        """
+        check_upsert_args(texts, embeddings, sources, ids)
+
+        if not texts:
+            return []
+
+        if ids is None:
+            ids = [make_chunk_id(text, source, user) for text, source in zip(texts, sources)]
+
+        keep = unique_rows(ids)
+        created_at = time.time()
+        timestamp = datetime.utcfromtimestamp(created_at).isoformat()
+
+        with self._lock:
+            self._ensure_open()
+
+            for start in range(0, len(keep), batch_size):
+                rows = keep[start:start + batch_size]
+                vectors = np.asarray([embeddings[i] for i in rows], dtype=np.float32)
+                index = self._writable_index(vectors.shape[1])
+
+                replaced = self._lookup_int_ids([ids[i] for i in rows])
+                if replaced:
+                    self._remove_vectors(list(replaced.values()))
+                    self._delete_rows(list(replaced.values()))
+
+                int_ids = np.arange(self._next_id, self._next_id + len(rows), dtype=np.int64)
+                self._next_id += len(rows)
+
+                index.add_with_ids(vectors, int_ids)
+                self._conn.executemany(
+                    "INSERT INTO chunks (int_id, doc_id, document, source, timestamp, user, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (int(int_id), ids[i], texts[i], sources[i], timestamp, user, created_at)
+                        for int_id, i in zip(int_ids, rows)
+                    ]
+                )
+
+            self._maybe_train_ivf()
+            self._dirty = True
+
+            if time.time() - self._last_save >= self.save_interval:
+                self.flush()
+
+        self._index_lexical([ids[i] for i in keep], [texts[i] for i in keep], user, created_at)
+
+        return ids
+
+    def _lookup_int_ids(self, doc_ids: List[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(doc_ids), _SQL_BATCH):
+            part = doc_ids[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(part))
+            found.update(self._conn.execute(
+                f"SELECT doc_id, int_id FROM chunks WHERE doc_id IN ({marks})", part
+            ).fetchall())
+        return found
+
+    def _delete_rows(self, int_ids: List[int]):
+        self._conn.executemany("DELETE FROM chunks WHERE int_id = ?", [(i,) for i in int_ids])
+
+    @traced("dedup_lookup")
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """
+        Returns the subset of `ids` already stored.
+        """
+        with self._lock:
+            self._ensure_open()
+            return set(self._lookup_int_ids(ids))
+
+    def get(self, ids: List[str], user: str = "default", include_embeddings: bool = False) -> Dict:
+        results = {"ids": [], "documents": [], "metadatas": []}
+
+        with self._lock:
+            self._ensure_open()
+            int_ids = self._lookup_int_ids(ids)
+            rows = self._rows_for(list(int_ids.values()), user)
+            found = [doc_id for doc_id in ids if int_ids.get(doc_id) in rows]
+
+            if include_embeddings:
+                results["embeddings"] = self._reconstruct([int_ids[doc_id] for doc_id in found]) if found else []
+                if len(results["embeddings"]) != len(found):
+                    # Index can't reconstruct: return the chunks without them
+                    found = []
+                    results["embeddings"] = []
+
+        for doc_id in found:
+            _, document, source, timestamp, row_user, created_at = rows[int_ids[doc_id]]
+            meta = {"source": source, "timestamp": timestamp, "user": row_user}
+            if created_at is not None:
+                meta["created_at"] = created_at
+
+            results["ids"].append(doc_id)
+            results["documents"].append(document)
+            results["metadatas"].append(meta)
+
+        return results
+
+    def iter_documents(self, batch_size: int = 5000):
+        with self._lock:
+            self._ensure_open()
+            rows = self._conn.execute(
+                "SELECT doc_id, document, user, created_at, timestamp FROM chunks ORDER BY int_id"
+            ).fetchall()
+
+        for start in range(0, len(rows), batch_size):
+            part = rows[start:start + batch_size]
+            yield (
+                [row[0] for row in part],
+                [row[1] for row in part],
+                [row[2] for row in part],
+                [created_at_of(row[3], row[4]) for row in part],
+            )
+
+    @traced("query")
+    def query(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        user: str = "default",
+        include_embeddings: bool = False,
+        min_created_at: Optional[float] = None
+    ) -> Dict:
+        """
+        Query the index for similar embeddings within a user namespace
+        (and, with `min_created_at`, written at or after that time).
+        """
+        results = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        if include_embeddings:
+            results["embeddings"] = [[]]
+
+        with self._lock:
+            self._ensure_open()
+            index = self._index
+
+            if index is None or index.ntotal == 0 or top_k <= 0:
+                return results
+
+            x = np.asarray([query_embedding], dtype=np.float32)
+            k = min(index.ntotal, top_k * QUERY_OVERSAMPLE)
+
+            while True:
+                distances, int_ids = index.search(x, k)
+                hits = self._rows_for(
+                    [int(i) for i in int_ids[0] if i >= 0],
+                    user,
+                    min_created_at
+                )
+
+                ranked = []
+                for dist, int_id in zip(distances[0], int_ids[0]):
+                    row = hits.get(int(int_id))
+                    if row is not None:
+                        ranked.append((float(dist), int(int_id), row))
+                    if len(ranked) == top_k:
+                        break
+
+                # Other users', too old or stale vectors crowded the candidates: widen
+                if len(ranked) == top_k or k >= index.ntotal:
+                    break
+                k = min(index.ntotal, k * QUERY_OVERSAMPLE)
+
+            if include_embeddings:
+                results["embeddings"][0] = self._reconstruct([int_id for _, int_id, _ in ranked])
+
+        for dist, _, (doc_id, document, source, timestamp, row_user, created_at) in ranked:
+            meta = {"source": source, "timestamp": timestamp, "user": row_user}
+            if created_at is not None:
+                meta["created_at"] = created_at
+
+            results["ids"][0].append(doc_id)
+            results["documents"][0].append(document)
+            results["metadatas"][0].append(meta)
+            results["distances"][0].append(dist)
+
+        return results
+
+    def _reconstruct(self, int_ids: List[int]) -> List[np.ndarray]:
+        """
+        Stored vectors for `int_ids` as float32 rows, like Chroma returns
+        them (empty if the index can't reconstruct).
+        """
+        index = self._index
+        try:
+            if isinstance(index, faiss.IndexIVF) and index.direct_map.type == faiss.DirectMap.NoMap:
+                # Hashtable map: supports reconstruct by id and still allows remove_ids
+                index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return [index.reconstruct(i) for i in int_ids]
+        except RuntimeError:
+            return []
+
+    def _rows_for(self, int_ids: List[int], user: str, min_created_at: Optional[float] = None) -> Dict[int, tuple]:
+        # Unary + keeps SQLite on the int_id primary key; otherwise it may pick
+        # the (user, created_at) index and scan all of the user's chunks
+        fresh = "" if min_created_at is None else " AND +created_at >= ?"
+        extra = [user] if min_created_at is None else [user, float(min_created_at)]
+
+        rows = {}
+        for start in range(0, len(int_ids), _SQL_BATCH):
+            part = int_ids[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(part))
+            for int_id, *row in self._conn.execute(
+                f"SELECT int_id, doc_id, document, source, timestamp, user, created_at FROM chunks "
+                f"WHERE int_id IN ({marks}) AND +user = ?{fresh}",
+                part + extra
+            ):
+                rows[int_id] = tuple(row)
+        return rows
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_open()
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def reset(self):
+        """
+        Deletes all vectors and metadata.
+        """
+        with self._lock:
+            self._ensure_open()
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM info")
+            self._conn.commit()
+
+            for path in (self._index_path, self._next_id_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            self._index = None
+            self._read_only = False
+            self._dim = None
+            self._next_id = 0
+            self._dirty = False
+
+        self.lexical_index.clear()
+
+    # ---------------------------------
+    # Lifecycle maintenance
+    # ---------------------------------
+    def chunk_records(self, user: Optional[str] = None) -> List[Dict]:
+        where = "" if user is None else " WHERE user = ?"
+
+        with self._lock:
+            self._ensure_open()
+            rows = self._conn.execute(
+                "SELECT doc_id, user, created_at, timestamp, accessed_at, length(CAST(document AS BLOB)) "
+                f"FROM chunks{where}",
+                [] if user is None else [user]
+            ).fetchall()
+
+        return [
+            {
+                "id": doc_id,
+                "user": row_user,
+                "created_at": created_at_of(created_at, timestamp),
+                "accessed_at": accessed_at,
+                "bytes": size or 0,
+            }
+            for doc_id, row_user, created_at, timestamp, accessed_at, size in rows
+        ]
+
+    def refresh(self, ids: List[str]) -> float:
+        created_at = time.time()
+        timestamp = datetime.utcfromtimestamp(created_at).isoformat()
+
+        with self._lock:
+            self._ensure_open()
+            self._conn.executemany(
+                "UPDATE chunks SET created_at = ?, timestamp = ? WHERE doc_id = ?",
+                [(created_at, timestamp, doc_id) for doc_id in ids]
+            )
+            # Committed with the next flush, after any pending vectors
+            self._dirty = True
+
+            if time.time() - self._last_save >= self.save_interval:
+                self.flush()
+
+        self._refresh_lexical(ids, created_at)
+        return created_at
+
+    def touch(self, accessed: Dict[str, float]):
+        with self._lock:
+            self._ensure_open()
+            self._conn.executemany(
+                "UPDATE chunks SET accessed_at = ? WHERE doc_id = ?",
+                [(float(at), doc_id) for doc_id, at in accessed.items()]
+            )
+            self._dirty = True
+            self.flush()
+
+    def delete(self, ids: List[str]) -> int:
+        with self._lock:
+            self._ensure_open()
+            found = self._lookup_int_ids(ids)
+            if not found:
+                return 0
+
+            int_ids = list(found.values())
+            if self._index is not None:
+                self._writable_index(self._dim)
+                self._remove_vectors(int_ids)
+            self._delete_rows(int_ids)
+
+            self._dirty = True
+            self.flush()
+
+        self.lexical_index.delete(ids)
+        return len(int_ids)
+
+    def compact(self) -> Dict:
+        """
+        Rebuild the index from the vectors of live rows, then VACUUM the
+        sidecar and the BM25 index.
+        """
+        with self._lock:
+            self._ensure_open()
+            report = {"vectors_before": 0, "vectors_after": 0}
+
+            if self._index is not None:
+                index = self._writable_index(self._dim)
+                report["vectors_before"] = report["vectors_after"] = int(index.ntotal)
+
+                live = np.asarray(
+                    [row[0] for row in self._conn.execute("SELECT int_id FROM chunks ORDER BY int_id")],
+                    dtype=np.int64
+                )
+                int_ids, vectors = self._stored_vectors(live)
+
+                if len(int_ids) < len(live):
+                    print(f"[faiss] Could not read back {len(live) - len(int_ids)} vectors; skipping index rebuild.")
+                else:
+                    rebuilt = self._new_index(self._dim)
+                    if len(int_ids):
+                        rebuilt.add_with_ids(vectors, int_ids)
+                    self._configure_search(rebuilt)
+                    self._index = rebuilt
+                    self._maybe_train_ivf()
+                    report["vectors_after"] = int(self._index.ntotal)
+
+            self._dirty = True
+            self.flush()
+            self._conn.execute("VACUUM")
+
+        self.lexical_index.vacuum()
+        return report
+
+    def _stored_vectors(self, int_ids: np.ndarray):
+        """
+        (ids, vectors) for the subset of `int_ids` present in the index.
+        """
+        index = self._index
+        if isinstance(index, faiss.IndexIDMap2):
+            stored = faiss.vector_to_array(index.id_map).astype(np.int64)
+            keep = np.isin(stored, int_ids)
+            vectors = index.index.reconstruct_n(0, index.ntotal)
+            return stored[keep], vectors[keep]
+
+        vectors = self._reconstruct([int(i) for i in int_ids])
+        if len(vectors) != len(int_ids):
+            return np.zeros(0, dtype=np.int64), None
+        return int_ids, np.asarray(vectors, dtype=np.float32)
+
+    def disk_bytes(self) -> int:
+        with self._lock:
+            self.flush()
+        return dir_bytes(self.persist_dir)
+
+
+# -----------------------------------------------------------
+# Process-wide Store Registry
+# -----------------------------------------------------------
+
+_stores: Dict[str, FaissStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_faiss_store(persist_dir: Optional[str] = None) -> FaissStore:
+    """
+    Returns the shared store for `persist_dir` (default MARS_FAISS_PERSIST_DIR).
+    """
+    key = os.path.abspath(persist_dir or FAISS_PERSIST_DIR)
+
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = FaissStore(persist_dir=key)
+            _stores[key] = store
+
+    return store
+
+
+@atexit.register
+def close_all_faiss_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
@@ -0,0 +1,271 @@
+"""
+lifecycle.py
+
+Keeps MARS memory from growing without bound.
+
+- Age-based expiry: chunks written more than MARS_MEMORY_TTL seconds ago
+  are deleted (re-ingesting a page writes them again as new)
+- Per-user caps on chunk count (MARS_MEMORY_MAX_CHUNKS) and stored text
+  bytes (MARS_MEMORY_MAX_BYTES); above a cap the least recently retrieved
+  chunks are evicted first (never-retrieved chunks count from their
+  write time)
+- Compaction: the backend reclaims the space left by deleted chunks
+
+Off unless MARS_MEMORY_LIFECYCLE=1: nothing is deleted behind the
+user's back by default (see the README). compact_memory() and
+`python -m src.db.lifecycle` still run a pass on demand.
+
+When enabled, query_memory reports the ids it returns via
+record_access(); the times are buffered in memory and written to the
+store at the start of each pass, so retrieval never waits on a metadata
+write. A background thread runs a pass every
+MARS_MEMORY_COMPACT_INTERVAL seconds once memory is written to. Each
+pass reports collection size and query latency (over recently seen
+queries) before and after.
+"""
+
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.db.base import VectorStore
+
+# Opt-in: background expiry / caps / compaction (deletes stored chunks)
+MEMORY_LIFECYCLE_ENABLED = os.environ.get("MARS_MEMORY_LIFECYCLE", "0") == "1"
+
+# Seconds a chunk is kept after it was written (0 keeps chunks forever)
+MEMORY_TTL = float(os.environ.get("MARS_MEMORY_TTL", str(30 * 24 * 3600)))
+
+# Per-user caps (0 = no cap)
+MEMORY_MAX_CHUNKS = int(os.environ.get("MARS_MEMORY_MAX_CHUNKS", "50000"))
+MEMORY_MAX_BYTES = int(os.environ.get("MARS_MEMORY_MAX_BYTES", "0"))
+
+# Seconds between background passes (0 = only run when called)
+MEMORY_COMPACT_INTERVAL = float(os.environ.get("MARS_MEMORY_COMPACT_INTERVAL", "3600"))
+
+# Recent queries replayed to measure query latency around a pass
+MEMORY_PROBE_QUERIES = int(os.environ.get("MARS_MEMORY_PROBE_QUERIES", "8"))
+
+
+def _last_used(record: Dict) -> float:
+    return record["accessed_at"] or record["created_at"] or 0.0
+
+
+class MemoryLifecycle:
+    """
+    Expiry, per-user caps and compaction for one vector store (default:
+    the configured MARS memory backend).
+    """
+
+    def __init__(
+        self,
+        store: Optional[VectorStore] = None,
+        ttl: float = MEMORY_TTL,
+        max_chunks: int = MEMORY_MAX_CHUNKS,
+        max_bytes: int = MEMORY_MAX_BYTES,
+        interval: float = MEMORY_COMPACT_INTERVAL
+    ):
+        self._store = store
+        self.ttl = ttl
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}
+        self._probes = deque(maxlen=MEMORY_PROBE_QUERIES)
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_report: Optional[Dict] = None
+
+    @property
+    def store(self) -> VectorStore:
+        if self._store is None:
+            from src.db.store import get_vector_store
+            return get_vector_store()
+        return self._store
+
+    # ---------------------------------
+    # Access tracking
+    # ---------------------------------
+    def record_access(self, ids: List[str], query_embedding: Optional[List[float]] = None, user: str = "default"):
+        """
+        Note that `ids` were just retrieved (and keep the query around as a
+        latency probe).
+        """
+        now = time.time()
+        with self._lock:
+            for doc_id in ids:
+                self._accessed[doc_id] = now
+            if query_embedding is not None:
+                self._probes.append((list(query_embedding), user))
+
+    def _flush_access(self) -> int:
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            self.store.touch(accessed)
+        return len(accessed)
+
+    # ---------------------------------
+    # Maintenance pass
+    # ---------------------------------
+    def _select_expired(self, records: List[Dict], now: float) -> List[str]:
+        if self.ttl <= 0:
+            return []
+        cutoff = now - self.ttl
+        return [r["id"] for r in records if r["created_at"] is not None and r["created_at"] < cutoff]
+
+    def _select_evicted(self, records: List[Dict]) -> List[str]:
+        """
+        Least recently retrieved chunks of each user above the caps.
+        """
+        if self.max_chunks <= 0 and self.max_bytes <= 0:
+            return []
+
+        by_user: Dict[str, List[Dict]] = {}
+        for r in records:
+            by_user.setdefault(r["user"], []).append(r)
+
+        evicted = []
+        for user_records in by_user.values():
+            count = len(user_records)
+            size = sum(r["bytes"] for r in user_records)
+
+            for r in sorted(user_records, key=_last_used):
+                over_count = self.max_chunks > 0 and count > self.max_chunks
+                over_bytes = self.max_bytes > 0 and size > self.max_bytes
+                if not (over_count or over_bytes):
+                    break
+                evicted.append(r["id"])
+                count -= 1
+                size -= r["bytes"]
+
+        return evicted
+
+    def _measure(self, records: Optional[List[Dict]] = None) -> Dict:
+        store = self.store
+        if records is None:
+            records = store.chunk_records()
+
+        with self._lock:
+            probes = list(self._probes)
+
+        timings = []
+        for embedding, user in probes:
+            t0 = time.perf_counter()
+            store.query(embedding, top_k=5, user=user)
+            timings.append((time.perf_counter() - t0) * 1000)
+
+        return {
+            "chunks": len(records),
+            "users": len({r["user"] for r in records}),
+            "text_bytes": sum(r["bytes"] for r in records),
+            "disk_bytes": store.disk_bytes(),
+            "query_ms_p50": round(statistics.median(timings), 3) if timings else None,
+        }
+
+    def run(self, compact: bool = True) -> Dict:
+        """
+        One pass: write buffered access times, expire, evict, compact.
+
+        Returns:
+            {"before", "after": {"chunks", "users", "text_bytes", "disk_bytes", "query_ms_p50"},
+             "touched", "expired", "evicted", "compaction", "seconds"}
+        """
+        with self._run_lock:
+            t0 = time.perf_counter()
+            store = self.store
+
+            touched = self._flush_access()
+            records = store.chunk_records()
+            before = self._measure(records)
+
+            expired = set(self._select_expired(records, time.time()))
+            evicted = self._select_evicted([r for r in records if r["id"] not in expired])
+
+            deleted = list(expired) + evicted
+            if deleted:
+                store.delete(deleted)
+
+            compaction = store.compact() if compact else {}
+            after = self._measure()
+
+            report = {
+                "before": before,
+                "after": after,
+                "touched": touched,
+                "expired": len(expired),
+                "evicted": len(evicted),
+                "compaction": compaction,
+                "seconds": round(time.perf_counter() - t0, 3),
+            }
+            self.last_report = report
+
+        print(
+            f"[memory] expired {report['expired']}, evicted {report['evicted']} chunks; "
+            f"{before['chunks']} → {after['chunks']} chunks, "
+            f"disk {before['disk_bytes'] / 1e6:.1f} → {after['disk_bytes'] / 1e6:.1f} MB, "
+            f"query p50 {before['query_ms_p50']} → {after['query_ms_p50']} ms "
+            f"({report['seconds']:.1f}s)"
+        )
+        return report
+
+    # ---------------------------------
+    # Background thread
+    # ---------------------------------
+    def start(self):
+        """
+        Start the background pass (no-op if running or interval is 0).
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="mars-memory-lifecycle", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run()
+            except Exception as e:
+                print(f"[memory] Lifecycle pass failed: {e}")
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+_lifecycle: Optional[MemoryLifecycle] = None
+_lifecycle_lock = threading.Lock()
+
+
+def get_memory_lifecycle() -> MemoryLifecycle:
+    global _lifecycle
+
+    if _lifecycle is None:
+        with _lifecycle_lock:
+            if _lifecycle is None:
+                _lifecycle = MemoryLifecycle()
+
+    return _lifecycle
+
+
+if __name__ == "__main__":
+    import json
+
+    print(json.dumps(get_memory_lifecycle().run(), indent=2))
@@ -0,0 +1,111 @@
+"""
+store.py
+
+Backend selection for MARS memory.
+
+MARS_VECTOR_STORE picks the backend ("chroma" or "faiss"); the functions
+below delegate to the shared store of that backend, so agents don't need
+to know which one is configured. With MARS_MEMORY_LIFECYCLE=1, writes
+start the memory lifecycle thread and retrievals feed its access times
+(see src/db/lifecycle.py).
+"""
+
+import os
+from typing import List, Dict, Optional, Set
+
+from src.db.base import VectorStore, make_chunk_id, distance_to_similarity
+from src.db.bm25_index import HYBRID_SEARCH_ENABLED
+from src.db.lifecycle import MEMORY_LIFECYCLE_ENABLED, get_memory_lifecycle
+
+VECTOR_STORE_BACKEND = os.environ.get("MARS_VECTOR_STORE", "chroma")
+
+
+def get_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """
+    Returns the shared store for `backend` (default MARS_VECTOR_STORE).
+    """
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+
+    if backend == "chroma":
+        from src.db.chroma_store import get_store
+        return get_store()
+
+    if backend == "faiss":
+        from src.db.faiss_store import get_faiss_store
+        return get_faiss_store()
+
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+def upsert_chunks(
+    texts: List[str],
+    embeddings: List[List[float]],
+    sources: List[str],
+    user: str = "default",
+    batch_size: int = 1000,
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Add many text chunks + embeddings to memory.
+    """
+    if MEMORY_LIFECYCLE_ENABLED:
+        get_memory_lifecycle().start()
+    return get_vector_store().upsert_chunks(texts, embeddings, sources, user=user, batch_size=batch_size, ids=ids)
+
+
+def existing_chunk_ids(ids: List[str]) -> Set[str]:
+    """
+    Returns the subset of `ids` already stored in memory.
+    """
+    return get_vector_store().existing_ids(ids)
+
+
+def refresh_chunks(ids: List[str]):
+    """
+    Mark stored chunks as written now (re-ingested unchanged), so they
+    count as fresh memory again.
+    """
+    if ids:
+        get_vector_store().refresh(ids)
+
+
+def query_memory(
+    query_embedding: List[float],
+    top_k: int = 5,
+    user: str = "default",
+    include_embeddings: bool = False,
+    min_created_at: Optional[float] = None,
+    query_text: Optional[str] = None
+) -> Dict:
+    """
+    Query memory for similar embeddings. With `include_embeddings` the
+    stored vectors of the hits are returned too (for reuse downstream);
+    with `min_created_at` only chunks stored since then are considered.
+    With `query_text` (and MARS_HYBRID_SEARCH on) the dense ranking is
+    fused with BM25 over the same chunks.
+    """
+    store = get_vector_store()
+    if query_text and HYBRID_SEARCH_ENABLED:
+        results = store.hybrid_query(
+            query_embedding, query_text, top_k=top_k, user=user,
+            include_embeddings=include_embeddings, min_created_at=min_created_at
+        )
+    else:
+        results = store.query(
+            query_embedding, top_k=top_k, user=user,
+            include_embeddings=include_embeddings, min_created_at=min_created_at
+        )
+    if MEMORY_LIFECYCLE_ENABLED:
+        get_memory_lifecycle().record_access(results["ids"][0], query_embedding, user)
+    return results
+
+
+def compact_memory(compact: bool = True) -> Dict:
+    """
+    Run one memory lifecycle pass now (expiry, caps, compaction).
+    """
+    return get_memory_lifecycle().run(compact=compact)
+
+
+def reset_memory():
+    get_vector_store().reset()
@@ -0,0 +1,87 @@
+"""
+base.py
+
+Interface shared by the MARS LLM backends (Gemini, OpenAI, local stub).
+
+A provider turns a prompt into a completion, either at once (generate)
+or in pieces as they arrive (stream). Both report token usage in the
+same shape:
+
+{
+    "text": "...",                (generate only)
+    "prompt_tokens": int,
+    "completion_tokens": int
+}
+
+Counts the backend doesn't report are estimated at ~4 characters per
+token. Caching, coalescing, concurrency limits and retries live in
+src/llm/client.py, not in the providers.
+"""
+
+from typing import Dict, Iterator, Optional
+
+from src.utils.context_packer import estimate_tokens
+
+# HTTP statuses worth retrying: rate limits and server-side failures
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Exception class names (any SDK) that mean a transient network / quota problem
+_RETRYABLE_NAMES = (
+    "Timeout", "Connection", "RateLimit", "ServiceUnavailable", "ResourceExhausted",
+    "DeadlineExceeded", "InternalServerError", "TooManyRequests",
+)
+
+
+class LLMError(RuntimeError):
+    """
+    An LLM call failed for good (non-retryable error, or retries used up).
+    """
+
+    def __init__(self, provider: str, model: str, attempts: int, cause: Optional[Exception], message: Optional[str] = None):
+        super().__init__(message or f"{provider} ({model}) failed after {attempts} attempt(s): {cause}")
+        self.provider = provider
+        self.model = model
+        self.attempts = attempts
+        self.cause = cause
+
+
+class LLMProvider:
+    """
+    Base class for LLM backends.
+
+    Subclasses set `name` and `model` and implement generate and stream.
+    SDK clients / model objects are built once per provider, not per call.
+    """
+
+    name: str = "base"
+    model: str = ""
+
+    def generate(self, prompt: str) -> Dict:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, usage: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Yield completion pieces; `usage` is filled with the token counts
+        once the stream is exhausted.
+        """
+        raise NotImplementedError
+
+    def is_retryable(self, exc: Exception) -> bool:
+        # OpenAI errors carry the HTTP status as `status_code`, google.api_core ones as `code`
+        status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        if isinstance(status, int):
+            return status in RETRYABLE_STATUS
+
+        if isinstance(exc, (TimeoutError, ConnectionError)):
+            return True
+        return any(part in type(exc).__name__ for part in _RETRYABLE_NAMES)
+
+    # ---------------------------------
+    # Helpers
+    # ---------------------------------
+    @staticmethod
+    def usage_of(prompt: str, text: str, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None) -> Dict:
+        return {
+            "prompt_tokens": int(prompt_tokens) if prompt_tokens else estimate_tokens(prompt),
+            "completion_tokens": int(completion_tokens) if completion_tokens else (estimate_tokens(text) if text else 0),
+        }
@@ -0,0 +1,382 @@
+"""
+client.py
+
+Front door to the MARS LLM backends.
+
+MARS_LLM_PROVIDER picks the backend: "gemini", "openai" or "stub". By
+default it is whichever of GEMINI_API_KEY / OPENAI_API_KEY is set; the
+local stub is only used when asked for (MARS_LLM_PROVIDER=stub), and
+with no key and no provider set, calls raise LLMError. MARS_LLM_MODEL
+overrides the backend's default model.
+complete() and stream_complete() wrap every call in:
+
+1. Response cache: a prompt seen before (same provider and model) is
+   answered from src/utils/llm_cache.py without calling the model
+2. Coalescing: identical prompts in flight at the same time share one
+   call; the others wait for its result
+3. Concurrency limit: at most MARS_LLM_MAX_CONCURRENCY calls in flight
+   across all queries and threads
+4. Retries: rate limits, 5xx and network errors are retried up to
+   MARS_LLM_MAX_RETRIES times with exponential backoff and full jitter
+   (a stream only until its first piece). A call that still fails
+   raises LLMError
+5. Metrics: each call records an "llm" span (provider, model, tokens,
+   attempts, cached, coalesced) and returns the same figures;
+   LLMClient.stats() has the process totals
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from src.llm.base import LLMError, LLMProvider
+from src.utils.llm_cache import LLMCache, LLM_CACHE_ENABLED, get_llm_cache, make_prompt_key
+from src.utils.tracing import span
+
+LLM_PROVIDER = os.environ.get("MARS_LLM_PROVIDER", "")
+LLM_MODEL = os.environ.get("MARS_LLM_MODEL", "")
+
+# Max LLM calls in flight across all queries
+LLM_MAX_CONCURRENCY = int(os.environ.get("MARS_LLM_MAX_CONCURRENCY", "4"))
+
+# Retries after the first attempt, and the backoff bounds (seconds)
+LLM_MAX_RETRIES = int(os.environ.get("MARS_LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.environ.get("MARS_LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("MARS_LLM_BACKOFF_MAX", "8"))
+
+
+def default_provider_name() -> str:
+    """
+    MARS_LLM_PROVIDER, else the provider whose API key is set. Raises
+    LLMError when neither is: the stub must be chosen explicitly.
+    """
+    if LLM_PROVIDER:
+        return LLM_PROVIDER.lower()
+    if os.environ.get("GEMINI_API_KEY"):
+        return "gemini"
+    if os.environ.get("OPENAI_API_KEY"):
+        return "openai"
+    raise LLMError(
+        "none", "", 0, None,
+        message="No LLM configured: set GEMINI_API_KEY or OPENAI_API_KEY "
+                "(or MARS_LLM_PROVIDER=stub for the offline stub LLM)."
+    )
+
+
+def make_provider(name: Optional[str] = None, model: Optional[str] = None) -> LLMProvider:
+    """
+    Builds the provider `name` (default: see default_provider_name).
+    """
+    name = (name or default_provider_name()).lower()
+    model = model or LLM_MODEL or None
+
+    if name == "gemini":
+        from src.llm.gemini_provider import GeminiProvider
+        return GeminiProvider(model=model)
+
+    if name == "openai":
+        from src.llm.openai_provider import OpenAIProvider
+        return OpenAIProvider(model=model)
+
+    if name == "stub":
+        from src.llm.stub_provider import StubProvider
+        return StubProvider(model=model)
+
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+class _InFlight:
+    """
+    One provider call that identical concurrent prompts wait on.
+    """
+
+    __slots__ = ("event", "response", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response: Optional[Dict] = None
+        self.error: Optional[Exception] = None
+
+
+class LLMClient:
+    """
+    Cached, coalesced, rate-limited and retried access to one provider.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        cache: Optional[LLMCache] = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _InFlight] = {}
+
+        self._stats = {
+            "calls": 0, "cache_hits": 0, "coalesced": 0, "provider_calls": 0, "retries": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "provider_seconds": 0.0,
+        }
+
+    # ---------------------------------
+    # Completion
+    # ---------------------------------
+    def complete(self, prompt: str) -> Dict:
+        """
+        {"text", "prompt_tokens", "completion_tokens", "latency_ms",
+        "attempts", "cached", "coalesced", "provider", "model"}
+        """
+        provider = self.provider
+        key = make_prompt_key(provider.name, provider.model, prompt)
+
+        with span("llm", provider=provider.name, model=provider.model) as llm_span:
+            t0 = time.perf_counter()
+            metrics = {"attempts": 0, "cached": False, "coalesced": False}
+
+            response = self.cache.get(key) if self.cache is not None else None
+            if response is not None:
+                metrics["cached"] = True
+            else:
+                call, leader = self._join(key)
+                if leader:
+                    try:
+                        response, metrics["attempts"] = self._with_retries(lambda: provider.generate(prompt))
+                        self._store(key, response, time.perf_counter() - t0)
+                        call.response = response
+                    except Exception as e:
+                        call.error = e
+                        raise
+                    finally:
+                        self._leave(key, call)
+                else:
+                    metrics["coalesced"] = True
+                    response = self._wait(call)
+
+            metrics.update(
+                prompt_tokens=response["prompt_tokens"],
+                completion_tokens=response["completion_tokens"],
+                latency_ms=round((time.perf_counter() - t0) * 1000, 3)
+            )
+            llm_span.set(**metrics)
+            self._record(metrics)
+
+        return {"text": response["text"], "provider": provider.name, "model": provider.model, **metrics}
+
+    def stream(self, prompt: str, metrics: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Yield the completion in pieces as the provider streams it. A cached
+        or coalesced completion comes as a single piece. `metrics` is
+        filled with the same figures complete() returns (plus
+        "first_token_ms") once the stream is exhausted.
+        """
+        provider = self.provider
+        key = make_prompt_key(provider.name, provider.model, prompt)
+        metrics = metrics if metrics is not None else {}
+        metrics.update(provider=provider.name, model=provider.model, attempts=0, cached=False, coalesced=False)
+
+        # The span covers the whole stream, including time spent by the consumer
+        with span("llm", provider=provider.name, model=provider.model, stream=True) as llm_span:
+            t0 = time.perf_counter()
+
+            response = self.cache.get(key) if self.cache is not None else None
+            if response is not None:
+                metrics["cached"] = True
+                metrics["first_token_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                yield response["text"]
+            else:
+                call, leader = self._join(key)
+                if leader:
+                    try:
+                        parts = []
+                        usage: Dict = {}
+                        for piece in self._stream_with_retries(prompt, usage, metrics):
+                            if not parts:
+                                metrics["first_token_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                            parts.append(piece)
+                            yield piece
+
+                        response = {"text": "".join(parts), **usage}
+                        self._store(key, response, time.perf_counter() - t0)
+                        call.response = response
+                    except BaseException as e:
+                        # Also covers a consumer that stops reading (GeneratorExit)
+                        call.error = e if isinstance(e, Exception) else RuntimeError("stream abandoned")
+                        raise
+                    finally:
+                        self._leave(key, call)
+                else:
+                    metrics["coalesced"] = True
+                    response = self._wait(call)
+                    metrics["first_token_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                    yield response["text"]
+
+            metrics.update(
+                prompt_tokens=response["prompt_tokens"],
+                completion_tokens=response["completion_tokens"],
+                latency_ms=round((time.perf_counter() - t0) * 1000, 3)
+            )
+            llm_span.set(**{k: v for k, v in metrics.items() if k not in ("provider", "model")})
+            self._record(metrics)
+
+    # ---------------------------------
+    # Coalescing
+    # ---------------------------------
+    def _join(self, key: str) -> Tuple[_InFlight, bool]:
+        """
+        The in-flight call for `key`, and whether the caller owns it.
+        """
+        with self._lock:
+            call = self._inflight.get(key)
+            if call is not None:
+                return call, False
+            call = self._inflight[key] = _InFlight()
+            return call, True
+
+    def _leave(self, key: str, call: _InFlight):
+        with self._lock:
+            self._inflight.pop(key, None)
+        call.event.set()
+
+    @staticmethod
+    def _wait(call: _InFlight) -> Dict:
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    def _store(self, key: str, response: Dict, latency: float):
+        if self.cache is not None and response["text"]:
+            self.cache.put(key, self.provider.model, response, latency)
+
+    # ---------------------------------
+    # Retries
+    # ---------------------------------
+    def _backoff(self, attempt: int, error: Exception) -> bool:
+        """
+        Sleep before retry `attempt` (1-based). False when `error` should
+        not be retried.
+        """
+        if attempt > self.max_retries or not self.provider.is_retryable(error):
+            return False
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        print(f"[↻] {self.provider.name} call failed ({error}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+        with self._lock:
+            self._stats["retries"] += 1
+        time.sleep(delay)
+        return True
+
+    def _with_retries(self, fn: Callable[[], Dict]) -> Tuple[Dict, int]:
+        attempt = 0
+        while True:
+            attempt += 1
+            t0 = time.perf_counter()
+            try:
+                with self._slots:
+                    response = fn()
+                self._count_provider_call(time.perf_counter() - t0)
+                return response, attempt
+            except Exception as e:
+                self._count_provider_call(time.perf_counter() - t0)
+                if not self._backoff(attempt, e):
+                    self._count_error()
+                    raise LLMError(self.provider.name, self.provider.model, attempt, e) from e
+
+    def _stream_with_retries(self, prompt: str, usage: Dict, metrics: Dict) -> Iterator[str]:
+        attempt = 0
+        while True:
+            attempt += 1
+            metrics["attempts"] = attempt
+            started = False
+            t0 = time.perf_counter()
+            try:
+                with self._slots:
+                    for piece in self.provider.stream(prompt, usage):
+                        started = True
+                        yield piece
+                self._count_provider_call(time.perf_counter() - t0)
+                return
+            except Exception as e:
+                self._count_provider_call(time.perf_counter() - t0)
+                # Pieces already handed out can't be taken back
+                if started or not self._backoff(attempt, e):
+                    self._count_error()
+                    raise LLMError(self.provider.name, self.provider.model, attempt, e) from e
+
+    # ---------------------------------
+    # Stats
+    # ---------------------------------
+    def _count_provider_call(self, seconds: float):
+        with self._lock:
+            self._stats["provider_calls"] += 1
+            self._stats["provider_seconds"] += seconds
+
+    def _count_error(self):
+        with self._lock:
+            self._stats["errors"] += 1
+
+    def _record(self, metrics: Dict):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["cache_hits"] += int(metrics["cached"])
+            self._stats["coalesced"] += int(metrics["coalesced"])
+            self._stats["prompt_tokens"] += metrics["prompt_tokens"]
+            self._stats["completion_tokens"] += metrics["completion_tokens"]
+
+    def stats(self) -> Dict:
+        """
+        Process totals: calls answered, how they were served, retries,
+        errors, tokens and time spent in the provider.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats["provider"] = self.provider.name
+        stats["model"] = self.provider.model
+        stats["cache_hit_rate"] = stats["cache_hits"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+_llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    global _llm_client
+
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                provider = make_provider()
+                _llm_client = LLMClient(provider, cache=get_llm_cache() if LLM_CACHE_ENABLED else None)
+
+    return _llm_client
+
+
+def complete(prompt: str) -> Dict:
+    """
+    Completion of `prompt` by the configured provider (see LLMClient.complete).
+    """
+    return get_llm_client().complete(prompt)
+
+
+def stream_complete(prompt: str, metrics: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Streamed completion of `prompt` by the configured provider (see LLMClient.stream).
+    """
+    return get_llm_client().stream(prompt, metrics=metrics)
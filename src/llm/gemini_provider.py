@@ -0,0 +1,50 @@
+"""
+gemini_provider.py
+
+Google Gemini backend for MARS.
+"""
+
+import os
+from typing import Dict, Iterator, Optional
+
+from src.llm.base import LLMProvider
+
+GEMINI_DEFAULT_MODEL = "models/gemini-pro-latest"
+
+
+class GeminiProvider(LLMProvider):
+    """
+    The GenerativeModel is built once per provider instead of per call.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.environ.get("GEMINI_API_KEY"))
+        self.model = model or GEMINI_DEFAULT_MODEL
+        self._model = genai.GenerativeModel(self.model)
+
+    @staticmethod
+    def _token_counts(response):
+        meta = getattr(response, "usage_metadata", None)
+        return getattr(meta, "prompt_token_count", None), getattr(meta, "candidates_token_count", None)
+
+    def generate(self, prompt: str) -> Dict:
+        response = self._model.generate_content(prompt)
+        text = response.text
+        return {"text": text, **self.usage_of(prompt, text, *self._token_counts(response))}
+
+    def stream(self, prompt: str, usage: Optional[Dict] = None) -> Iterator[str]:
+        response = self._model.generate_content(prompt, stream=True)
+
+        parts = []
+        for chunk in response:
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+
+        if usage is not None:
+            # Usage of a streamed response is complete once it's been iterated
+            usage.update(self.usage_of(prompt, "".join(parts), *self._token_counts(response)))
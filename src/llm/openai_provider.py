@@ -0,0 +1,68 @@
+"""
+openai_provider.py
+
+OpenAI chat completions backend for MARS.
+"""
+
+import os
+from typing import Dict, Iterator, Optional
+
+from src.llm.base import LLMProvider
+
+OPENAI_DEFAULT_MODEL = "gpt-4o-mini"
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    One OpenAI client per provider, shared by all calls and threads.
+    """
+
+    name = "openai"
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None, timeout: float = 60.0):
+        from openai import OpenAI
+
+        self.model = model or OPENAI_DEFAULT_MODEL
+        # Retries are done (with jitter) by the LLM client, not the SDK
+        self._client = OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"), timeout=timeout, max_retries=0)
+
+    def generate(self, prompt: str) -> Dict:
+        completion = self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        text = completion.choices[0].message.content or ""
+        usage = completion.usage
+        return {
+            "text": text,
+            **self.usage_of(
+                prompt, text,
+                getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None)
+            )
+        }
+
+    def stream(self, prompt: str, usage: Optional[Dict] = None) -> Iterator[str]:
+        stream = self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        parts = []
+        reported = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None) is not None:
+                reported = chunk.usage
+
+        if usage is not None:
+            usage.update(self.usage_of(
+                prompt, "".join(parts),
+                getattr(reported, "prompt_tokens", None),
+                getattr(reported, "completion_tokens", None)
+            ))
@@ -0,0 +1,68 @@
+"""
+stub_provider.py
+
+Local deterministic LLM backend: no network, no API key.
+
+The "completion" is the first sentence of each context segment of a RAG
+prompt (summary_agent.build_rag_prompt), cited with its source, so
+fact-checking and citations behave as with a real model. The same
+prompt always gives the same text. For offline runs, tests of the
+pipeline and benchmarks (MARS_LLM_STUB_LATENCY_MS simulates a model's
+response time).
+"""
+
+import os
+import re
+import time
+from typing import Dict, Iterator, Optional
+
+from src.llm.base import LLMProvider
+
+STUB_LATENCY_MS = float(os.environ.get("MARS_LLM_STUB_LATENCY_MS", "0"))
+
+NO_ANSWER = "I don't have enough information in memory to answer that."
+
+_SEGMENT_RE = re.compile(r"^Source: ([^\n]*)\n(.*?)(?=\n\n---|\Z)", re.MULTILINE | re.DOTALL)
+_FIRST_SENTENCE_RE = re.compile(r"^.*?[.!?](?=\s|$)", re.DOTALL)
+
+
+class StubProvider(LLMProvider):
+    """
+    Extractive "completion" of a RAG prompt; same prompt, same text.
+    """
+
+    name = "stub"
+
+    def __init__(self, model: Optional[str] = None, latency_ms: float = STUB_LATENCY_MS):
+        self.model = model or "stub"
+        self.latency = latency_ms / 1000
+
+    def complete_text(self, prompt: str) -> str:
+        context = prompt.split("CONTEXT:", 1)[-1]
+
+        lines = []
+        for source, text in _SEGMENT_RE.findall(context):
+            text = " ".join(text.split())
+            match = _FIRST_SENTENCE_RE.match(text)
+            first = (match.group(0) if match else text).rstrip(".!?")
+            if first:
+                lines.append(f"{first}. [Source: {source.strip()}]")
+
+        return "\n".join(lines) or NO_ANSWER
+
+    def generate(self, prompt: str) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        text = self.complete_text(prompt)
+        return {"text": text, **self.usage_of(prompt, text)}
+
+    def stream(self, prompt: str, usage: Optional[Dict] = None) -> Iterator[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        text = self.complete_text(prompt)
+
+        for line in text.splitlines(keepends=True):
+            yield line
+
+        if usage is not None:
+            usage.update(self.usage_of(prompt, text))
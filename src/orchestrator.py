@@ -5,90 +5,613 @@ The central controller that runs the full MARS pipeline:
 
 1. Research Agent    → Live search + fetch + chunk
 2. Embeddings        → Convert chunks into vectors
-3. Vector DB         → Upsert into Chroma
+3. Vector DB         → Upsert into Chroma or FAISS (MARS_VECTOR_STORE)
 4. Retrieval         → Query memory for relevant text
-5. Summary Agent     → RAG summary using LLM
+                       (checked first: research is skipped when memory
+                       already holds enough fresh, relevant chunks)
+5. Summary Agent     → RAG summary using LLM (Gemini, OpenAI or stub; src/llm)
 6. Fact-Check Agent  → Validate summary against context
 
 This makes it easy to call:
     answer = answer_query("What is AI doing in healthcare?")
+
+to answer many questions concurrently:
+    answers = answer_queries(["...", "..."])        (or await answer_queries_async)
+
+or, to receive the summary as it is generated:
+    for event in answer_query_stream("What is AI doing in healthcare?"):
+        ...
 """
 
-from typing import Dict
-from src.agents.research_live import research_pipeline
+import os
+import math
+import queue
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.agents.research_live import search_web_cached, iter_pages
 from src.utils.embeddings import embed_text
-from src.db.chroma_store import upsert_chunk, query_memory
-from src.agents.summary_agent import generate_summary, format_context
-from src.agents.factcheck_agent import fact_check, annotate_summary
+from src.db.store import upsert_chunks, existing_chunk_ids, refresh_chunks, make_chunk_id, distance_to_similarity
+from src.agents.summary_agent import generate_summary, stream_summary, prepare_context, use_retrieved, retrieve_diverse
+from src.pipeline_context import PipelineContext
+from src.agents.factcheck_agent import fact_check, fact_check_semantic, annotate_summary, FACTCHECK_MODE
+from src.utils.tracing import start_trace, span, bind, isolate
+from src.utils.answer_cache import get_answer_cache, ANSWER_CACHE_ENABLED
+
+
+# Number of chunks embedded per model.encode call (and written per upsert)
+EMBED_BATCH_SIZE = int(os.environ.get("MARS_EMBED_BATCH_SIZE", "64"))
+
+# Max chunks buffered between the fetch/chunk stage and the embed/upsert stage
+INGEST_QUEUE_SIZE = int(os.environ.get("MARS_INGEST_QUEUE_SIZE", "256"))
+
+# Check memory before researching; skip or shrink research when it already covers the query
+COVERAGE_CHECK = os.environ.get("MARS_COVERAGE_CHECK", "1") != "0"
+
+# A retrieved chunk counts towards coverage above this cosine similarity...
+COVERAGE_SIMILARITY = float(os.environ.get("MARS_COVERAGE_SIMILARITY", "0.55"))
+
+# ...and when stored within the freshness window (seconds)
+FRESHNESS_WINDOW = float(os.environ.get("MARS_FRESHNESS_WINDOW", str(24 * 3600)))
+
+# Covered chunks needed to skip research entirely (capped at top_k)
+COVERAGE_MIN_HITS = int(os.environ.get("MARS_COVERAGE_MIN_HITS", "3"))
+
+# Max queries answered at once by answer_query_async / answer_queries
+QUERY_MAX_CONCURRENCY = int(os.environ.get("MARS_QUERY_MAX_CONCURRENCY", "4"))
+
+# How long an ingest waits for a concurrent ingest that owns a shared page (seconds)
+PAGE_CLAIM_TIMEOUT = float(os.environ.get("MARS_PAGE_CLAIM_TIMEOUT", "120"))
+
+_END = object()
 
 
 # -------------------------------------------------------------
 # 1. INGEST PIPELINE
 # -------------------------------------------------------------
 
-def ingest_query(query: str, pages: int = 3):
+class _PageClaims:
+    """
+    Pages being ingested right now, per memory namespace. A page that a
+    concurrent ingest (another query in the batch, another session)
+    already owns is neither fetched nor embedded again: the later ingest
+    waits for the owner to finish writing it instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owners: Dict[Tuple[str, str], threading.Event] = {}
+
+    def claim(self, user: str, urls: List[str]) -> Tuple[List[str], List[threading.Event]]:
+        owned = []
+        waits = []
+
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                event = self._owners.get((user, url))
+                if event is None:
+                    self._owners[(user, url)] = threading.Event()
+                    owned.append(url)
+                else:
+                    waits.append(event)
+
+        return owned, waits
+
+    def release(self, user: str, urls: List[str]):
+        with self._lock:
+            for url in urls:
+                event = self._owners.pop((user, url), None)
+                if event is not None:
+                    event.set()
+
+
+_page_claims = _PageClaims()
+
+
+def _produce_chunks(urls: List[str], user: str, out: "queue.Queue", stop: threading.Event, counters: Dict):
+    """
+    Fetch/chunk stage: pushes (id, text, source) for each chunk not yet
+    seen in this run. Blocks when the queue is full (backpressure) and
+    gives up once `stop` is set by the consumer.
+    """
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    seen = set()
+
+    try:
+        for page in iter_pages(urls):
+            for chunk in page["chunks"]:
+                counters["chunks"] += 1
+                doc_id = make_chunk_id(chunk, page["source"], user)
+                if doc_id in seen:
+                    counters["duplicates"] += 1
+                    continue
+                seen.add(doc_id)
+                if not _put((doc_id, chunk, page["source"])):
+                    return
+    except Exception as e:
+        _put(e)
+    finally:
+        _put(_END)
+
+
+def _store_batch(batch: List, batch_size: int, user: str, counters: Dict):
+    """
+    Embed/upsert stage for one micro-batch: chunks already in memory are
+    not re-embedded, only marked fresh again (check_coverage filters on
+    write time); the rest are embedded in one model call and written in
+    one upsert.
     """
-    Runs:
-    - Live search
-    - Fetching content
-    - Chunking
-    - Embedding
-    - Upserting into Chroma DB
+    ids = [doc_id for doc_id, _, _ in batch]
+    stored = existing_chunk_ids(ids)
+    new_rows = [row for row in batch if row[0] not in stored]
+
+    counters["already_stored"] += len(stored)
+    counters["embedded"] += len(new_rows)
+
+    if stored:
+        refresh_chunks(list(stored))
+
+    if not new_rows:
+        return
+
+    texts = [text for _, text, _ in new_rows]
+    embeddings = embed_text(texts, batch_size=batch_size)
+    upsert_chunks(
+        texts,
+        embeddings,
+        [source for _, _, source in new_rows],
+        user=user,
+        ids=[doc_id for doc_id, _, _ in new_rows]
+    )
+
+
+def ingest_query(
+    query: str,
+    pages: int = 3,
+    batch_size: int = EMBED_BATCH_SIZE,
+    user: str = "default",
+    search_pages: Optional[int] = None
+) -> Dict:
+    """
+    Runs as two overlapped stages connected by a bounded queue:
+
+    - Live search, fetching (as pages complete), chunking, in-run dedup
+      (pages being ingested concurrently by another query are skipped
+      and waited for)
+    - Dedup against memory (content-addressed chunk ids), embedding and
+      upserting into Chroma DB, one model call + one write per micro-batch
+
+    Chunks from the first page to arrive are embedded and written while
+    later pages are still downloading.
+
+    `search_pages` results are requested from the search API (default
+    `pages`) and the first `pages` of them are researched, so a shrunken
+    ingest reuses the cached search of the full page count.
+
+    Returns ingest counters:
+    {
+        "chunks": chunks produced by research,
+        "duplicates": repeats within this run,
+        "already_stored": chunks found in memory (not re-embedded),
+        "embedded": new chunks embedded and written,
+        "shared_pages": pages left to a concurrent ingest,
+        "dedup_ratio": fraction of chunks skipped
+    }
     """
     print(f"\n[🔍] Researching online for: {query}\n")
 
-    results = research_pipeline(query, max_pages=pages)
+    with span("ingest", pages=pages) as ingest_span:
+        stats = _ingest(query, pages, search_pages or pages, batch_size, user)
+        ingest_span.set(chunks=stats["chunks"], embedded=stats["embedded"])
+
+    shared = f", {stats['shared_pages']} page(s) ingested by a concurrent query" if stats["shared_pages"] else ""
+    print(
+        f"[📥] Ingestion complete! {stats['embedded']} new / {stats['chunks']} chunks "
+        f"(dedup {stats['dedup_ratio']:.0%}: {stats['duplicates']} repeated, "
+        f"{stats['already_stored']} already in memory{shared})\n"
+    )
+
+    return stats
+
+
+def _ingest(query: str, pages: int, search_pages: int, batch_size: int, user: str) -> Dict:
+    urls = search_web_cached(query, num_results=max(pages, search_pages))[:pages]
+    owned, waits = _page_claims.claim(user, urls)
+
+    try:
+        stats = _ingest_pages(owned, batch_size, user)
+    finally:
+        _page_claims.release(user, owned)
+
+    # Shared pages: returned once their owner has stored them
+    for event in waits:
+        event.wait(timeout=PAGE_CLAIM_TIMEOUT)
+
+    stats["shared_pages"] = len(waits)
+    return stats
+
+
+def _ingest_pages(urls: List[str], batch_size: int, user: str) -> Dict:
+    counters = {"chunks": 0, "duplicates": 0, "already_stored": 0, "embedded": 0}
+    chunks_q: "queue.Queue" = queue.Queue(maxsize=max(INGEST_QUEUE_SIZE, batch_size))
+    stop = threading.Event()
+
+    producer = threading.Thread(
+        target=bind(_produce_chunks),
+        args=(urls, user, chunks_q, stop, counters),
+        name="mars-ingest-producer",
+        daemon=True
+    )
+    producer.start()
+
+    error = None
+    done = False
+
+    try:
+        while not done:
+            # Block for the first item, then take whatever else is ready
+            batch = []
+            item = chunks_q.get()
 
-    for item in results:
-        source = item["source"]
-        chunks = item["chunks"]
+            while True:
+                if item is _END:
+                    done = True
+                    break
+                if isinstance(item, Exception):
+                    error = item
+                else:
+                    batch.append(item)
 
-        for chunk in chunks:
-            emb = embed_text(chunk)[0]
-            upsert_chunk(chunk, emb, source)
+                if len(batch) >= batch_size:
+                    break
+                try:
+                    item = chunks_q.get_nowait()
+                except queue.Empty:
+                    break
 
-    print("[📥] Ingestion complete!\n")
+            # Chunks that arrived before a producer error are still stored
+            if batch:
+                _store_batch(batch, batch_size, user, counters)
+    finally:
+        stop.set()
+        producer.join()
+
+    if error is not None:
+        raise error
+
+    total = counters["chunks"]
+    stats = dict(counters)
+    stats["dedup_ratio"] = (total - stats["embedded"]) / total if total else 0.0
+    return stats
 
 
 # -------------------------------------------------------------
-# 2. ANSWER PIPELINE (RAG + FACT CHECK)
+# 2. COVERAGE CHECK (ANSWER FROM MEMORY WHEN IT IS FRESH)
 # -------------------------------------------------------------
 
-def answer_query(query: str, top_k: int = 5) -> Dict:
+def check_coverage(ctx: PipelineContext, pages: int) -> int:
     """
-    High-level function to:
-    - Ingest live data
-    - Generate RAG-based summary
-    - Fact-check the summary
+    Retrieve before researching. Counts the top_k chunks (after MMR, so
+    near-duplicates count once) that are both similar to the query and
+    stored within FRESHNESS_WINDOW (the freshness filter runs inside the
+    vector store query).
+
+    - enough covered chunks → research is skipped and `ctx` is filled
+      from this retrieval, so nothing is retrieved twice
+    - some → fewer pages are researched
+    - none → the full `pages`
+
+    Returns the number of pages to research; records the decision in
+    ctx.coverage.
+    """
+    min_hits = max(1, min(COVERAGE_MIN_HITS, ctx.top_k))
+
+    with span("coverage") as coverage_span:
+        query_embedding = embed_text(ctx.query)[0]
+        retrieved = retrieve_diverse(
+            ctx.query,
+            query_embedding,
+            top_k=ctx.top_k,
+            user=ctx.user,
+            min_created_at=time.time() - FRESHNESS_WINDOW
+        )
+
+        distances = (retrieved.get("distances") or [[]])[0]
+        covered = sum(distance_to_similarity(d) >= COVERAGE_SIMILARITY for d in distances)
+
+        if covered >= min_hits:
+            research_pages = 0
+        else:
+            research_pages = max(1, math.ceil(pages * (1 - covered / min_hits)))
+
+        coverage_span.set(covered=covered, pages=research_pages)
+
+    ctx.coverage = {"covered": covered, "needed": min_hits, "pages": research_pages}
+
+    if research_pages == 0:
+        use_retrieved(ctx, query_embedding, retrieved)
+        print(f"[🧠] Memory already covers this query ({covered}/{ctx.top_k} fresh matches); skipping research.")
+    elif research_pages < pages:
+        print(f"[🧠] Memory partly covers this query ({covered}/{ctx.top_k} fresh matches); researching {research_pages} page(s).")
+
+    return research_pages
+
+
+def _research(ctx: PipelineContext, pages: int):
     """
+    Coverage check, then ingest as many pages as it calls for.
+    """
+    research_pages = check_coverage(ctx, pages) if COVERAGE_CHECK else pages
 
-    # Step 1 → Ingest and update memory
-    ingest_query(query)
+    if research_pages > 0:
+        # Search (and cache) at the full page count; research the top hits
+        ingest_query(ctx.query, pages=research_pages, user=ctx.user, search_pages=pages)
 
-    # Step 2 → Generate summary
-    summary = generate_summary(query, top_k=top_k)
 
-    # Step 3 → Retrieve context again for fact-checking
-    q_emb = embed_text(query)[0]
-    retrieved = query_memory(q_emb, top_k=top_k)
-    context_text = format_context(retrieved)
+# -------------------------------------------------------------
+# 3. ANSWER PIPELINE (RAG + FACT CHECK)
+# -------------------------------------------------------------
 
-    # Step 4 → Fact-check
-    fc_results = fact_check(summary, context_text)
+def _finalize(ctx: PipelineContext) -> Dict:
+    """
+    Fact-check ctx.summary against the retrieved context and build the
+    answer_query result.
+    """
 
-    # Step 5 → Annotate summary
-    final_output = annotate_summary(summary, fc_results)
+    # Fact-check against the same chunks the summary used
+    if FACTCHECK_MODE == "semantic":
+        fc_results = fact_check_semantic(ctx.summary, ctx.retrieved)
+    else:
+        fc_results = fact_check(ctx.summary, ctx.context_text)
+
+    # Annotate summary
+    final_output = annotate_summary(ctx.summary, fc_results)
 
     return {
-        "query": query,
-        "summary": summary,
+        "query": ctx.query,
+        "summary": ctx.summary,
         "fact_check": fc_results,
-        "final_output": final_output
+        "final_output": final_output,
+        "sources": ctx.sources,
+        "prompt": ctx.prompt,
+        "coverage": ctx.coverage,
+        "packing": ctx.packing,
+        "llm": ctx.llm
     }
 
 
+def _cached_answer(ctx: PipelineContext, pages: int) -> Tuple[Optional[Dict], List[float]]:
+    """
+    Look the query up in the semantic answer cache. Returns the cached
+    result (or None) and the query embedding used for the lookup.
+    """
+    with span("answer_cache") as cache_span:
+        query_embedding = embed_text(ctx.query)[0]
+        cached = get_answer_cache().get(ctx.query, query_embedding, user=ctx.user, top_k=ctx.top_k, pages=pages)
+        cache_span.set(hit=cached is not None)
+
+    if cached is not None:
+        cached["query"] = ctx.query
+        print(f"[⚡] Answer served from cache (similar to: {cached['cache']['query']})")
+
+    return cached, query_embedding
+
+
+def answer_query(
+    query: str,
+    top_k: int = 5,
+    user: str = "default",
+    use_cache: bool = ANSWER_CACHE_ENABLED,
+    pages: int = 3
+) -> Dict:
+    """
+    High-level function to:
+    - Serve repeated / reworded questions from the answer cache
+    - Ingest live data (skipped or shrunk when memory already holds
+      fresh, relevant chunks)
+    - Retrieve context once (shared by summary and fact-check)
+    - Generate RAG-based summary
+    - Fact-check the summary
+
+    The result carries per-stage "timings" (see src.utils.tracing), and
+    a "cache" entry when it was served from the answer cache.
+    """
+
+    ctx = PipelineContext(query=query, top_k=top_k, user=user)
+    cached = None
+
+    with start_trace("answer_query", query=query) as trace:
+        if use_cache:
+            cached, query_embedding = _cached_answer(ctx, pages)
+
+        if cached is None:
+            # Step 1 → Check memory coverage, ingest and update memory
+            _research(ctx, pages)
+
+            # Step 2 → Embed query + retrieve context (no-op if the coverage check did)
+            prepare_context(ctx)
+
+            # Step 3 → Generate summary
+            ctx.summary = generate_summary(query, top_k=top_k, ctx=ctx)
+
+            # Step 4/5 → Fact-check + annotate
+            result = _finalize(ctx)
+
+    if cached is not None:
+        result = cached
+    elif use_cache:
+        get_answer_cache().put(query, query_embedding, result, trace.total_s, user=ctx.user, top_k=top_k, pages=pages)
+
+    result["timings"] = trace.summary()
+    return result
+
+
+def answer_query_stream(
+    query: str,
+    top_k: int = 5,
+    user: str = "default",
+    use_cache: bool = ANSWER_CACHE_ENABLED,
+    pages: int = 3
+) -> Iterator[Dict]:
+    """
+    Streaming variant of answer_query. Yields events:
+
+    {"type": "status", "stage": "cache" | "research" | "retrieve" | "generate"}
+    {"type": "token", "text": "..."}      (summary pieces as they arrive)
+    {"type": "result", "result": {...}}   (same dict as answer_query, last)
+
+    Fact-checking runs once the stream completes. A cached answer is
+    sent as a single token event. The stream's trace is only active
+    while the stream itself runs, not in the consumer between events.
+    """
+    return isolate(_answer_query_stream(query, top_k, user, use_cache, pages))
+
+
+def _answer_query_stream(query: str, top_k: int, user: str, use_cache: bool, pages: int) -> Iterator[Dict]:
+    ctx = PipelineContext(query=query, top_k=top_k, user=user)
+    cached = None
+
+    with start_trace("answer_query_stream", query=query) as trace:
+        if use_cache:
+            yield {"type": "status", "stage": "cache"}
+            cached, query_embedding = _cached_answer(ctx, pages)
+
+        if cached is None:
+            yield {"type": "status", "stage": "research"}
+            _research(ctx, pages)
+
+            yield {"type": "status", "stage": "retrieve"}
+            prepare_context(ctx)
+
+            yield {"type": "status", "stage": "generate"}
+            parts = []
+            for text in stream_summary(query, top_k=top_k, ctx=ctx):
+                parts.append(text)
+                yield {"type": "token", "text": text}
+
+            ctx.summary = "".join(parts)
+
+            result = _finalize(ctx)
+
+    if cached is not None:
+        result = cached
+        yield {"type": "token", "text": result.get("summary", "")}
+    elif use_cache:
+        get_answer_cache().put(query, query_embedding, result, trace.total_s, user=ctx.user, top_k=top_k, pages=pages)
+
+    result["timings"] = trace.summary()
+    yield {"type": "result", "result": result}
+
+
+# -------------------------------------------------------------
+# 4. ASYNC + BATCH API
+# -------------------------------------------------------------
+
+_query_pool: Optional[ThreadPoolExecutor] = None
+_query_pool_lock = threading.Lock()
+
+
+def _get_query_pool() -> ThreadPoolExecutor:
+    global _query_pool
+
+    if _query_pool is None:
+        with _query_pool_lock:
+            if _query_pool is None:
+                _query_pool = ThreadPoolExecutor(
+                    max_workers=max(1, QUERY_MAX_CONCURRENCY),
+                    thread_name_prefix="mars-query"
+                )
+
+    return _query_pool
+
+
+async def answer_query_async(
+    query: str,
+    top_k: int = 5,
+    user: str = "default",
+    use_cache: bool = ANSWER_CACHE_ENABLED,
+    pages: int = 3
+) -> Dict:
+    """
+    answer_query for asyncio callers (concurrent sessions, batch jobs).
+
+    Queries run on a shared pool of MARS_QUERY_MAX_CONCURRENCY workers,
+    so concurrent calls overlap their search, fetch and LLM waits while
+    the process-wide limits hold: search (MARS_SEARCH_MAX_CONCURRENCY),
+    fetch (MARS_FETCH_GLOBAL_MAX, per-host limits) and LLM
+    (MARS_LLM_MAX_CONCURRENCY). A page shared by concurrent queries is
+    fetched and embedded once.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_query_pool(),
+        functools.partial(answer_query, query, top_k=top_k, user=user, use_cache=use_cache, pages=pages)
+    )
+
+
+async def answer_queries_async(
+    queries: List[str],
+    top_k: int = 5,
+    user: str = "default",
+    use_cache: bool = ANSWER_CACHE_ENABLED,
+    pages: int = 3
+) -> List[Dict]:
+    """
+    Answers `queries` concurrently. Returns one result per query, in
+    order; a failed query yields {"query", "error"} instead of raising.
+    """
+    results = await asyncio.gather(
+        *(answer_query_async(q, top_k=top_k, user=user, use_cache=use_cache, pages=pages) for q in queries),
+        return_exceptions=True
+    )
+
+    return [_batch_result(query, result) for query, result in zip(queries, results)]
+
+
+def _batch_result(query: str, result) -> Dict:
+    if isinstance(result, Exception):
+        print(f"Error answering '{query}': {result}")
+        return {"query": query, "error": str(result)}
+    return result
+
+
+def answer_queries(
+    queries: List[str],
+    top_k: int = 5,
+    user: str = "default",
+    use_cache: bool = ANSWER_CACHE_ENABLED,
+    pages: int = 3
+) -> List[Dict]:
+    """
+    Batch entry point (nightly reports, evaluation sets): the synchronous
+    counterpart of answer_queries_async, with the same results.
+
+    Queries go straight to the shared query pool rather than through
+    asyncio.run, so this also works where an event loop is already
+    running (Jupyter / Kaggle notebooks).
+    """
+    pool = _get_query_pool()
+    futures = [
+        pool.submit(answer_query, q, top_k=top_k, user=user, use_cache=use_cache, pages=pages)
+        for q in queries
+    ]
+
+    return [_batch_result(query, future.exception() or future.result()) for query, future in zip(queries, futures)]
+
+
 # -------------------------------------------------------------
-# 3. CLI FRIENDLY ENTRY POINT
+# 5. CLI FRIENDLY ENTRY POINT
 # -------------------------------------------------------------
 
 if __name__ == "__main__":
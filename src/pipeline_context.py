@@ -0,0 +1,53 @@
+"""
+pipeline_context.py
+
+State shared by the stages of one answer_query run.
+
+The query is embedded and memory is retrieved once; the summary and
+fact-check stages both read the same retrieved chunks from here instead
+of recomputing them.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class PipelineContext:
+    query: str
+    top_k: int = 5
+    user: str = "default"
+
+    # Filled by retrieval
+    query_embedding: Optional[List[float]] = None
+    retrieved: Dict = field(default_factory=dict)
+    context_text: str = ""
+    prompt: str = ""
+
+    # Token counts of the packed context (see context_packer.pack_context)
+    packing: Dict = field(default_factory=dict)
+
+    # Filled by the coverage check (see orchestrator.check_coverage)
+    coverage: Dict = field(default_factory=dict)
+
+    # Filled by the summary stage (llm: provider, model, tokens, latency; see src/llm/client.py)
+    summary: str = ""
+    llm: Dict = field(default_factory=dict)
+
+    @property
+    def is_retrieved(self) -> bool:
+        return self.query_embedding is not None
+
+    @property
+    def sources(self) -> List[str]:
+        """
+        Unique sources of the retrieved chunks, in rank order.
+        """
+        metadatas = (self.retrieved.get("metadatas") or [[]])[0]
+
+        seen = []
+        for meta in metadatas:
+            src = (meta or {}).get("source")
+            if src and src not in seen:
+                seen.append(src)
+        return seen
@@ -0,0 +1,213 @@
+"""
+answer_cache.py
+
+Semantic cache of answer_query results.
+
+- Keyed by the query embedding: a new question is served from the cache
+  when a stored one of the same user (and top_k / pages) is within a
+  cosine similarity threshold and younger than the TTL
+- Both questions must also name the same numbers, since embeddings
+  barely separate "AI funding in 2024" from "AI funding in 2025"
+- Scoped per user, so one user's answers are never served to another
+- Least-recently-used entries are evicted once the entry cap is reached
+- Survives process restarts (SQLite on disk); each user's vectors are
+  held in memory as one normalized matrix, so a lookup is one
+  matrix-vector product
+"""
+
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.sqlite_cache import SqliteTTLCache, cache_singleton
+
+ANSWER_CACHE_ENABLED = os.environ.get("MARS_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_DIR = os.environ.get("MARS_CACHE_DIR", "./.mars_cache")
+ANSWER_CACHE_TTL = float(os.environ.get("MARS_ANSWER_CACHE_TTL", str(6 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("MARS_ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+# Minimum cosine similarity between two queries for them to share an answer
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("MARS_ANSWER_CACHE_THRESHOLD", "0.95"))
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def query_numbers(query: str) -> str:
+    """
+    The numbers a query names (years, versions, amounts) as one
+    comparable string: "GPT-4 news in 2024" → "2024 4".
+    """
+    return " ".join(sorted({n.replace(",", "") for n in _NUMBER_RE.findall(query)}))
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+
+class AnswerCache(SqliteTTLCache):
+    """
+    SQLite-backed (user, top_k, pages, query embedding) → answer cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        threshold: float = ANSWER_CACHE_THRESHOLD
+    ):
+        if path is None:
+            os.makedirs(ANSWER_CACHE_DIR, exist_ok=True)
+            path = os.path.join(ANSWER_CACHE_DIR, "answers.sqlite3")
+
+        super().__init__(
+            path,
+            table="answers",
+            key_schema="id INTEGER PRIMARY KEY AUTOINCREMENT",
+            value_schema=(
+                "user TEXT NOT NULL",
+                "top_k INTEGER NOT NULL",
+                "pages INTEGER NOT NULL",
+                "query TEXT NOT NULL",
+                "numbers TEXT NOT NULL",
+                "embedding BLOB NOT NULL",
+                "result TEXT NOT NULL",
+                "latency REAL NOT NULL"
+            ),
+            ttl=ttl,
+            max_entries=max_entries,
+            indexes=("user, top_k, pages",)
+        )
+        self.threshold = threshold
+
+        # (user, top_k, pages) → (row ids, created_at, numbers, normalized embedding matrix)
+        self._matrices: Dict[Tuple[str, int, int], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    # ---------------------------------
+    # In-memory vectors per scope
+    # ---------------------------------
+    def _matrix_locked(self, scope: Tuple[str, int, int]):
+        cached = self._matrices.get(scope)
+        if cached is not None:
+            return cached
+
+        rows = self._conn.execute(
+            "SELECT id, created_at, numbers, embedding FROM answers WHERE user = ? AND top_k = ? AND pages = ?",
+            scope
+        ).fetchall()
+
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        created = np.array([row[1] for row in rows], dtype=np.float64)
+        numbers = np.array([row[2] for row in rows], dtype=object)
+        matrix = (np.stack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+                  if rows else np.zeros((0, 0), dtype=np.float32))
+
+        self._matrices[scope] = (ids, created, numbers, matrix)
+        return self._matrices[scope]
+
+    # ---------------------------------
+    # Lookup / insert
+    # ---------------------------------
+    def get(
+        self,
+        query: str,
+        query_embedding: List[float],
+        user: str = "default",
+        top_k: int = 5,
+        pages: int = 3
+    ) -> Optional[Dict]:
+        """
+        Returns the cached result of the most similar fresh query naming the
+        same numbers, with a "cache" entry ({"query", "similarity", "age_s"}),
+        or None.
+        """
+        query_vec = _unit(query_embedding)
+        now = time.time()
+
+        with self._lock:
+            ids, created, numbers, matrix = self._matrix_locked((user, top_k, pages))
+
+            if not len(ids) or matrix.shape[1] != query_vec.shape[0]:
+                self._stats["misses"] += 1
+                return None
+
+            similarity = matrix @ query_vec
+            expired = now - created >= self.ttl
+            matched_expired = bool((similarity[expired] >= self.threshold).any())
+
+            similarity[expired] = -1.0
+            similarity[numbers != query_numbers(query)] = -1.0
+            best = int(similarity.argmax())
+
+            if similarity[best] < self.threshold:
+                self._stats["misses"] += 1
+                self._stats["expired"] += int(matched_expired)
+                return None
+
+            row_id = int(ids[best])
+            query, result, latency, created_at = self._conn.execute(
+                "SELECT query, result, latency, created_at FROM answers WHERE id = ?", (row_id,)
+            ).fetchone()
+            self._touch_locked(row_id, now)
+
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += latency
+
+        result = json.loads(result)
+        result["cache"] = {
+            "query": query,
+            "similarity": float(similarity[best]),
+            "age_s": now - created_at
+        }
+        return result
+
+    def put(
+        self,
+        query: str,
+        query_embedding: List[float],
+        result: Dict,
+        latency: float,
+        user: str = "default",
+        top_k: int = 5,
+        pages: int = 3
+    ):
+        payload = json.dumps({k: v for k, v in result.items() if k not in ("timings", "cache")}, default=str)
+
+        with self._lock:
+            self._insert_locked(
+                {
+                    "user": user,
+                    "top_k": top_k,
+                    "pages": pages,
+                    "query": query,
+                    "numbers": query_numbers(query),
+                    "embedding": _unit(query_embedding).tobytes(),
+                    "result": payload,
+                    "latency": latency
+                },
+                time.time()
+            )
+            self._matrices.pop((user, top_k, pages), None)
+
+    def _invalidate_locked(self):
+        self._matrices.clear()
+
+    def clear(self, user: Optional[str] = None):
+        if user is None:
+            return super().clear()
+
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE user = ?", (user,))
+            self._conn.commit()
+            self._invalidate_locked()
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+get_answer_cache = cache_singleton(AnswerCache)
@@ -0,0 +1,178 @@
+"""
+chunking.py
+
+Sentence-aware, token-budgeted chunker for page text.
+
+- Chunks end on sentence boundaries (or paragraph breaks)
+- Chunk size is measured with the embedding model's own tokenizer, so a
+  chunk never exceeds the model's input window and nothing is silently
+  truncated during embedding
+- Consecutive chunks share up to `overlap` tokens of trailing sentences
+- Works as a generator over the text: chunks are produced as the text is
+  scanned, without materializing every chunk first
+"""
+
+import copy
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional
+
+# Budget per chunk in model tokens (default: the embedding model's window)
+CHUNK_MAX_TOKENS = int(os.environ.get("MARS_CHUNK_MAX_TOKENS", "0")) or None
+
+# Tokens of trailing context repeated at the start of the next chunk
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("MARS_CHUNK_OVERLAP_TOKENS", "32"))
+
+# Sentence end: terminal punctuation followed by whitespace, or a line break
+_SENTENCE_RE = re.compile(r"[^\n]+?(?:[.!?]+[\"')\]]*(?=\s)|$)", re.MULTILINE)
+
+TokenCounter = Callable[[str], int]
+
+
+# -------------------------------------
+# Token counting
+# -------------------------------------
+@lru_cache(maxsize=4)
+def model_token_counter(model_name: Optional[str] = None) -> TokenCounter:
+    """
+    Counts tokens with the embedding model's tokenizer (no special tokens).
+
+    Uses a private copy: a fast tokenizer keeps its padding/truncation
+    settings on the shared backend, so counting from fetch workers while
+    the model encodes on another thread would switch padding off mid-batch.
+    """
+    from src.utils.embeddings import load_embedding_model, EMBEDDING_MODEL_NAME
+
+    tokenizer = copy.deepcopy(load_embedding_model(model_name or EMBEDDING_MODEL_NAME).tokenizer)
+
+    def count(text: str) -> int:
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    return count
+
+
+def model_max_tokens(model_name: Optional[str] = None) -> int:
+    """
+    Usable tokens per input for the embedding model ([CLS]/[SEP] excluded).
+    """
+    from src.utils.embeddings import load_embedding_model, EMBEDDING_MODEL_NAME
+
+    model = load_embedding_model(model_name or EMBEDDING_MODEL_NAME)
+    return max(16, model.max_seq_length - 2)
+
+
+# -------------------------------------
+# Sentence splitting
+# -------------------------------------
+def iter_sentences(text: str) -> Iterator[str]:
+    prefix = ""
+
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group(0).strip()
+        if not sentence:
+            continue
+
+        # "Dr." / "U.S." style abbreviations: glue onto the next sentence
+        if len(sentence) <= 4 and " " not in sentence and sentence.endswith("."):
+            prefix = f"{prefix}{sentence} "
+            continue
+
+        yield prefix + sentence
+        prefix = ""
+
+    if prefix:
+        yield prefix.strip()
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: TokenCounter) -> Iterator[str]:
+    """
+    Break a single over-budget sentence on word boundaries.
+    """
+    words: List[str] = []
+    used = 0
+
+    for word in sentence.split():
+        n = count_tokens(" " + word) if words else count_tokens(word)
+        if words and used + n > max_tokens:
+            yield " ".join(words)
+            words, used = [], 0
+            n = count_tokens(word)
+        words.append(word)
+        used += n
+
+    if words:
+        yield " ".join(words)
+
+
+# -------------------------------------
+# Chunking
+# -------------------------------------
+def iter_chunks(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Optional[TokenCounter] = None
+) -> Iterator[str]:
+    """
+    Yield sentence-aligned chunks of at most `max_tokens` tokens.
+
+    Args:
+        text (str): page text
+        max_tokens (int): token budget per chunk (default: model window)
+        overlap (int): max tokens of trailing sentences carried into the next chunk
+        count_tokens (callable): token counter (default: model tokenizer)
+    """
+    if count_tokens is None:
+        count_tokens = model_token_counter()
+    if max_tokens is None:
+        max_tokens = CHUNK_MAX_TOKENS or model_max_tokens()
+
+    overlap = max(0, min(overlap, max_tokens // 2))
+
+    current: List[str] = []
+    sizes: List[int] = []
+    used = 0
+    fresh = False  # current holds sentences not yet emitted
+
+    for sentence in iter_sentences(text):
+        n = count_tokens(sentence)
+        pieces = [(sentence, n)] if n <= max_tokens else [
+            (piece, count_tokens(piece)) for piece in _split_long(sentence, max_tokens, count_tokens)
+        ]
+
+        for piece, n in pieces:
+            if current and used + n > max_tokens:
+                if fresh:
+                    yield " ".join(current)
+
+                # Carry trailing sentences that fit in the overlap budget
+                keep = 0
+                carried = 0
+                for size in reversed(sizes):
+                    if carried + size > overlap or carried + size + n > max_tokens:
+                        break
+                    carried += size
+                    keep += 1
+
+                current = current[len(current) - keep:] if keep else []
+                sizes = sizes[len(sizes) - keep:] if keep else []
+                used = carried
+                fresh = False
+
+            current.append(piece)
+            sizes.append(n)
+            used += n
+            fresh = True
+
+    if current and fresh:
+        yield " ".join(current)
+
+
+def chunk_sentences(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[str]:
+    return list(iter_chunks(text, max_tokens=max_tokens, overlap=overlap, count_tokens=count_tokens))
@@ -0,0 +1,149 @@
+"""
+context_packer.py
+
+Token-budgeted context for the RAG prompt.
+
+format_context() sends every retrieved chunk in full, so a large top_k
+makes a large prompt. pack_context() keeps the prompt under
+MARS_CONTEXT_TOKEN_BUDGET tokens instead:
+
+- Retrieved chunks are split into sentences and each sentence is scored:
+  idf-weighted overlap with the query terms, plus a prior from its
+  chunk's retrieval rank, plus a small bonus for a chunk's lead sentence
+- Sentences are taken best first while they fit in the budget (repeats,
+  e.g. from chunk overlap or syndicated copies, are taken once)
+- Kept sentences are written back in their original order, under their
+  chunk's "Source:" line, so citations and the lexical fact-check work
+  as with format_context
+
+Contexts already under the budget are returned unchanged. Tokens are
+estimated at ~4 characters each (the usual figure for English with
+GPT / Gemini tokenizers); pass `count_tokens` for an exact counter.
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from src.db.bm25_index import tokenize
+from src.utils.chunking import TokenCounter, iter_sentences
+
+# Context token budget for the RAG prompt (0 disables packing)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("MARS_CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Weight of the chunk's retrieval rank next to query-term overlap (0..1 each)
+RANK_WEIGHT = 0.5
+LEAD_BONUS = 0.1
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _segment(source: str, text: str) -> str:
+    # Same layout as summary_agent.format_context
+    return f"Source: {source}\n{text}\n\n---"
+
+
+def _join(segments: List[str]) -> str:
+    return "\n".join(segments)
+
+
+def score_sentences(query: str, chunks: List[List[str]]) -> List[List[float]]:
+    """
+    Score of every sentence of every chunk (chunks in retrieval order).
+    """
+    query_terms = set(tokenize(query))
+    sentence_terms = [[set(tokenize(sentence)) for sentence in sentences] for sentences in chunks]
+
+    n = sum(len(sentences) for sentences in chunks)
+    df: Dict[str, int] = {}
+    for sentences in sentence_terms:
+        for terms in sentences:
+            for term in terms & query_terms:
+                df[term] = df.get(term, 0) + 1
+
+    idf = {term: math.log(1 + n / count) for term, count in df.items()}
+    max_overlap = sum(idf.values()) or 1.0
+
+    scores = []
+    for rank, sentences in enumerate(sentence_terms):
+        prior = RANK_WEIGHT * (1 - rank / len(chunks))
+        scores.append([
+            sum(idf.get(term, 0.0) for term in terms) / max_overlap + prior + (LEAD_BONUS if i == 0 else 0.0)
+            for i, terms in enumerate(sentences)
+        ])
+    return scores
+
+
+def pack_context(
+    query: str,
+    retrieved: Dict,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    count_tokens: Optional[TokenCounter] = None
+) -> Tuple[str, Dict]:
+    """
+    Context text for `retrieved` (a query_memory result) within `budget`
+    tokens, plus stats: tokens_full, tokens_packed, tokens_saved,
+    sentences_full, sentences_kept.
+    """
+    count_tokens = count_tokens or estimate_tokens
+    documents = (retrieved.get("documents") or [[]])[0]
+    metadatas = (retrieved.get("metadatas") or [[]])[0]
+    sources = [(meta or {}).get("source", "unknown") for meta in metadatas]
+
+    full = _join([_segment(src, doc) for src, doc in zip(sources, documents)])
+    tokens_full = count_tokens(full) if documents else 0
+    chunks = [list(iter_sentences(doc)) for doc in documents]
+    n_sentences = sum(len(sentences) for sentences in chunks)
+
+    stats = {
+        "tokens_full": tokens_full,
+        "tokens_packed": tokens_full,
+        "tokens_saved": 0,
+        "sentences_full": n_sentences,
+        "sentences_kept": n_sentences,
+    }
+    if budget <= 0 or tokens_full <= budget:
+        return full, stats
+
+    scores = score_sentences(query, chunks)
+    ranked = sorted(
+        ((score, c, i) for c, row in enumerate(scores) for i, score in enumerate(row)),
+        key=lambda item: -item[0]
+    )
+
+    kept: Dict[int, List[int]] = {}
+    seen = set()
+    used = 0
+    for _, c, i in ranked:
+        sentence = chunks[c][i]
+        key = " ".join(sentence.lower().split())
+        if key in seen:
+            continue
+
+        # +1 for the joining space; a chunk's first kept sentence also pays for its Source line
+        cost = count_tokens(sentence) + 1
+        if c not in kept:
+            cost += count_tokens(_segment(sources[c], ""))
+        if used + cost > budget:
+            continue
+
+        seen.add(key)
+        kept.setdefault(c, []).append(i)
+        used += cost
+
+    packed = _join([
+        _segment(sources[c], " ".join(chunks[c][i] for i in sorted(kept[c])))
+        for c in sorted(kept)
+    ])
+    tokens_packed = count_tokens(packed) if kept else 0
+
+    stats.update(
+        tokens_packed=tokens_packed,
+        tokens_saved=tokens_full - tokens_packed,
+        sentences_kept=sum(len(ids) for ids in kept.values())
+    )
+    return packed, stats
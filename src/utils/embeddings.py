@@ -3,17 +3,48 @@ embeddings.py
 
 Utility module to generate text embeddings using SentenceTransformers.
 This will be used by Research Agent, Knowledge Agent, Summary Agent, etc.
+
+Embeddings are cached by content hash, per model:
+- an in-memory LRU tier (repeated queries within a process)
+- a persistent tier on disk (memory-mapped float32 matrix + key index),
+  so identical chunks are not re-embedded across runs; processes sharing
+  the directory serialize appends with a file lock
 """
 
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one writer per cache dir
+    fcntl = None
+
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from functools import lru_cache
-from typing import List, Union
+
+from src.utils.tracing import span
+
+EMBEDDING_MODEL_NAME = os.environ.get("MARS_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "MARS_EMBEDDING_CACHE_DIR",
+    os.path.join(os.environ.get("MARS_CACHE_DIR", "./.mars_cache"), "embeddings")
+)
+
+# Max vectors kept in the in-memory tier
+EMBEDDING_MEMORY_CACHE_SIZE = int(os.environ.get("MARS_EMBEDDING_MEMORY_CACHE_SIZE", "4096"))
+
 
 # -------------------------------------
 # Load embedding model using caching
 # -------------------------------------
 @lru_cache(maxsize=1)
-def load_embedding_model(model_name: str = "all-MiniLM-L6-v2"):
+def load_embedding_model(model_name: str = EMBEDDING_MODEL_NAME):
     """
     Loads and caches the embedding model.
     Using a small model for faster embedding generation.
@@ -22,24 +53,285 @@ def load_embedding_model(model_name: str = "all-MiniLM-L6-v2"):
     return model
 
 
+# -------------------------------------
+# Embedding cache
+# -------------------------------------
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier content-hash → vector cache for one model.
+
+    Disk layout (under <cache_dir>/<model>/):
+        vectors.f32  raw float32 rows, appended, read through np.memmap
+        keys.txt     one content hash per line; line i ↔ row i
+        dim.txt      vector dimension
+        lock         flock()ed around appends, so processes sharing the
+                     directory append whole rows and pick up each other's
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR, memory_size: int = EMBEDDING_MEMORY_CACHE_SIZE):
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._vectors_path = os.path.join(self.dir, "vectors.f32")
+        self._keys_path = os.path.join(self.dir, "keys.txt")
+        self._dim_path = os.path.join(self.dir, "dim.txt")
+        self._lock_path = os.path.join(self.dir, "lock")
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._index: Dict[str, int] = {}
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+        self._keys_read = 0  # bytes of keys.txt loaded into _index
+        self._rows = 0       # rows of vectors.f32 covered by those keys
+
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        with self._file_lock():
+            self._load_index()
+
+    # ---------------------------------
+    # Persistent tier
+    # ---------------------------------
+    @contextmanager
+    def _file_lock(self):
+        """
+        Exclusive lock on the cache directory, held while its files are
+        read for syncing or appended to.
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """
+        Sync _index with the files: keys appended since the last call
+        (by this or another process) are added. Call with the file lock held.
+        """
+        if self._dim is None:
+            if not os.path.exists(self._dim_path):
+                return
+            with open(self._dim_path, "r", encoding="ascii") as f:
+                self._dim = int(f.read().strip())
+
+        keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r", encoding="ascii") as f:
+                f.seek(self._keys_read)
+                tail = f.read()
+            # Appends happen under the lock, so a partial last line is left
+            # over from an interrupted one: drop it before anything follows it
+            complete = tail[:tail.rfind("\n") + 1]
+            self._keys_read += len(complete)
+            if len(complete) != len(tail):
+                with open(self._keys_path, "r+b") as f:
+                    f.truncate(self._keys_read)
+            keys = complete.split()
+
+        nbytes = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        row_bytes = 4 * self._dim
+
+        # An interrupted append can leave vectors without keys (or a partial
+        # row); trust complete rows only and trim the rest so appends stay aligned
+        start = self._rows
+        rows = min(start + len(keys), nbytes // row_bytes)
+        if nbytes != rows * row_bytes:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(rows * row_bytes)
+
+        for offset, key in enumerate(keys[:rows - start]):
+            self._index.setdefault(key, start + offset)
+        self._rows = rows
+
+    def _map(self) -> Optional[np.memmap]:
+        rows = self._rows
+        if rows == 0:
+            return None
+
+        if self._mmap is None or self._mmap.shape[0] < rows:
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+
+        return self._mmap
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        with self._file_lock():
+            # Rows other processes appended since we last looked come first;
+            # our rows start at the end of the (trimmed) data file
+            self._load_index()
+
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                with open(self._dim_path, "w", encoding="ascii") as f:
+                    f.write(str(self._dim))
+            elif vectors.shape[1] != self._dim:
+                return
+
+            fresh = [i for i, key in enumerate(keys) if key not in self._index]
+            if not fresh:
+                return
+            keys = [keys[i] for i in fresh]
+            vectors = vectors[fresh]
+
+            start = self._rows
+
+            # Vectors first, then keys: the index never points past the data
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._keys_path, "a", encoding="ascii") as f:
+                written = "".join(f"{key}\n" for key in keys)
+                f.write(written)
+
+            self._keys_read += len(written)
+            self._rows = start + len(keys)
+            for offset, key in enumerate(keys):
+                self._index[key] = start + offset
+
+    # ---------------------------------
+    # Lookup / insert
+    # ---------------------------------
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        out: List[Optional[np.ndarray]] = []
+
+        with self._lock:
+            mmap = None
+
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    out.append(vec)
+                    continue
+
+                row = self._index.get(key)
+                if row is not None:
+                    if mmap is None:
+                        mmap = self._map()
+                    vec = np.array(mmap[row])
+                    self._remember(key, vec)
+                    self._stats["disk_hits"] += 1
+                    out.append(vec)
+                    continue
+
+                self._stats["misses"] += 1
+                out.append(None)
+
+        return out
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        with self._lock:
+            new_keys = []
+            new_rows = []
+
+            for key, vec in zip(keys, vectors):
+                self._remember(key, vec)
+                if key not in self._index:
+                    new_keys.append(key)
+                    new_rows.append(vec)
+
+            if new_keys:
+                self._append(new_keys, np.stack(new_rows))
+
+    def _remember(self, key: str, vec: np.ndarray):
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["disk_entries"] = len(self._index)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str = EMBEDDING_MODEL_NAME) -> EmbeddingCache:
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = EmbeddingCache(model_name)
+            _caches[model_name] = cache
+    return cache
+
+
 # -------------------------------------
 # Embedding function
 # -------------------------------------
-def embed_text(text: Union[str, List[str]]) -> List[List[float]]:
+def embed_text(
+    text: Union[str, List[str]],
+    batch_size: int = 32,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    use_cache: bool = True
+) -> List[List[float]]:
     """
     Generate embeddings for either a single string or list of strings.
+    Cached texts are served from the embedding cache; only the misses
+    go through the model, in one batched encode call.
 
     Args:
         text (str or list[str]): Input text(s) to embed.
+        batch_size (int): Forward-pass batch size used by the model.
+        model_name (str): SentenceTransformer model to use.
+        use_cache (bool): Read/write the embedding cache.
 
     Returns:
         List[List[float]]: Embedding vectors
     """
-    model = load_embedding_model()
-
     if isinstance(text, str):
         text = [text]
 
-    embeddings = model.encode(text, convert_to_numpy=True)
+    with span("embed", texts=len(text)) as embed_span:
+        return _embed(text, batch_size, model_name, use_cache, embed_span)
+
+
+def _embed(text: List[str], batch_size: int, model_name: str, use_cache: bool, embed_span) -> List[List[float]]:
+    if not use_cache:
+        model = load_embedding_model(model_name)
+        embeddings = model.encode(text, batch_size=batch_size, convert_to_numpy=True)
+        return embeddings.tolist()
+
+    cache = get_embedding_cache(model_name)
+    keys = [text_key(t) for t in text]
+    vectors = cache.get_many(keys)
+
+    # Unique misses only: the same text twice in one call is embedded once
+    miss_keys: Dict[str, str] = {}
+    for key, t, vec in zip(keys, text, vectors):
+        if vec is None and key not in miss_keys:
+            miss_keys[key] = t
+
+    embed_span.set(encoded=len(miss_keys))
+
+    if miss_keys:
+        model = load_embedding_model(model_name)
+        encoded = model.encode(list(miss_keys.values()), batch_size=batch_size, convert_to_numpy=True)
+        encoded = encoded.astype(np.float32, copy=False)
+        cache.put_many(list(miss_keys.keys()), encoded)
+
+        fresh = dict(zip(miss_keys.keys(), encoded))
+        vectors = [vec if vec is not None else fresh[key] for key, vec in zip(keys, vectors)]
 
-    return embeddings.tolist()
+    return [vec.tolist() for vec in vectors]
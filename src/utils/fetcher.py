@@ -0,0 +1,199 @@
+"""
+fetcher.py
+
+Concurrent page fetching for the Research Agent.
+
+Provides:
+1. A shared keep-alive HTTP session (connection pooling)
+2. Per-host connection limits
+3. A global concurrency cap
+4. Results returned in input (search-rank) order, or streamed as
+   they complete with a bounded number of pages in flight
+
+With the default per-host limit, host limits and the in-flight cap
+(MARS_FETCH_GLOBAL_MAX) are shared by every concurrent fetch_all /
+iter_fetch call, so batches of queries don't multiply them.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.tracing import bind
+
+T = TypeVar("T")
+
+# Global cap on in-flight requests across all hosts
+FETCH_MAX_WORKERS = int(os.environ.get("MARS_FETCH_MAX_WORKERS", "8"))
+
+# Max concurrent requests to a single host
+FETCH_PER_HOST_LIMIT = int(os.environ.get("MARS_FETCH_PER_HOST", "2"))
+
+# Max requests in flight across all concurrent fetch calls in the process
+FETCH_GLOBAL_MAX = int(os.environ.get("MARS_FETCH_GLOBAL_MAX", "16"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (MARS-Agent)"
+}
+
+
+# -------------------------------------
+# 1. Shared HTTP session
+# -------------------------------------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide keep-alive session, creating it on first use.
+    The connection pool is sized to the global concurrency cap.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+
+                adapter = HTTPAdapter(
+                    pool_connections=FETCH_MAX_WORKERS,
+                    pool_maxsize=FETCH_MAX_WORKERS
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+
+                _session = session
+
+    return _session
+
+
+def close_http_session():
+    """
+    Closes the shared session (e.g. on shutdown or in tests).
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# -------------------------------------
+# 2. Per-host limits
+# -------------------------------------
+class HostLimiter:
+    """
+    Hands out one semaphore per host so no single site gets more than
+    `per_host` concurrent requests.
+    """
+
+    def __init__(self, per_host: int = FETCH_PER_HOST_LIMIT):
+        self.per_host = max(1, per_host)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = sem
+
+        return sem
+
+
+_shared_limiter = HostLimiter(FETCH_PER_HOST_LIMIT)
+_global_slots = threading.BoundedSemaphore(max(1, FETCH_GLOBAL_MAX))
+
+
+def _limiter_for(per_host: int) -> HostLimiter:
+    return _shared_limiter if per_host == FETCH_PER_HOST_LIMIT else HostLimiter(per_host)
+
+
+# -------------------------------------
+# 3. Concurrent fetch
+# -------------------------------------
+def fetch_all(
+    urls: List[str],
+    fetch_fn: Callable[[str], T],
+    max_workers: int = FETCH_MAX_WORKERS,
+    per_host: int = FETCH_PER_HOST_LIMIT
+) -> List[T]:
+    """
+    Run `fetch_fn(url)` for every URL concurrently.
+
+    Args:
+        urls (list[str]): URLs in search-rank order
+        fetch_fn (callable): fetches one URL; should not raise
+        max_workers (int): global concurrency cap
+        per_host (int): max concurrent requests per host
+
+    Returns:
+        list: one result per URL, in the same order as `urls`
+    """
+    if not urls:
+        return []
+
+    limiter = _limiter_for(per_host)
+
+    @bind
+    def _run(url: str) -> T:
+        with limiter.for_url(url), _global_slots:
+            return fetch_fn(url)
+
+    workers = max(1, min(max_workers, len(urls)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mars-fetch") as pool:
+        return list(pool.map(_run, urls))
+
+
+def iter_fetch(
+    urls: List[str],
+    fetch_fn: Callable[[str], T],
+    max_workers: int = FETCH_MAX_WORKERS,
+    per_host: int = FETCH_PER_HOST_LIMIT,
+    max_pending: Optional[int] = None
+) -> Iterator[Tuple[int, str, T]]:
+    """
+    Stream `(rank, url, fetch_fn(url))` tuples as fetches complete.
+
+    At most `max_pending` fetches (default: max_workers) are submitted
+    or waiting to be consumed at any time, so a slow consumer throttles
+    downloading instead of piling up pages in memory.
+    """
+    if not urls:
+        return
+
+    limiter = _limiter_for(per_host)
+
+    @bind
+    def _run(url: str) -> T:
+        with limiter.for_url(url), _global_slots:
+            return fetch_fn(url)
+
+    workers = max(1, min(max_workers, len(urls)))
+    window = max(1, max_pending or workers)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mars-fetch") as pool:
+        queue = list(enumerate(urls))
+        pending = {}
+
+        while queue or pending:
+            while queue and len(pending) < window:
+                rank, url = queue.pop(0)
+                pending[pool.submit(_run, url)] = (rank, url)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rank, url = pending.pop(future)
+                yield rank, url, future.result()
@@ -0,0 +1,119 @@
+"""
+html_extract.py
+
+Download guards and text extraction for the Research Agent.
+
+1. Streams the response body with a byte cap instead of buffering it all
+2. Rejects non-HTML responses (PDFs, images, binaries) and oversized
+   ones from the headers, before any body is read
+3. Decodes with the HTTP charset, else the document's <meta charset>
+4. Parses with lxml when installed (falls back to html.parser)
+5. Drops boilerplate (script/style/nav/footer/...) and collects
+   paragraph text in a single pass over the document
+"""
+
+import os
+import re
+from typing import Optional
+
+import requests
+from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Max body bytes read per page; longer pages are truncated
+MAX_PAGE_BYTES = int(os.environ.get("MARS_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "footer", "header", "aside", "form", "svg", "iframe"]
+
+_CHARSET_RE = re.compile(r"charset=([\w.-]+)", re.IGNORECASE)
+
+_READ_CHUNK = 64 * 1024
+
+# Bytes searched for a <meta charset> (browsers prescan the first 1024)
+_CHARSET_PRESCAN = 1024
+
+
+class SkippedPage(Exception):
+    """
+    Raised by read_html for a response it will not read; the message
+    says why.
+    """
+
+
+# -------------------------------------
+# 1-3. Guarded download
+# -------------------------------------
+def is_html_response(response: requests.Response) -> bool:
+    content_type = response.headers.get("Content-Type", "")
+    if not content_type:
+        # Many servers omit it for HTML; let the parser decide
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def read_html(response: requests.Response, max_bytes: int = MAX_PAGE_BYTES) -> str:
+    """
+    Reads an HTML body from a `stream=True` response, up to `max_bytes`.
+
+    Raises SkippedPage (without reading the body) when the response is
+    not HTML or declares a length far beyond the cap.
+    """
+    if not is_html_response(response):
+        raise SkippedPage(f"not an HTML page ({response.headers.get('Content-Type')})")
+
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > 4 * max_bytes:
+        raise SkippedPage(f"page too large ({int(declared)} bytes declared, limit {4 * max_bytes})")
+
+    body = bytearray()
+    for block in response.iter_content(chunk_size=_READ_CHUNK):
+        body.extend(block)
+        if len(body) >= max_bytes:
+            del body[max_bytes:]
+            break
+
+    match = _CHARSET_RE.search(response.headers.get("Content-Type", ""))
+    encoding = match.group(1) if match else EncodingDetector.find_declared_encoding(
+        bytes(body[:_CHARSET_PRESCAN]), is_html=True
+    )
+
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+# -------------------------------------
+# 4-5. Extraction
+# -------------------------------------
+def extract_text(html: str) -> str:
+    """
+    Extracts readable paragraph text from an HTML document, skipping
+    paragraphs inside boilerplate containers.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    text_blocks = []
+
+    # Document order: a boilerplate container is seen (and dropped)
+    # before any <p> inside it, which is then marked decomposed
+    for element in soup.find_all(["p"] + BOILERPLATE_TAGS):
+        if element.decomposed:
+            continue
+
+        if element.name != "p":
+            element.decompose()
+            continue
+
+        text = element.get_text().strip()
+        if text:
+            text_blocks.append(text)
+
+    return "\n".join(text_blocks)
@@ -0,0 +1,106 @@
+"""
+llm_cache.py
+
+Persistent cache of LLM completions.
+
+- Keyed by a hash of provider, model and the exact prompt, so a prompt
+  seen before (same question, same retrieved context) is answered
+  without calling the model
+- Entries expire after a TTL; the oldest-used entries are evicted once
+  the entry cap is reached
+- Survives process restarts (SQLite on disk)
+- Tracks hits, latency and tokens saved
+"""
+
+import hashlib
+import os
+import time
+from typing import Dict, Optional
+
+from src.utils.sqlite_cache import SqliteTTLCache, cache_singleton
+
+LLM_CACHE_ENABLED = os.environ.get("MARS_LLM_CACHE", "1") != "0"
+LLM_CACHE_DIR = os.environ.get("MARS_CACHE_DIR", "./.mars_cache")
+LLM_CACHE_TTL = float(os.environ.get("MARS_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("MARS_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+
+def make_prompt_key(provider: str, model: str, prompt: str) -> str:
+    digest = hashlib.sha256(f"{provider}\x00{model}\x00{prompt}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMCache(SqliteTTLCache):
+    """
+    SQLite-backed (provider, model, prompt hash) → completion cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES
+    ):
+        if path is None:
+            os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+            path = os.path.join(LLM_CACHE_DIR, "llm.sqlite3")
+
+        super().__init__(
+            path,
+            table="completions",
+            key_schema="key TEXT PRIMARY KEY",
+            value_schema=(
+                "model TEXT NOT NULL",
+                "text TEXT NOT NULL",
+                "prompt_tokens INTEGER NOT NULL",
+                "completion_tokens INTEGER NOT NULL",
+                "latency REAL NOT NULL"
+            ),
+            ttl=ttl,
+            max_entries=max_entries,
+            stats=("saved_tokens",)
+        )
+
+    # ---------------------------------
+    # Lookup / insert
+    # ---------------------------------
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        {"text", "prompt_tokens", "completion_tokens", "latency"} of a fresh
+        entry, or None.
+        """
+        with self._lock:
+            row = self._select_locked(key, "text, prompt_tokens, completion_tokens, latency", time.time())
+            if row is None:
+                return None
+
+            text, prompt_tokens, completion_tokens, latency = row
+            self._stats["saved_seconds"] += latency
+            self._stats["saved_tokens"] += prompt_tokens + completion_tokens
+
+        return {
+            "text": text,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency": latency
+        }
+
+    def put(self, key: str, model: str, response: Dict, latency: float):
+        with self._lock:
+            self._insert_locked(
+                {
+                    "key": key,
+                    "model": model,
+                    "text": response["text"],
+                    "prompt_tokens": response["prompt_tokens"],
+                    "completion_tokens": response["completion_tokens"],
+                    "latency": latency
+                },
+                time.time()
+            )
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+get_llm_cache = cache_singleton(LLMCache)
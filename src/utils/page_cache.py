@@ -0,0 +1,150 @@
+"""
+page_cache.py
+
+Disk-backed cache of extracted page text for the Research Agent.
+
+- Keyed by URL, stores extracted text plus ETag / Last-Modified
+- Entries younger than the TTL are served without touching the network
+- Older entries are revalidated with a conditional GET (304 → reuse text)
+- Total stored text is capped; least-recently-used entries are evicted
+- Hit / revalidation / miss counters for tuning
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.utils.sqlite_cache import SqliteTTLCache, cache_singleton
+
+PAGE_CACHE_DIR = os.environ.get("MARS_CACHE_DIR", "./.mars_cache")
+PAGE_CACHE_TTL = float(os.environ.get("MARS_PAGE_CACHE_TTL", str(6 * 3600)))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("MARS_PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return (time.time() - self.fetched_at) < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Headers for a conditional GET against the origin.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache(SqliteTTLCache):
+    """
+    SQLite-backed URL → extracted text cache with TTL and LRU size cap.
+    Safe to share between fetch threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = PAGE_CACHE_TTL,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES
+    ):
+        if path is None:
+            os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+            path = os.path.join(PAGE_CACHE_DIR, "pages.sqlite3")
+
+        # Stale pages are revalidated, not dropped: only the size cap evicts
+        super().__init__(
+            path,
+            table="pages",
+            key_schema="url TEXT PRIMARY KEY",
+            value_schema=("text TEXT NOT NULL", "etag TEXT", "last_modified TEXT"),
+            ttl=ttl,
+            max_bytes=max_bytes,
+            evict_expired=False,
+            stats=("revalidated", "stores")
+        )
+
+    # ---------------------------------
+    # Lookup
+    # ---------------------------------
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        """
+        Returns the cached entry for `url` (fresh or stale), or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, text, etag, last_modified, created_at FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+        return CachedPage(*row)
+
+    def record_hit(self):
+        with self._lock:
+            self._stats["hits"] += 1
+
+    def record_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    # ---------------------------------
+    # Update
+    # ---------------------------------
+    def mark_revalidated(self, url: str):
+        """
+        Origin answered 304: keep the stored text, restart its TTL.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET created_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url)
+            )
+            self._conn.commit()
+            self._stats["revalidated"] += 1
+
+    def store(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._stats["stores"] += 1
+            self._insert_locked(
+                {"url": url, "text": text, "etag": etag, "last_modified": last_modified},
+                time.time(),
+                size=size
+            )
+
+    # ---------------------------------
+    # Stats
+    # ---------------------------------
+    def stats(self) -> Dict:
+        """
+        Counters since process start plus current on-disk footprint.
+        """
+        stats = super().stats()
+        lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        return stats
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+get_page_cache = cache_singleton(PageCache)
@@ -0,0 +1,105 @@
+"""
+rerank.py
+
+Maximal Marginal Relevance re-ranking of retrieved chunks.
+
+Syndicated stories land in memory several times over, so the plain top_k
+is often a handful of near-duplicates. Retrieval over-fetches
+(top_k * MARS_MMR_FETCH_FACTOR candidates, with their stored vectors)
+and MMR picks top_k of them, trading relevance to the query against
+similarity to the chunks already picked:
+
+    score(c) = λ · sim(c, query) − (1 − λ) · max sim(c, picked)
+
+λ = MARS_MMR_LAMBDA (1.0 is plain relevance order). Candidates nearly
+identical to a picked chunk (cosine ≥ MARS_MMR_DUPLICATE_THRESHOLD) are
+dropped outright, so the context can come back shorter than top_k.
+
+All similarities come from one normalized candidate matrix; the greedy
+loop does O(top_k · candidates) vector work.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MMR_ENABLED = os.environ.get("MARS_MMR", "1") != "0"
+MMR_LAMBDA = float(os.environ.get("MARS_MMR_LAMBDA", "0.7"))
+MMR_FETCH_FACTOR = int(os.environ.get("MARS_MMR_FETCH_FACTOR", "3"))
+MMR_DUPLICATE_THRESHOLD = float(os.environ.get("MARS_MMR_DUPLICATE_THRESHOLD", "0.97"))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def mmr_select(
+    query_embedding: List[float],
+    embeddings: List[List[float]],
+    top_k: int,
+    lambda_: float = MMR_LAMBDA,
+    duplicate_threshold: Optional[float] = MMR_DUPLICATE_THRESHOLD
+) -> List[int]:
+    """
+    Indices of up to `top_k` candidates in MMR order.
+    """
+    if top_k <= 0 or len(embeddings) == 0:
+        return []
+
+    candidates = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    n = len(candidates)
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+
+    while len(selected) < top_k and available.any():
+        if selected:
+            scores = lambda_ * relevance - (1 - lambda_) * max_sim
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+
+        best = int(scores.argmax())
+        selected.append(best)
+        available[best] = False
+
+        max_sim = np.maximum(max_sim, pairwise[best])
+        if duplicate_threshold is not None:
+            available &= max_sim < duplicate_threshold
+
+    return selected
+
+
+def mmr_rerank(
+    retrieved: Dict,
+    query_embedding: List[float],
+    top_k: int,
+    lambda_: float = MMR_LAMBDA,
+    duplicate_threshold: Optional[float] = MMR_DUPLICATE_THRESHOLD
+) -> Dict:
+    """
+    query_memory result (fetched with include_embeddings=True) reduced to
+    its MMR selection, in the same shape. Without stored vectors it is
+    just cut to top_k.
+    """
+    ids = (retrieved.get("ids") or [[]])[0]
+    embeddings = (retrieved.get("embeddings") or [[]])[0]
+
+    if embeddings is not None and len(embeddings) == len(ids) and len(ids) > 0:
+        order = mmr_select(query_embedding, embeddings, top_k, lambda_, duplicate_threshold)
+    else:
+        order = list(range(min(top_k, len(ids))))
+
+    reranked = dict(retrieved)
+    for key in ("ids", "documents", "metadatas", "distances", "embeddings"):
+        rows = retrieved.get(key)
+        if rows is not None and len(rows) and rows[0] is not None and len(rows[0]) == len(ids):
+            reranked[key] = [[rows[0][i] for i in order]]
+    return reranked
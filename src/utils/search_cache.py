@@ -0,0 +1,148 @@
+"""
+search_cache.py
+
+Persistent TTL cache for search_web results.
+
+- Keyed by the search backend, the number of results requested and a
+  normalized query (case, unicode form, punctuation and whitespace
+  folded)
+- Entries expire after a TTL; the oldest-used entries are evicted
+  once the entry cap is reached
+- Survives process restarts (SQLite on disk)
+- Tracks API calls, latency and cost saved so the TTL can be tuned
+"""
+
+import json
+import os
+import re
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional
+
+from src.utils.sqlite_cache import SqliteTTLCache, cache_singleton
+
+SEARCH_CACHE_DIR = os.environ.get("MARS_CACHE_DIR", "./.mars_cache")
+SEARCH_CACHE_TTL = float(os.environ.get("MARS_SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("MARS_SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+# Price of one search API call in USD (SerpAPI / Custom Search are both metered)
+SEARCH_COST_PER_CALL = float(os.environ.get("MARS_SEARCH_COST_PER_CALL", "0.005"))
+
+# Trailing punctuation ("?", "...", "!"), but not the "+" / "#" of "C++" / "C#"
+_TRAILING_PUNCT_RE = re.compile(r"[^\w\s+#]+$")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Folds trivially different phrasings of a query onto one cache key:
+    "Impact of AI on healthcare?" == "impact of  AI on Healthcare".
+    Only case, whitespace and trailing punctuation are folded, so "C++",
+    "C#" and "C" stay distinct.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _SPACE_RE.sub(" ", query).strip()
+    return _TRAILING_PUNCT_RE.sub("", query).rstrip()
+
+
+class SearchCache(SqliteTTLCache):
+    """
+    SQLite-backed (backend, normalized query) → URL list cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = SEARCH_CACHE_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        cost_per_call: float = SEARCH_COST_PER_CALL
+    ):
+        if path is None:
+            os.makedirs(SEARCH_CACHE_DIR, exist_ok=True)
+            path = os.path.join(SEARCH_CACHE_DIR, "search.sqlite3")
+
+        super().__init__(
+            path,
+            table="searches",
+            key_schema="key TEXT PRIMARY KEY",
+            value_schema=("urls TEXT NOT NULL", "latency REAL NOT NULL"),
+            ttl=ttl,
+            max_entries=max_entries
+        )
+        self.cost_per_call = cost_per_call
+
+    @staticmethod
+    def make_key(query: str, num_results: int, backend: str) -> str:
+        # Backends rank differently, so their results are never shared
+        return f"{backend.lower()}:{num_results}:{normalize_query(query)}"
+
+    # ---------------------------------
+    # Read-through lookup
+    # ---------------------------------
+    def get_or_search(
+        self,
+        query: str,
+        num_results: int,
+        search_fn: Callable[..., List[str]],
+        backend: str
+    ) -> List[str]:
+        """
+        Returns cached URLs for the query on `backend`, or calls
+        `search_fn(query, num_results=...)` and caches a non-empty result.
+        """
+        key = self.make_key(query, num_results, backend)
+        urls = self.get(key)
+
+        if urls is not None:
+            return urls
+
+        t0 = time.perf_counter()
+        urls = search_fn(query, num_results=num_results)
+        latency = time.perf_counter() - t0
+
+        if urls:
+            self.put(key, urls, latency)
+
+        return urls
+
+    def get(self, key: str) -> Optional[List[str]]:
+        t0 = time.perf_counter()
+
+        with self._lock:
+            row = self._select_locked(key, "urls, latency", time.time())
+            if row is None:
+                return None
+
+            urls, latency = row
+            self._stats["saved_seconds"] += max(0.0, latency - (time.perf_counter() - t0))
+
+        return json.loads(urls)
+
+    def put(self, key: str, urls: List[str], latency: float):
+        with self._lock:
+            self._insert_locked({"key": key, "urls": json.dumps(urls), "latency": latency}, time.time())
+
+    # ---------------------------------
+    # Stats
+    # ---------------------------------
+    def stats(self) -> Dict:
+        """
+        Session counters plus lifetime savings of the entries still on disk.
+        """
+        stats = super().stats()
+
+        with self._lock:
+            lifetime_saved = self._conn.execute(
+                "SELECT COALESCE(SUM(hits * latency), 0) FROM searches"
+            ).fetchone()[0]
+
+        stats["saved_cost"] = stats["hits"] * self.cost_per_call
+        stats["lifetime_saved_seconds"] = lifetime_saved
+        stats["lifetime_saved_cost"] = stats["lifetime_hits"] * self.cost_per_call
+        return stats
+
+
+# -------------------------------------
+# Process-wide instance
+# -------------------------------------
+get_search_cache = cache_singleton(SearchCache)
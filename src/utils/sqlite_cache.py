@@ -0,0 +1,233 @@
+"""
+sqlite_cache.py
+
+Shared base of the on-disk MARS caches (pages, searches, answers, LLM
+completions).
+
+- One SQLite table per cache; the key and value columns are given by
+  the subclass, the bookkeeping columns (size, created_at, accessed_at,
+  hits) are added here
+- Entries older than the TTL are dropped; least-recently-used entries
+  are evicted above an entry cap and/or a byte cap
+- A table left by an older layout is dropped and rebuilt (it only
+  holds cached data)
+- Safe to share between threads; subclasses only encode and decode
+  their values
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+_BOOKKEEPING_SCHEMA = (
+    "size INTEGER NOT NULL DEFAULT 0",
+    "created_at REAL NOT NULL",
+    "accessed_at REAL NOT NULL",
+    "hits INTEGER NOT NULL DEFAULT 0",
+)
+
+
+def _column_names(schema: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(column.split()[0] for column in schema)
+
+
+class SqliteTTLCache:
+    """
+    SQLite key → value table with TTL expiry and an LRU cap.
+
+    `key_schema` is the key column definition (e.g. "url TEXT PRIMARY KEY"),
+    `value_schema` the value column definitions. A cap of 0 disables it.
+    With `evict_expired=False` stale rows stay until the caps push them out
+    (the page cache revalidates them instead of dropping them).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        key_schema: str,
+        value_schema: Sequence[str],
+        ttl: float,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        evict_expired: bool = True,
+        indexes: Sequence[str] = (),
+        stats: Sequence[str] = ()
+    ):
+        self.path = path
+        self.table = table
+        self.key_column = key_schema.split()[0]
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_expired = evict_expired
+
+        schema = (key_schema, *value_schema, *_BOOKKEEPING_SCHEMA)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+        if existing and tuple(existing) != _column_names(schema):
+            self._conn.execute(f"DROP TABLE {table}")
+
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(schema)})")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        for columns in indexes:
+            name = "_".join(column.strip() for column in columns.split(","))
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{name} ON {table}({columns})")
+        self._conn.commit()
+
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "saved_seconds": 0.0}
+        self._stats.update({name: 0 for name in stats})
+
+    # ---------------------------------
+    # Row access (caller holds the lock)
+    # ---------------------------------
+    def _select_locked(self, key, columns: str, now: float) -> Optional[tuple]:
+        """
+        Values of `columns` for a fresh entry, counted as a hit, or None
+        (counted as a miss; an expired entry is deleted).
+        """
+        row = self._conn.execute(
+            f"SELECT {columns}, created_at FROM {self.table} WHERE {self.key_column} = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self._stats["misses"] += 1
+            return None
+
+        if now - row[-1] >= self.ttl:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,))
+            self._conn.commit()
+            self._stats["misses"] += 1
+            self._stats["expired"] += 1
+            return None
+
+        self._touch_locked(key, now)
+        self._stats["hits"] += 1
+        return row[:-1]
+
+    def _touch_locked(self, key, now: float):
+        self._conn.execute(
+            f"UPDATE {self.table} SET accessed_at = ?, hits = hits + 1 WHERE {self.key_column} = ?",
+            (now, key)
+        )
+        self._conn.commit()
+
+    def _insert_locked(self, values: Dict, now: float, size: int = 0):
+        """
+        Inserts (or replaces) one entry, then enforces the TTL and caps.
+        """
+        columns = [*values, "size", "created_at", "accessed_at", "hits"]
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            (*values.values(), size, now, now, 0)
+        )
+        self._evict_locked(now)
+        self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        """
+        Drop expired entries, then least-recently-used ones above the caps.
+        """
+        table, key = self.table, self.key_column
+        evicted = 0
+
+        if self.evict_expired:
+            evicted += self._conn.execute(
+                f"DELETE FROM {table} WHERE created_at <= ?", (now - self.ttl,)
+            ).rowcount
+
+        if self.max_entries > 0:
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                evicted += self._conn.execute(
+                    f"DELETE FROM {table} WHERE {key} IN "
+                    f"(SELECT {key} FROM {table} ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+
+        if self.max_bytes > 0:
+            total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute(f"SELECT {key}, size FROM {table} ORDER BY accessed_at ASC").fetchall()
+                victims = []
+                for row_key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((row_key,))
+                    total -= size
+                self._conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", victims)
+                evicted += len(victims)
+
+        if evicted > 0:
+            self._stats["evictions"] += evicted
+            self._invalidate_locked()
+
+    def _invalidate_locked(self):
+        """
+        Hook for subclasses holding state derived from the rows.
+        """
+
+    # ---------------------------------
+    # Maintenance
+    # ---------------------------------
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._invalidate_locked()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------
+    # Stats
+    # ---------------------------------
+    def stats(self) -> Dict:
+        """
+        Counters since process start plus the entries still on disk.
+        """
+        with self._lock:
+            entries, total, lifetime_hits = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM {self.table}"
+            ).fetchone()
+            stats = dict(self._stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = entries
+        stats["bytes"] = total
+        stats["lifetime_hits"] = lifetime_hits
+        return stats
+
+
+# -------------------------------------
+# Process-wide instances
+# -------------------------------------
+C = TypeVar("C")
+
+
+def cache_singleton(factory: Callable[[], C]) -> Callable[[], C]:
+    """
+    get_*() accessor that builds one shared instance on first use.
+    """
+    instance: Optional[C] = None
+    lock = threading.Lock()
+
+    def get() -> C:
+        nonlocal instance
+
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+
+        return instance
+
+    return get
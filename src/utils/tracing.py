@@ -0,0 +1,275 @@
+"""
+tracing.py
+
+Lightweight span/timer instrumentation for the MARS pipeline.
+
+- start_trace() opens a trace for one pipeline run (e.g. answer_query)
+- span("embed") / @traced("embed") time a stage inside the active trace;
+  spans nest, and each records its parent stage
+- bind(fn) carries the active trace into worker threads
+- isolate(gen) keeps a generator's trace out of its consumer's context
+- Trace.summary() gives per-stage totals plus the raw spans, and every
+  finished trace can be appended as one JSON line to MARS_TRACE_LOG
+
+With no active trace (or MARS_TRACING=0) span() is a context-variable
+lookup returning a shared no-op context manager, so instrumented code
+costs next to nothing when tracing is off.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Callable, Dict, Iterator, List, Optional
+
+TRACING_ENABLED = os.environ.get("MARS_TRACING", "1") != "0"
+
+# JSON-lines file that finished traces are appended to ("stderr" for stderr)
+TRACE_LOG_PATH = os.environ.get("MARS_TRACE_LOG", "")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("mars_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("mars_span", default=None)
+
+_log_lock = threading.Lock()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# -------------------------------------
+# Trace / spans
+# -------------------------------------
+class Trace:
+    """
+    Spans recorded during one pipeline run. Safe to record into from
+    several threads.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.total_s: Optional[float] = None
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, span: Dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        self.total_s = time.perf_counter() - self._t0
+
+    def summary(self) -> Dict:
+        """
+        {
+            "total_ms": wall time of the run,
+            "stages": {"parent/name" or "name": {"ms", "count", "parent"}}
+                      in first-seen order,
+            "spans": [{"name", "parent", "start_ms", "ms", "thread", ...}]
+        }
+
+        Stage time is summed over calls; spans running concurrently in
+        worker threads (e.g. fetch) can add up to more than their parent.
+        """
+        total = self.total_s if self.total_s is not None else time.perf_counter() - self._t0
+
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+
+        stages: Dict[str, Dict] = {}
+        for s in spans:
+            key = f"{s['parent']}/{s['name']}" if s["parent"] else s["name"]
+            stage = stages.setdefault(key, {"ms": 0.0, "count": 0, "parent": s["parent"]})
+            stage["ms"] += s["ms"]
+            stage["count"] += 1
+
+        for stage in stages.values():
+            stage["ms"] = round(stage["ms"], 3)
+
+        return {"total_ms": round(total * 1000, 3), "stages": stages, "spans": spans}
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "_t0", "_token")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """
+        Attach attributes discovered while the span runs (counts, hits...).
+        """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self.name)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        _current_span.reset(self._token)
+
+        record = {
+            "name": self.name,
+            "parent": _current_span.get(),
+            "start_ms": round((self._t0 - self.trace._t0) * 1000, 3),
+            "ms": round((t1 - self._t0) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.attrs:
+            record.update(self.attrs)
+
+        self.trace.record(record)
+        return False
+
+
+def span(name: str, **attrs):
+    """
+    Time a block as stage `name` of the active trace:
+
+        with span("fetch", url=url) as s:
+            ...
+            s.set(bytes=len(body))
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name, attrs)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator form of span() for whole functions.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Wrap `fn` so it records into the caller's trace (and under the
+    caller's span) when run in another thread.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return fn
+
+    parent = _current_span.get()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+    return wrapper
+
+
+def isolate(gen: Iterator) -> Iterator:
+    """
+    Resume generator `gen` in a private copy of the caller's context.
+
+    A generator that opens a trace sets it in whatever context resumes
+    it, so between yields the consumer would run (and record spans)
+    under the generator's trace. Here each step runs in the same copied
+    context, and the consumer's own context is never touched.
+    """
+    context = copy_context()
+
+    try:
+        while True:
+            try:
+                item = context.run(next, gen)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        context.run(gen.close)
+
+
+@contextmanager
+def start_trace(name: str, **attrs) -> Iterator[Trace]:
+    """
+    Run a block under a new trace. The trace is returned even when
+    tracing is disabled (then it only measures the total time).
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace) if TRACING_ENABLED else None
+
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        if token is not None:
+            try:
+                _current_trace.reset(token)
+            except ValueError:
+                # Generator closed from another context (e.g. abandoned stream)
+                _current_trace.set(None)
+            if TRACE_LOG_PATH:
+                write_trace_log(trace, **attrs)
+
+
+# -------------------------------------
+# Structured logs
+# -------------------------------------
+def write_trace_log(trace: Trace, path: str = TRACE_LOG_PATH, **attrs):
+    """
+    Append the trace as one JSON line.
+    """
+    entry = {
+        "trace": trace.name,
+        "trace_id": trace.trace_id,
+        "started_at": trace.started_at,
+        **attrs,
+        **trace.summary(),
+    }
+    line = json.dumps(entry, default=str) + "\n"
+
+    try:
+        with _log_lock:
+            if path == "stderr":
+                sys.stderr.write(line)
+            else:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line)
+    except OSError as e:
+        print(f"Could not write trace log to {path}: {e}")
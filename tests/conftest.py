@@ -0,0 +1,18 @@
+"""
+conftest.py
+
+Shared pytest setup: makes `src` importable from the repo root and keeps
+every on-disk cache of a test run inside its own temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_workdir = tempfile.mkdtemp(prefix="mars-tests-")
+os.environ.setdefault("MARS_CACHE_DIR", os.path.join(_workdir, "cache"))
+os.environ.setdefault("MARS_EMBEDDING_CACHE_DIR", os.path.join(_workdir, "cache", "embeddings"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(_workdir, "chroma_db"))
+os.environ.setdefault("MARS_FAISS_PERSIST_DIR", os.path.join(_workdir, "faiss_db"))
@@ -0,0 +1,106 @@
+"""
+test_bm25.py
+
+BM25 scoring, user scoping and reciprocal rank fusion.
+"""
+
+import math
+
+import pytest
+
+from src.db.bm25_index import BM25_B, BM25_K1, BM25Index, fuse_rankings, tokenize
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_tokenize_keeps_names_whole_and_by_part():
+    assert tokenize("The GPT-4 model scored 3.5") == ["gpt-4", "gpt", "4", "model", "scored", "3.5", "3", "5"]
+
+
+def test_score_matches_bm25_formula(index):
+    index.add(["a", "b"], ["solar solar panels", "wind turbines"])
+
+    # One document of two contains "solar"; average length 2.5
+    idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+    expected = idf * 2 * (BM25_K1 + 1) / (2 + BM25_K1 * (1 - BM25_B + BM25_B * 3 / 2.5))
+
+    [(doc_id, score)] = index.search("solar")
+    assert doc_id == "a"
+    assert score == pytest.approx(expected)
+
+
+def test_rare_terms_outrank_common_ones(index):
+    index.add(
+        ["common", "rare", "other1", "other2"],
+        ["energy policy report", "fusion reactor design", "energy prices", "grid storage"]
+    )
+
+    ranked = index.search("energy fusion")
+    assert ranked[0][0] == "rare"
+    assert {doc_id for doc_id, _ in ranked} == {"common", "rare", "other1"}
+    assert ranked[0][1] > ranked[1][1]
+
+
+def test_terms_in_most_chunks_are_skipped(index):
+    index.add([f"d{i}" for i in range(4)], ["energy report"] * 3 + ["fusion"])
+    assert index.search("energy") == []
+    assert [doc_id for doc_id, _ in index.search("energy fusion")] == ["d3"]
+
+
+def test_search_is_scoped_per_user(index):
+    index.add(["a1"], ["solar panels"], user="alice")
+    index.add(["b1"], ["solar farms"], user="bob")
+
+    assert [doc_id for doc_id, _ in index.search("solar", user="alice")] == ["a1"]
+    assert [doc_id for doc_id, _ in index.search("solar", user="bob")] == ["b1"]
+    assert index.search("solar", user="carol") == []
+
+
+def test_readding_known_ids_is_a_noop(index):
+    assert index.add(["a"], ["solar panels"]) == 1
+    assert index.add(["a", "b"], ["solar panels", "wind"]) == 1
+    assert index.count() == 2
+
+
+def test_delete_updates_statistics(index):
+    index.add(["a", "b", "c"], ["solar panels", "solar farms", "wind turbines"])
+    assert index.delete(["a", "missing"]) == 1
+
+    fresh = BM25Index(index.path)
+    fresh.add(["b", "c"], ["solar farms", "wind turbines"])
+    try:
+        assert index.search("solar") == fresh.search("solar")
+        assert index.search("panels") == []
+    finally:
+        fresh.close()
+
+
+def test_min_created_at_filters_stale_chunks(index):
+    index.add(["old"], ["solar panels"], created_at=100.0)
+    index.add(["new"], ["solar farms"], created_at=200.0)
+
+    assert {doc_id for doc_id, _ in index.search("solar")} == {"old", "new"}
+    assert [doc_id for doc_id, _ in index.search("solar", min_created_at=150.0)] == ["new"]
+
+    index.refresh(["old"], created_at=300.0)
+    assert {doc_id for doc_id, _ in index.search("solar", min_created_at=150.0)} == {"old", "new"}
+
+
+def test_fuse_rankings_sums_reciprocal_ranks():
+    fused = fuse_rankings([["a", "b", "c"], ["b", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+    scores = dict(fused)
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["a"] == pytest.approx(1 / 61)
+    assert scores["d"] == pytest.approx(1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63)
+
+
+def test_fuse_rankings_of_nothing_is_empty():
+    assert fuse_rankings([[], []]) == []
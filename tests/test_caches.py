@@ -0,0 +1,194 @@
+"""
+test_caches.py
+
+TTL expiry and LRU eviction in the on-disk caches.
+"""
+
+import time
+
+import pytest
+
+from src.utils.answer_cache import AnswerCache
+from src.utils.llm_cache import LLMCache
+from src.utils.page_cache import PageCache
+from src.utils.search_cache import SearchCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds=1.0):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def _response(text):
+    return {"text": text, "prompt_tokens": 10, "completion_tokens": 5}
+
+
+# ---------------------------------
+# Search cache
+# ---------------------------------
+def test_search_cache_expires_after_ttl(tmp_path, clock):
+    cache = SearchCache(path=str(tmp_path / "search.sqlite3"), ttl=60, max_entries=0)
+    cache.put("k", ["https://a.example"], latency=0.5)
+
+    clock.advance(59)
+    assert cache.get("k") == ["https://a.example"]
+
+    clock.advance(1)
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["entries"]) == (1, 1, 1, 0)
+    cache.close()
+
+
+def test_search_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = SearchCache(path=str(tmp_path / "search.sqlite3"), ttl=3600, max_entries=2)
+    cache.put("a", ["https://a.example"], latency=0.1)
+    clock.advance()
+    cache.put("b", ["https://b.example"], latency=0.1)
+    clock.advance()
+    assert cache.get("a") is not None
+
+    clock.advance()
+    cache.put("c", ["https://c.example"], latency=0.1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ["https://a.example"]
+    assert cache.get("c") == ["https://c.example"]
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_search_cache_keys_by_backend_and_normalized_query(tmp_path, clock):
+    cache = SearchCache(path=str(tmp_path / "search.sqlite3"))
+    calls = []
+
+    def search(query, num_results):
+        calls.append(query)
+        return [f"https://{len(calls)}.example"]
+
+    first = cache.get_or_search("Solar  Power?", 3, search, backend="ddg")
+    assert cache.get_or_search("solar power", 3, search, backend="DDG") == first
+    assert cache.get_or_search("solar power", 3, search, backend="serper") != first
+    assert len(calls) == 2
+    cache.close()
+
+
+# ---------------------------------
+# LLM cache
+# ---------------------------------
+def test_llm_cache_expires_and_evicts(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / "llm.sqlite3"), ttl=100, max_entries=2)
+    cache.put("a", "m", _response("A"), latency=1.0)
+    clock.advance()
+    cache.put("b", "m", _response("B"), latency=1.0)
+    clock.advance()
+    assert cache.get("a")["text"] == "A"
+
+    clock.advance()
+    cache.put("c", "m", _response("C"), latency=1.0)
+    assert cache.get("b") is None
+    assert cache.stats()["saved_tokens"] == 15
+
+    clock.advance(100)
+    assert cache.get("c") is None
+    cache.close()
+
+
+def test_insert_drops_expired_entries(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / "llm.sqlite3"), ttl=10, max_entries=0)
+    cache.put("old", "m", _response("old"), latency=1.0)
+
+    clock.advance(10)
+    cache.put("new", "m", _response("new"), latency=1.0)
+
+    assert cache.stats()["entries"] == 1
+    cache.close()
+
+
+# ---------------------------------
+# Answer cache
+# ---------------------------------
+def test_answer_cache_entry_cap_evicts_least_recently_used(tmp_path, clock):
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), ttl=3600, max_entries=2, threshold=0.95)
+    cache.put("q1", [1.0, 0.0, 0.0], {"summary": "one"}, latency=2.0)
+    clock.advance()
+    cache.put("q2", [0.0, 1.0, 0.0], {"summary": "two"}, latency=2.0)
+    clock.advance()
+    assert cache.get("q1", [1.0, 0.0, 0.0])["summary"] == "one"
+
+    clock.advance()
+    cache.put("q3", [0.0, 0.0, 1.0], {"summary": "three"}, latency=2.0)
+
+    assert cache.get("q2", [0.0, 1.0, 0.0]) is None
+    assert cache.get("q1", [1.0, 0.0, 0.0])["summary"] == "one"
+    assert cache.get("q3", [0.0, 0.0, 1.0])["summary"] == "three"
+    cache.close()
+
+
+def test_answer_cache_ttl_and_scope(tmp_path, clock):
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), ttl=60, max_entries=0, threshold=0.95)
+    cache.put("solar in 2024", [1.0, 0.0], {"summary": "s"}, latency=2.0, user="u", top_k=5, pages=3)
+
+    assert cache.get("solar in 2024", [1.0, 0.0], user="u", top_k=5, pages=3)["cache"]["similarity"] > 0.99
+    assert cache.get("solar in 2024", [1.0, 0.0], user="u", top_k=5, pages=5) is None
+    assert cache.get("solar in 2024", [1.0, 0.0], user="v", top_k=5, pages=3) is None
+    assert cache.get("solar in 2023", [1.0, 0.0], user="u", top_k=5, pages=3) is None
+
+    clock.advance(60)
+    assert cache.get("solar in 2024", [1.0, 0.0], user="u", top_k=5, pages=3) is None
+    assert cache.stats()["expired"] == 1
+    cache.close()
+
+
+# ---------------------------------
+# Page cache
+# ---------------------------------
+def test_page_cache_keeps_stale_pages_for_revalidation(tmp_path, clock):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"), ttl=60, max_bytes=1000)
+    cache.store("https://a.example", "old text", etag='"v1"')
+
+    clock.advance(120)
+    cache.store("https://b.example", "other")
+
+    page = cache.lookup("https://a.example")
+    assert page is not None and not page.is_fresh(cache.ttl)
+    assert page.conditional_headers() == {"If-None-Match": '"v1"'}
+
+    cache.mark_revalidated("https://a.example")
+    assert cache.lookup("https://a.example").is_fresh(cache.ttl)
+    cache.close()
+
+
+def test_page_cache_byte_cap_evicts_least_recently_used(tmp_path, clock):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"), ttl=3600, max_bytes=25)
+    cache.store("a", "x" * 10)
+    clock.advance()
+    cache.store("b", "y" * 10)
+    clock.advance()
+    cache.lookup("a")
+
+    clock.advance()
+    cache.store("c", "z" * 10)
+
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+    assert cache.lookup("c") is not None
+    assert cache.stats()["bytes"] == 20
+
+    # A page larger than the whole cache is not stored
+    cache.store("huge", "h" * 26)
+    assert cache.lookup("huge") is None
+    cache.close()
@@ -0,0 +1,75 @@
+"""
+test_chunk_ids.py
+
+Content-addressed chunk ids and the skip-if-stored ingest path.
+"""
+
+import pytest
+
+from src import orchestrator
+from src.db.base import make_chunk_id
+from src.db.faiss_store import FaissStore
+
+
+def test_chunk_id_is_deterministic_and_whitespace_insensitive():
+    assert make_chunk_id("Hello  world\n", "a.com", "u") == make_chunk_id("Hello world", "a.com", "u")
+    assert len(make_chunk_id("Hello world", "a.com", "u")) == 32
+
+
+@pytest.mark.parametrize("other", [
+    ("Hello there", "a.com", "u"),
+    ("Hello world", "b.com", "u"),
+    ("Hello world", "a.com", "v"),
+])
+def test_chunk_id_depends_on_text_source_and_user(other):
+    assert make_chunk_id("Hello world", "a.com", "u") != make_chunk_id(*other)
+
+
+def _row(text, source="a.com", user="u"):
+    return make_chunk_id(text, source, user), text, source
+
+
+def _counters():
+    return {"chunks": 0, "duplicates": 0, "already_stored": 0, "embedded": 0}
+
+
+def test_store_batch_skips_chunks_already_in_memory(tmp_path, monkeypatch):
+    store = FaissStore(persist_dir=str(tmp_path), index_type="flat").open()
+    monkeypatch.setattr(orchestrator, "existing_chunk_ids", store.existing_ids)
+    monkeypatch.setattr(orchestrator, "refresh_chunks", store.refresh)
+    monkeypatch.setattr(orchestrator, "upsert_chunks", store.upsert_chunks)
+
+    embedded = []
+
+    def fake_embed(texts, batch_size=32):
+        embedded.extend(texts)
+        return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+    monkeypatch.setattr(orchestrator, "embed_text", fake_embed)
+
+    counters = _counters()
+    orchestrator._store_batch([_row("alpha"), _row("beta")], 32, "u", counters)
+    orchestrator._store_batch([_row("alpha"), _row("beta"), _row("gamma")], 32, "u", counters)
+
+    assert embedded == ["alpha", "beta", "gamma"]
+    assert counters["already_stored"] == 2
+    assert counters["embedded"] == 3
+    assert store.count() == 3
+    store.close()
+
+
+def test_store_batch_refreshes_write_time_of_stored_chunks(tmp_path, monkeypatch):
+    store = FaissStore(persist_dir=str(tmp_path), index_type="flat").open()
+    monkeypatch.setattr(orchestrator, "existing_chunk_ids", store.existing_ids)
+    monkeypatch.setattr(orchestrator, "upsert_chunks", store.upsert_chunks)
+    monkeypatch.setattr(orchestrator, "embed_text", lambda texts, batch_size=32: [[1.0, 0.0]] * len(texts))
+
+    refreshed = []
+    monkeypatch.setattr(orchestrator, "refresh_chunks", refreshed.extend)
+
+    row = _row("alpha")
+    orchestrator._store_batch([row], 32, "u", _counters())
+    orchestrator._store_batch([row], 32, "u", _counters())
+
+    assert refreshed == [row[0]]
+    store.close()
@@ -0,0 +1,60 @@
+"""
+test_chunking.py
+
+Sentence splitting and token-budgeted chunking (with a word counter in
+place of the embedding model's tokenizer).
+"""
+
+from src.utils.chunking import iter_chunks, iter_sentences
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_iter_sentences_splits_on_terminal_punctuation_and_lines():
+    text = "First one. Second one! Third?\nFourth line without a stop"
+    assert list(iter_sentences(text)) == [
+        "First one.", "Second one!", "Third?", "Fourth line without a stop"
+    ]
+
+
+def test_iter_sentences_keeps_abbreviations_attached():
+    sentences = list(iter_sentences("Dr. Smith arrived in the U.S. today. He left."))
+    assert sentences[0].startswith("Dr. Smith")
+    assert sentences[-1] == "He left."
+
+
+def test_iter_sentences_skips_blank_lines():
+    assert list(iter_sentences("First.\n\n\nSecond.")) == ["First.", "Second."]
+
+
+def test_chunks_respect_budget_and_sentence_boundaries():
+    sentences = [f"Sentence number {i} has six words." for i in range(20)]
+    chunks = list(iter_chunks(" ".join(sentences), max_tokens=20, overlap=0, count_tokens=count_words))
+
+    assert all(count_words(chunk) <= 20 for chunk in chunks)
+    assert " ".join(chunks) == " ".join(sentences)
+    assert all(chunk.endswith("words.") for chunk in chunks)
+
+
+def test_chunks_carry_trailing_sentences_as_overlap():
+    text = " ".join(f"S{i} a b c d." for i in range(6))
+    chunks = list(iter_chunks(text, max_tokens=10, overlap=5, count_tokens=count_words))
+
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous.split(". ")[-1]
+        assert current.startswith(last_sentence.rstrip("."))
+
+
+def test_overlong_sentence_is_split_on_words():
+    text = " ".join(f"w{i}" for i in range(25)) + "."
+    chunks = list(iter_chunks(text, max_tokens=10, overlap=0, count_tokens=count_words))
+
+    assert [count_words(chunk) for chunk in chunks] == [10, 10, 5]
+    assert " ".join(chunks) == text
+
+
+def test_iter_chunks_is_lazy():
+    chunks = iter_chunks("First. Second. Third.", max_tokens=1, overlap=0, count_tokens=count_words)
+    assert next(chunks) == "First."
@@ -0,0 +1,70 @@
+"""
+test_factcheck.py
+
+Claim extraction and the shingle index used by the lexical fact-check.
+"""
+
+from src.agents.factcheck_agent import ContextIndex, extract_claims, fact_check, split_sources
+
+CONTEXT = (
+    "Source: https://a.example/ai\n"
+    "Hospitals use machine learning to read scans faster. Adoption grew in 2024.\n"
+    "Source: https://b.example/energy\n"
+    "Solar capacity doubled across Europe last year.\n"
+)
+
+
+def test_extract_claims_splits_sentences_and_drops_citations():
+    summary = (
+        "Hospitals read scans faster [Source: https://a.example/ai]. "
+        "Solar capacity doubled! Is it cheaper?"
+    )
+    assert extract_claims(summary) == ["Hospitals read scans faster", "Solar capacity doubled", "Is it cheaper"]
+
+
+def test_extract_claims_ignores_punctuation_only_fragments():
+    assert extract_claims("Real claim here. ... !") == ["Real claim here"]
+
+
+def test_score_full_match_names_its_source():
+    coverage, source = ContextIndex(CONTEXT).score("Solar capacity doubled across Europe")
+    assert coverage == 1.0
+    assert source == "https://b.example/energy"
+
+
+def test_score_partial_and_missing_claims():
+    index = ContextIndex(CONTEXT)
+
+    coverage, source = index.score("Hospitals use machine learning to predict the weather")
+    assert 0.0 < coverage < 1.0
+    assert source == "https://a.example/ai"
+
+    assert index.score("Quantum computers broke RSA encryption") == (0.0, None)
+    assert index.score("") == (0.0, None)
+
+
+def test_score_ignores_inline_citations():
+    index = ContextIndex(CONTEXT)
+    plain = index.score("Solar capacity doubled across Europe")
+    cited = index.score("Solar capacity doubled across Europe [Source: https://b.example/energy]")
+    assert cited == plain
+
+
+def test_context_without_source_headers_is_one_segment():
+    assert ContextIndex("Plain text about solar panels.").score("solar panels") == (1.0, "unknown")
+
+
+def test_fact_check_splits_supported_and_unsupported():
+    summary = "Solar capacity doubled across Europe. Quantum computers broke RSA encryption."
+    result = fact_check(summary, CONTEXT)
+
+    assert result["total_claims"] == 2
+    assert result["supported"] == ["Solar capacity doubled across Europe"]
+    assert result["not_supported"] == ["Quantum computers broke RSA encryption"]
+
+
+def test_split_sources_recovers_each_segment():
+    segments = split_sources(CONTEXT)
+    assert [source for source, _ in segments] == ["https://a.example/ai", "https://b.example/energy"]
+    assert "Solar capacity" in segments[1][1]
+    assert "Solar capacity" not in segments[0][1]
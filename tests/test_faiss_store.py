@@ -0,0 +1,111 @@
+"""
+test_faiss_store.py
+
+FaissStore round-trips for each index type: upsert / query / get,
+delete, compact and reopening from disk.
+"""
+
+import faiss
+import numpy as np
+import pytest
+
+from src.db import faiss_store
+from src.db.faiss_store import FaissStore
+
+DIM = 8
+N = 100
+
+
+@pytest.fixture(params=["flat", "ivf", "hnsw"])
+def index_type(request, monkeypatch):
+    # Small enough for the IVF index to be trained on N vectors
+    monkeypatch.setattr(faiss_store, "FAISS_IVF_NLIST", 2)
+    return request.param
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((N, DIM)).astype(np.float32)
+
+
+def _fill(store, vectors, user="u"):
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    return store.upsert_chunks(texts, vectors.tolist(), ["src"] * len(texts), user=user)
+
+
+def test_upsert_query_get_round_trip(tmp_path, index_type, vectors):
+    store = FaissStore(persist_dir=str(tmp_path), index_type=index_type).open()
+    ids = _fill(store, vectors)
+
+    if index_type == "ivf":
+        assert isinstance(store._index, faiss.IndexIVF)
+
+    hit = store.query(vectors[7].tolist(), top_k=3, user="u")
+    assert hit["ids"][0][0] == ids[7]
+    assert hit["documents"][0][0] == "chunk 7"
+    assert hit["distances"][0][0] == pytest.approx(0.0, abs=1e-4)
+    assert len(hit["ids"][0]) == 3
+
+    got = store.get([ids[3], "missing"], user="u", include_embeddings=True)
+    assert got["ids"] == [ids[3]]
+    assert got["metadatas"][0]["source"] == "src"
+    np.testing.assert_allclose(got["embeddings"][0], vectors[3], atol=1e-6)
+
+    assert store.get([ids[3]], user="other")["ids"] == []
+    assert store.query(vectors[7].tolist(), top_k=3, user="other")["ids"] == [[]]
+    store.close()
+
+
+def test_reopen_reads_the_saved_index(tmp_path, index_type, vectors):
+    store = FaissStore(persist_dir=str(tmp_path), index_type=index_type).open()
+    ids = _fill(store, vectors)
+    store.close()
+
+    reopened = FaissStore(persist_dir=str(tmp_path), index_type=index_type).open()
+    assert reopened.count() == N
+    assert reopened.query(vectors[42].tolist(), top_k=1, user="u")["ids"][0] == [ids[42]]
+
+    # Writing to a memory-mapped index loads it into memory first
+    more = np.random.default_rng(1).standard_normal((1, DIM)).astype(np.float32)
+    [new_id] = reopened.upsert_chunks(["extra"], more.tolist(), ["src"], user="u")
+    assert reopened.query(more[0].tolist(), top_k=1, user="u")["ids"][0] == [new_id]
+    reopened.close()
+
+
+def test_delete_then_compact(tmp_path, index_type, vectors):
+    store = FaissStore(persist_dir=str(tmp_path), index_type=index_type).open()
+    ids = _fill(store, vectors)
+
+    assert store.delete(ids[:10] + ["missing"]) == 10
+    assert store.count() == N - 10
+    assert store.existing_ids(ids[:12]) == set(ids[10:12])
+
+    hit = store.query(vectors[5].tolist(), top_k=5, user="u")
+    assert not set(hit["ids"][0]) & set(ids[:10])
+    assert len(hit["ids"][0]) == 5
+
+    report = store.compact()
+    assert report["vectors_after"] == N - 10
+    if index_type == "hnsw":
+        # HNSW cannot remove vectors; only the rebuild drops them
+        assert report["vectors_before"] == N
+
+    assert store.query(vectors[50].tolist(), top_k=1, user="u")["ids"][0] == [ids[50]]
+    store.close()
+
+
+def test_upserting_an_existing_id_replaces_it(tmp_path, index_type, vectors):
+    store = FaissStore(persist_dir=str(tmp_path), index_type=index_type).open()
+    ids = _fill(store, vectors)
+
+    moved = (vectors[0] + 10.0).tolist()
+    store.upsert_chunks(["chunk 0"], [moved], ["src"], user="u", ids=[ids[0]])
+
+    assert store.count() == N
+    assert store.query(moved, top_k=1, user="u")["ids"][0] == [ids[0]]
+    store.close()
+
+
+def test_unknown_index_type_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        FaissStore(persist_dir=str(tmp_path), index_type="pq")
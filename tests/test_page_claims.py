@@ -0,0 +1,69 @@
+"""
+test_page_claims.py
+
+_PageClaims: a page claimed by one ingest is neither fetched nor
+embedded by a concurrent one.
+"""
+
+import threading
+
+from src.orchestrator import _PageClaims
+
+
+def test_claim_splits_owned_and_shared_pages():
+    claims = _PageClaims()
+
+    owned, waits = claims.claim("u", ["a", "b"])
+    assert owned == ["a", "b"]
+    assert waits == []
+
+    owned, waits = claims.claim("u", ["b", "c"])
+    assert owned == ["c"]
+    assert len(waits) == 1
+
+
+def test_claim_dedups_urls_within_one_call():
+    owned, waits = _PageClaims().claim("u", ["a", "a", "b", "a"])
+    assert owned == ["a", "b"]
+    assert waits == []
+
+
+def test_claims_are_per_user():
+    claims = _PageClaims()
+    claims.claim("u", ["a"])
+
+    owned, waits = claims.claim("v", ["a"])
+    assert owned == ["a"]
+    assert waits == []
+
+
+def test_release_wakes_waiters_and_frees_the_page():
+    claims = _PageClaims()
+    claims.claim("u", ["a"])
+    _, waits = claims.claim("u", ["a"])
+
+    claims.release("u", ["a"])
+
+    assert waits[0].is_set()
+    owned, _ = claims.claim("u", ["a"])
+    assert owned == ["a"]
+
+
+def test_concurrent_claims_give_each_page_one_owner():
+    claims = _PageClaims()
+    urls = [f"page-{i}" for i in range(50)]
+    owners = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        owned, _ = claims.claim("u", urls)
+        owners.extend(owned)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(owners) == sorted(urls)